@@ -6,6 +6,7 @@ from alembic import context
 from dotenv import load_dotenv
 from app.core.database import Base
 from app.api.v1.todos.models import *
+from app.modules.agents.models import *
 
 # Load environment variables from .env
 load_dotenv()
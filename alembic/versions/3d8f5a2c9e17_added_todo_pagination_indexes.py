@@ -0,0 +1,36 @@
+"""added todo pagination indexes
+
+Revision ID: 3d8f5a2c9e17
+Revises: 9c2e7b1d4a53
+Create Date: 2026-10-17 17:42:37.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d8f5a2c9e17'
+down_revision: Union[str, Sequence[str], None] = '9c2e7b1d4a53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('todo_collections', sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.create_index('ix_todo_collections_created_at_id', 'todo_collections', ['created_at', 'id'], unique=False)
+    op.create_index('ix_todos_created_at_id', 'todos', ['created_at', 'id'], unique=False)
+    op.create_index('ix_todos_status_created_at_id', 'todos', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_todos_collection_id_created_at_id', 'todos', ['collection_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_todos_collection_id_created_at_id', table_name='todos')
+    op.drop_index('ix_todos_status_created_at_id', table_name='todos')
+    op.drop_index('ix_todos_created_at_id', table_name='todos')
+    op.drop_index('ix_todo_collections_created_at_id', table_name='todo_collections')
+    op.drop_column('todo_collections', 'created_at')
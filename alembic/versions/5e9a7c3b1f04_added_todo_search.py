@@ -0,0 +1,43 @@
+"""added todo search
+
+Revision ID: 5e9a7c3b1f04
+Revises: 7b41e0c6d2f8
+Create Date: 2026-10-17 19:12:40.275310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9a7c3b1f04'
+down_revision: Union[str, Sequence[str], None] = '7b41e0c6d2f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.add_column('todos', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    op.create_index('ix_todos_search_vector', 'todos', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_todos_title_trgm', 'todos', ['title'], unique=False, postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_todos_title_trgm', table_name='todos', postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+    op.drop_index('ix_todos_search_vector', table_name='todos', postgresql_using='gin')
+    op.drop_column('todos', 'search_vector')
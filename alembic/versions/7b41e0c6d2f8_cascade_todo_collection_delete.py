@@ -0,0 +1,30 @@
+"""cascade todo collection delete
+
+Revision ID: 7b41e0c6d2f8
+Revises: 3d8f5a2c9e17
+Create Date: 2026-10-17 18:05:12.480913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b41e0c6d2f8'
+down_revision: Union[str, Sequence[str], None] = '3d8f5a2c9e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_constraint('todos_collection_id_fkey', 'todos', type_='foreignkey')
+    op.create_foreign_key('todos_collection_id_fkey', 'todos', 'todo_collections', ['collection_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('todos_collection_id_fkey', 'todos', type_='foreignkey')
+    op.create_foreign_key('todos_collection_id_fkey', 'todos', 'todo_collections', ['collection_id'], ['id'])
@@ -0,0 +1,61 @@
+"""added checkpoint tables
+
+Revision ID: 9c2e7b1d4a53
+Revises: 4442454a6e48
+Create Date: 2026-10-17 16:05:12.481930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c2e7b1d4a53'
+down_revision: Union[str, Sequence[str], None] = '4442454a6e48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('checkpoints',
+    sa.Column('thread_id', sa.Text(), nullable=False),
+    sa.Column('checkpoint_ns', sa.Text(), nullable=False),
+    sa.Column('checkpoint_id', sa.Text(), nullable=False),
+    sa.Column('parent_checkpoint_id', sa.Text(), nullable=True),
+    sa.Column('type', sa.String(length=32), nullable=False),
+    sa.Column('checkpoint', sa.LargeBinary(), nullable=False),
+    sa.Column('metadata_type', sa.String(length=32), nullable=False),
+    sa.Column('metadata_blob', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('thread_id', 'checkpoint_ns', 'checkpoint_id')
+    )
+    op.create_table('checkpoint_blobs',
+    sa.Column('thread_id', sa.Text(), nullable=False),
+    sa.Column('checkpoint_ns', sa.Text(), nullable=False),
+    sa.Column('channel', sa.Text(), nullable=False),
+    sa.Column('version', sa.Text(), nullable=False),
+    sa.Column('type', sa.String(length=32), nullable=False),
+    sa.Column('blob', sa.LargeBinary(), nullable=True),
+    sa.PrimaryKeyConstraint('thread_id', 'checkpoint_ns', 'channel', 'version')
+    )
+    op.create_table('checkpoint_writes',
+    sa.Column('thread_id', sa.Text(), nullable=False),
+    sa.Column('checkpoint_ns', sa.Text(), nullable=False),
+    sa.Column('checkpoint_id', sa.Text(), nullable=False),
+    sa.Column('task_id', sa.Text(), nullable=False),
+    sa.Column('idx', sa.Integer(), nullable=False),
+    sa.Column('channel', sa.Text(), nullable=False),
+    sa.Column('type', sa.String(length=32), nullable=False),
+    sa.Column('blob', sa.LargeBinary(), nullable=False),
+    sa.Column('task_path', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('thread_id', 'checkpoint_ns', 'checkpoint_id', 'task_id', 'idx')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('checkpoint_writes')
+    op.drop_table('checkpoint_blobs')
+    op.drop_table('checkpoints')
@@ -0,0 +1,231 @@
+"""
+Admission control for chat turns.
+
+At most `max_active` turns run the graph at once. Up to `max_queued` more wait their turn in
+arrival order and are told their queue position; anything beyond that is rejected right away
+instead of slowing every running turn down. Each client and conversation is also limited by
+a token bucket.
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Deque, Iterable, Optional
+from app.core.config import settings
+
+
+class AdmissionRejected(Exception):
+    """A chat turn refused before it started; mapped to an HTTP error with a Retry-After header."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionTimeout(Exception):
+    """A queued chat turn did not get a slot within the queue timeout."""
+
+
+class TokenBucket:
+    """Holds up to `burst` tokens, refilled at `rate` tokens per second."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def retry_after(self) -> float:
+        """Seconds until a token is available, 0 when one is available now."""
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    One token bucket per key (a client address or a conversation). A request is allowed only
+    when every one of its keys has a token; the least recently used buckets are dropped beyond
+    `max_keys`. A rate of 0 turns the limiter off.
+    """
+
+    def __init__(self, per_minute: float, burst: int, max_keys: int = 10000):
+        self.rate = per_minute / 60
+        self.burst = max(burst, 1)
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+
+    def _bucket(self, key: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket.refill(now)
+        return bucket
+
+    def acquire(self, keys: Iterable[str]) -> float:
+        """Takes a token for every key and returns 0, or returns the seconds to wait without taking any."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        buckets = [self._bucket(key, now) for key in keys]
+        retry_after = max((bucket.retry_after() for bucket in buckets), default=0.0)
+        if retry_after > 0:
+            self.limited += 1
+            return retry_after
+        for bucket in buckets:
+            bucket.tokens -= 1
+        self.allowed += 1
+        return 0.0
+
+    def stats(self) -> dict:
+        return {
+            "per_minute": self.rate * 60,
+            "burst": self.burst,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "keys": len(self._buckets),
+        }
+
+
+class Ticket:
+    """One chat turn's place in the AdmissionController: queued, then admitted, then released."""
+
+    def __init__(self, controller: "AdmissionController"):
+        self.controller = controller
+        self.admitted = False
+        self.released = False
+        self.queued_at = time.monotonic()
+        self._changed = asyncio.Event()
+
+    @property
+    def position(self) -> int:
+        """1-based place in the wait queue, 0 once admitted."""
+        return 0 if self.admitted else self.controller._queue.index(self) + 1
+
+    async def wait(self) -> AsyncIterator[int]:
+        """
+        Waits for a slot, yielding the queue position every time it changes. Raises
+        AdmissionTimeout (and leaves the queue) when no slot frees up within the queue timeout.
+        """
+        deadline = self.queued_at + self.controller.queue_timeout
+        last_position = None
+        while not self.admitted:
+            if self.position != last_position:
+                last_position = self.position
+                yield last_position
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                if self.admitted:
+                    break
+                self.controller.timeouts += 1
+                self.release()
+                raise AdmissionTimeout(f"No chat slot freed up within {self.controller.queue_timeout:g} seconds")
+
+    def release(self) -> None:
+        """Frees the slot, or the place in the queue; safe to call more than once."""
+        if self.released:
+            return
+        self.released = True
+        self.controller._release(self)
+
+
+class AdmissionController:
+    """Limits concurrent chat turns, with a bounded FIFO wait queue in front of them."""
+
+    def __init__(self, max_active: int, max_queued: int, queue_timeout: float):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._queue: Deque[Ticket] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.queue_wait_seconds = 0.0
+        self.max_queue_wait_seconds = 0.0
+
+    def enter(self) -> Ticket:
+        """
+        Returns a ticket that is admitted right away when a slot is free, or queued otherwise.
+        Raises AdmissionRejected when the queue is full as well.
+        """
+        ticket = Ticket(self)
+        if self.max_active <= 0 or (self.active < self.max_active and not self._queue):
+            self._admit(ticket)
+            return ticket
+        if len(self._queue) >= self.max_queued:
+            self.rejected += 1
+            raise AdmissionRejected(503, "The assistant is at capacity, please retry shortly", retry_after=self._retry_after())
+        self.queued += 1
+        self._queue.append(ticket)
+        return ticket
+
+    def _retry_after(self) -> float:
+        # a hint only: the average time admitted turns spent in the queue, at least a second
+        return max(1.0, self.queue_wait_seconds / self.admitted if self.admitted else 1.0)
+
+    def _admit(self, ticket: Ticket) -> None:
+        ticket.admitted = True
+        self.active += 1
+        self.admitted += 1
+        waited = time.monotonic() - ticket.queued_at
+        self.queue_wait_seconds += waited
+        self.max_queue_wait_seconds = max(self.max_queue_wait_seconds, waited)
+        ticket._changed.set()
+
+    def _release(self, ticket: Ticket) -> None:
+        if ticket.admitted:
+            self.active -= 1
+        else:
+            self._queue.remove(ticket)
+        while self._queue and (self.max_active <= 0 or self.active < self.max_active):
+            self._admit(self._queue.popleft())
+        # every ticket behind the one that left moved up
+        for waiting in self._queue:
+            waiting._changed.set()
+
+    def stats(self) -> dict:
+        return {
+            "max_active": self.max_active,
+            "max_queued": self.max_queued,
+            "active": self.active,
+            "queued_now": len(self._queue),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "queue_timeouts": self.timeouts,
+            "avg_queue_wait_ms": self.queue_wait_seconds / self.admitted * 1000 if self.admitted else 0.0,
+            "max_queue_wait_ms": self.max_queue_wait_seconds * 1000,
+        }
+
+
+admission = AdmissionController(
+    max_active=settings.CHAT_MAX_ACTIVE_TURNS,
+    max_queued=settings.CHAT_MAX_QUEUED_TURNS,
+    queue_timeout=settings.CHAT_QUEUE_TIMEOUT_SECONDS,
+)
+
+chat_rate_limiter = RateLimiter(
+    per_minute=settings.CHAT_RATE_LIMIT_PER_MINUTE,
+    burst=settings.CHAT_RATE_LIMIT_BURST,
+)
+
+
+def rate_limit_keys(client_host: Optional[str], checkpoint_id: Optional[str]) -> list:
+    """The token buckets a chat request draws from: its client address and, when resuming, its conversation."""
+    keys = [f"client:{client_host or 'unknown'}"]
+    if checkpoint_id and checkpoint_id != "null":
+        keys.append(f"thread:{checkpoint_id}")
+    return keys
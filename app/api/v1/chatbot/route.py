@@ -1,24 +1,113 @@
+import math
+from functools import partial
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from .service import VAServices
+from .sse import stream_stats, wait_for_disconnect
+from .admission import AdmissionRejected, admission, chat_rate_limiter, rate_limit_keys
+from app.modules.agents.router import router_stats
+from app.modules.agents.search import search_cache
+from app.modules.agents.semantic_cache import semantic_cache
+from app.modules.agents.limits import provider_limits
+from app.modules.agents.llms import model_registry
 
 va_router = APIRouter()
 va_service = VAServices()
 
 
+@va_router.get("/router/stats")
+async def get_router_stats():
+    """
+    returns hit-rate and latency of the fast-path router that skips the LLM supervisor.
+    """
+    return router_stats.snapshot()
+
+
+@va_router.get("/search/stats")
+async def get_search_cache_stats():
+    """
+    returns hit/miss counters of the research agent's search-result cache.
+    """
+    return search_cache.stats()
+
+
+@va_router.get("/llm-cache/stats")
+async def get_llm_cache_stats():
+    """
+    returns per-node hit/miss counters of the semantic LLM response cache.
+    """
+    return semantic_cache.stats()
+
+
+@va_router.get("/stream/stats")
+async def get_stream_stats():
+    """
+    returns counters of chat streams, including the ones aborted by a disconnect or idle timeout.
+    """
+    return stream_stats.snapshot()
+
+
+@va_router.get("/admission/stats")
+async def get_admission_stats():
+    """
+    returns the chat turn queue, the per-client rate limiter and the per-provider concurrency limits.
+    """
+    return {
+        "turns": admission.stats(),
+        "rate_limit": chat_rate_limiter.stats(),
+        "providers": provider_limits.stats(),
+    }
+
+
+@va_router.get("/llm/stats")
+async def get_llm_stats():
+    """
+    returns each node's model chain and budgets, and latency, output tokens and fallbacks per model.
+    """
+    return model_registry.stats()
+
+
 @va_router.get("/{message}")
-async def chat_stream(message: str, checkpoint_id: Optional[str] = None):
+async def chat_stream(message: str, request: Request, checkpoint_id: Optional[str] = None):
     """
     streams response to the user in real-time as the AI model generates it.
     """
-    print("Received message:", message)
+    client_host = request.client.host if request.client else None
+    retry_after = chat_rate_limiter.acquire(rate_limit_keys(client_host, checkpoint_id))
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many chat requests, please slow down",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    try:
+        ticket = admission.enter()
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+
     try:
         return StreamingResponse(
-            va_service.generate_chat_response(message, checkpoint_id),
-            media_type="text/event-stream"
+            va_service.generate_chat_response(
+                message,
+                checkpoint_id,
+                disconnected=partial(wait_for_disconnect, request.receive),
+                ticket=ticket,
+            ),
+            media_type="text/event-stream",
+            # no proxy buffering, so heartbeats and tokens reach the client as they are sent
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            # the stream releases the ticket when it ends, but a client that leaves before the
+            # stream starts never runs it; release() is idempotent, so both may call it
+            background=BackgroundTask(ticket.release),
         )
     except Exception as e:
+        ticket.release()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -1,9 +1,81 @@
-from typing import AsyncIterator, Optional
-from app.modules.agents.VA_graph import graph
+import logging
+from collections import OrderedDict
+from typing import AsyncGenerator, AsyncIterator, Awaitable, Callable, List, Optional
+from app.modules.agents.VA_graph import graph, checkpointer
+from app.modules.agents.checkpointer import PostgresCheckpointSaver
+from app.modules.agents.streaming import CHAT_EVENT_FILTER, SEARCH_TOOL_NAME
+from app.modules.agents.instrumentation import turn_callbacks
+from app.core.config import settings
+from app.core.tracing import tracer
 from uuid import uuid4
 from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import HumanMessage
-import json
+from .admission import AdmissionTimeout, Ticket
+from .sse import ChatEvent, build_encoder, encode_stream, stream_stats
+
+logger = logging.getLogger(__name__)
+
+
+class BranchStreams:
+    """
+    Keeps the tokens of parallel graph branches from interleaving. The first branch to produce
+    tokens is streamed live; tokens of the others are held back and sent, in the order those
+    branches started, once every branch before them has finished. Answers of different branches
+    are separated by a blank line.
+    """
+
+    SEPARATOR = "\n\n"
+
+    def __init__(self):
+        self.live: Optional[str] = None
+        self.held: "OrderedDict[str, List[str]]" = OrderedDict()
+        self.finished: set = set()
+        self.sent = False
+
+    def _start(self, branch: str) -> List[str]:
+        self.live = branch
+        return [self.SEPARATOR] if self.sent else []
+
+    def token(self, branch: str, text: str) -> List[str]:
+        """Returns the text to send now for a token of `branch`."""
+        out: List[str] = []
+        if self.live is None and branch not in self.held:
+            out = self._start(branch)
+        if branch != self.live:
+            self.held.setdefault(branch, []).append(text)
+            return out
+        self.sent = True
+        return out + [text]
+
+    def finish(self, branch: str) -> List[str]:
+        """Marks `branch` as done and returns the held-back text that can be sent now."""
+        self.finished.add(branch)
+        if branch != self.live:
+            return []
+        self.live = None
+        out: List[str] = []
+        while self.held:
+            branch, tokens = self.held.popitem(last=False)
+            out += self._start(branch) + tokens
+            self.sent = True
+            if branch not in self.finished:
+                break
+            self.live = None
+        return out
+
+    def drain(self) -> List[str]:
+        """Everything still held back, for the end of the turn."""
+        out: List[str] = []
+        while self.held:
+            branch, tokens = self.held.popitem(last=False)
+            out += self._start(branch) + tokens
+            self.sent = True
+        return out
+
+
+def event_branch(event: dict) -> str:
+    """The top-level graph node an event belongs to, e.g. "research_agent" for its sub-agent's model calls."""
+    return event.get("metadata", {}).get("langgraph_checkpoint_ns", "").split(":", 1)[0]
 
 
 class VAServices:
@@ -11,42 +83,88 @@ class VAServices:
     This class provides methods to interact with the VA services.
     """
 
-    async def generate_chat_response(self, message: str, checkpoint_id: Optional[str] = None) -> AsyncIterator[str]:
+    def __init__(self):
+        self.encoder = build_encoder()
+
+    def generate_chat_response(
+        self,
+        message: str,
+        checkpoint_id: Optional[str] = None,
+        disconnected: Optional[Callable[[], Awaitable[None]]] = None,
+        ticket: Optional[Ticket] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Generates a response for the given user input, as SSE frames.
+        The graph run is cancelled once `disconnected()` returns. With a `ticket` from the
+        admission controller the graph only starts once the ticket is admitted, and the ticket
+        is released when the stream ends, however it ends.
+        """
+        frames = encode_stream(
+            self.chat_events(message, checkpoint_id, ticket),
+            self.encoder,
+            coalesce_ms=settings.SSE_COALESCE_MS,
+            coalesce_bytes=settings.SSE_COALESCE_BYTES,
+            heartbeat_seconds=settings.SSE_HEARTBEAT_SECONDS,
+            idle_timeout_seconds=settings.SSE_IDLE_TIMEOUT_SECONDS,
+            queue_size=settings.SSE_SEND_QUEUE_SIZE,
+            disconnected=disconnected,
+            stats=stream_stats,
+        )
+        return frames if ticket is None else self._release_after(frames, ticket)
+
+    @staticmethod
+    async def _release_after(frames: AsyncGenerator[bytes, None], ticket: Ticket) -> AsyncIterator[bytes]:
+        try:
+            async for frame in frames:
+                yield frame
+        finally:
+            await frames.aclose()
+            ticket.release()
+
+    async def chat_events(
+        self, message: str, checkpoint_id: Optional[str] = None, ticket: Optional[Ticket] = None
+    ) -> AsyncIterator[ChatEvent]:
         """
-        Generates a response for the given user input.
+        Runs the graph for the given user input and yields (type, payload) chat events.
+        While the turn waits for admission its queue position is sent as "queue" events.
         """
         is_new_checkpoint = checkpoint_id is None or checkpoint_id == "null"
-        print("end point called with message:", message)
+        logger.debug("Chat turn requested", extra={"checkpoint_id": checkpoint_id, "message_chars": len(message)})
         if is_new_checkpoint:
-            new_checkpoint_id = str(uuid4())
-
-            thread_config = RunnableConfig(
-                {"configurable": {
-                    "thread_id": new_checkpoint_id,
-                }}
-            )
-            events = graph.astream_events({
-                "messages": [
-                    HumanMessage(content=message),
-                ]
-            }, config=thread_config, version="v2")
-
-            yield f"data: {json.dumps({
-                'type': 'checkpoint',
-                'checkpoint_id': new_checkpoint_id})}\n\n"
-
-        else:
-            thread_config = RunnableConfig(
-                {"configurable": {
-                    "thread_id": checkpoint_id,
-                }}
-            )
-
-            events = graph.astream_events({
-                "messages": [
-                    HumanMessage(content=message),
-                ]
-            }, config=thread_config, version="v2")
+            checkpoint_id = str(uuid4())
+            yield "checkpoint", checkpoint_id
+
+        if ticket is not None:
+            try:
+                async for position in ticket.wait():
+                    yield "queue", position
+            except AdmissionTimeout as e:
+                yield "error", str(e)
+                yield "end", None
+                return
+
+        # every node, model call, tool call and query of the turn becomes a span of its trace
+        with tracer.turn(checkpoint_id) as trace:
+            async for event in self._graph_events(message, checkpoint_id, turn_callbacks(trace)):
+                yield event
+
+    async def _graph_events(self, message: str, checkpoint_id: str, callbacks: Optional[list] = None) -> AsyncIterator[ChatEvent]:
+        """Runs one graph turn on the `checkpoint_id` thread and yields its chat events."""
+
+        thread_config = RunnableConfig(
+            {"configurable": {
+                "thread_id": checkpoint_id,
+            }, "callbacks": callbacks or []}
+        )
+        # only the answer models' and the search tool's events are delivered to this loop
+        events = graph.astream_events({
+            "messages": [
+                HumanMessage(content=message),
+            ]
+        }, config=thread_config, version="v2", **CHAT_EVENT_FILTER)
+
+        # the research and todo agents can run in parallel; their answers are sent one after the other
+        branches = BranchStreams()
 
         async for event in events:
             event_type = event.get("event")
@@ -55,29 +173,38 @@ class VAServices:
             # when the Ai model starts streaming data
             if event_type == "on_chat_model_stream":
                 chunk = data.get("chunk")
-                if chunk and hasattr(chunk, "content"):
-                    yield f"data: {json.dumps({'type': 'content', 'content': chunk.content})}\n\n"
+                content = getattr(chunk, "content", None)
+                if content and isinstance(content, str):
+                    for text in branches.token(event_branch(event), content):
+                        yield "content", text
 
             # when the Ai model ends streaming data and returns the final output
             elif event_type == "on_chat_model_end":
                 output = data.get("output")
                 tool_calls = getattr(output, "tool_calls", []) if output else []
-                search_calls = [call for call in tool_calls if call.get("name") == "tavily_search"]
+                search_calls = [call for call in tool_calls if call.get("name") == SEARCH_TOOL_NAME]
                 # confirms that the search tool was called
                 if search_calls:
-                    query = search_calls[0].get("args", {}).get("query", "")
-                    yield f"data: {json.dumps({'type': 'search_start', 'query': query})}\n\n"
-            
+                    yield "search_start", search_calls[0].get("args", {}).get("query", "")
+                # a model reply without tool calls is the branch's final answer
+                if not tool_calls:
+                    for text in branches.finish(event_branch(event)):
+                        yield "content", text
+
             # when a tool call ends and returns the search results
-            elif event_type == "on_tool_end" and event.get("name") == "tavily_search":
+            elif event_type == "on_tool_end" and event.get("name") == SEARCH_TOOL_NAME:
                 output = data.get("output")
                 results = output.get("results", []) if isinstance(output, dict) else []
                 if isinstance(results, list):
-                    urls = [result["url"] for result in results if isinstance(result, dict) and "url" in result]
-                    urls_json = json.dumps(urls)
-                    yield f"data: {json.dumps({'type': 'search_results', 'urls': urls_json})}\n\n"
+                    yield "search_results", [
+                        result["url"] for result in results if isinstance(result, dict) and "url" in result
+                    ]
 
-        yield f"data: {json.dumps({'type': 'end'})}\n\n"
+        for text in branches.drain():
+            yield "content", text
 
+        # persist the whole turn's checkpoints in one transaction
+        if isinstance(checkpointer, PostgresCheckpointSaver):
+            await checkpointer.aflush(checkpoint_id)
 
-               
+        yield "end", None
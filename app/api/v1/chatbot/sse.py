@@ -0,0 +1,263 @@
+"""
+Server-sent event framing for the chat stream.
+
+Frames are built from pre-encoded byte templates, so each event costs one JSON encode of
+its payload value only. Consecutive content tokens can be coalesced into a single frame,
+flushed every `coalesce_ms` milliseconds or `coalesce_bytes` bytes, so slow clients get
+fewer, larger writes. The graph run behind a stream is cancelled when its client goes away
+or it stays silent for too long.
+"""
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Tuple
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # falls back to the standard library encoder
+    orjson = None
+
+
+# (event type, payload) as produced by the chat service
+ChatEvent = Tuple[str, Any]
+
+_DONE = object()
+_DISCONNECTED = object()
+
+
+def _stdlib_dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def json_backend(name: str) -> Callable[[Any], bytes]:
+    """Returns the JSON encoder for `name` ("orjson" or "json"); orjson falls back to json when missing."""
+    if name == "orjson" and orjson is not None:
+        return orjson.dumps
+    return _stdlib_dumps
+
+
+class SSEEncoder:
+    """Encodes chat events as `data: {"type": ..., <field>: ...}` SSE frames."""
+
+    # event type -> name of the field carrying its payload
+    FIELDS = {
+        "checkpoint": "checkpoint_id",
+        "content": "content",
+        "search_start": "query",
+        "search_results": "urls",
+        "error": "detail",
+        "queue": "position",
+    }
+
+    def __init__(self, dumps: Callable[[Any], bytes] = _stdlib_dumps):
+        self.dumps = dumps
+        self._prefixes = {
+            event_type: b'data: {"type":"' + event_type.encode() + b'","' + field.encode() + b'":'
+            for event_type, field in self.FIELDS.items()
+        }
+        self._suffix = b"}\n\n"
+        self.end_frame = b'data: {"type":"end"}\n\n'
+        # an SSE comment, ignored by EventSource clients but keeps proxies from closing the connection
+        self.heartbeat_frame = b": ping\n\n"
+
+    def frame(self, event_type: str, payload: Any = None) -> bytes:
+        if event_type == "end":
+            return self.end_frame
+        return self._prefixes[event_type] + self.dumps(payload) + self._suffix
+
+
+class StreamStats:
+    """
+    Counters for chat streams. A stream is aborted when the client disconnects or the graph
+    sends nothing for the idle timeout; `runs_cancelled` counts the aborted streams whose graph
+    run was still in progress and was cancelled, i.e. the upstream work that was not paid for.
+    """
+
+    def __init__(self):
+        self.started = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.disconnects = 0
+        self.idle_timeouts = 0
+        self.runs_cancelled = 0
+        self.heartbeats = 0
+        self.send_queue_full = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "started": self.started,
+            "active": self.active,
+            "completed": self.completed,
+            "failed": self.failed,
+            "aborted": self.disconnects + self.idle_timeouts,
+            "disconnects": self.disconnects,
+            "idle_timeouts": self.idle_timeouts,
+            "runs_cancelled": self.runs_cancelled,
+            "heartbeats": self.heartbeats,
+            "send_queue_full": self.send_queue_full,
+        }
+
+
+stream_stats = StreamStats()
+
+
+async def wait_for_disconnect(receive: Callable[[], Awaitable[dict]]) -> None:
+    """Returns once the ASGI server reports that the client went away."""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def encode_stream(
+    events: AsyncIterator[ChatEvent],
+    encoder: SSEEncoder,
+    coalesce_ms: float = 0,
+    coalesce_bytes: int = 0,
+    heartbeat_seconds: float = 0,
+    idle_timeout_seconds: float = 0,
+    queue_size: int = 64,
+    disconnected: Optional[Callable[[], Awaitable[None]]] = None,
+    stats: Optional[StreamStats] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Turns chat events into SSE frames.
+
+    The events are produced in a task of their own (the graph run) and handed over through a
+    queue of `queue_size` events, so a slow client pauses the graph instead of buffering without
+    bound. The run is cancelled as soon as `disconnected()` returns, the response is closed, or
+    no event arrives for `idle_timeout_seconds`; the latter ends the stream with an error frame.
+    A `: ping` comment is sent after `heartbeat_seconds` without any frame.
+
+    With coalescing on, content tokens are buffered and sent as one frame once `coalesce_bytes`
+    have accumulated, `coalesce_ms` have passed since the first buffered token, or any other
+    event arrives; the event order is preserved. A limit of 0 turns the respective feature off.
+    """
+    stats = stats or StreamStats()
+    max_delay = coalesce_ms / 1000 if coalesce_ms > 0 else None
+    buffer: list = []
+    buffered_bytes = 0
+    first_at = 0.0
+
+    def flush() -> bytes:
+        nonlocal buffer, buffered_bytes
+        frame = encoder.frame("content", "".join(buffer))
+        buffer, buffered_bytes = [], 0
+        return frame
+
+    # the source runs in one task of its own (its context variables must stay in one context),
+    # so a timed wait only ever cancels the wait on the queue, never the source
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    async def pump() -> None:
+        # nothing is queued once cancelled: the consumer is gone and a full queue would block forever
+        try:
+            async for event in events:
+                if queue.full():
+                    stats.send_queue_full += 1
+                await queue.put(event)
+            await queue.put(_DONE)
+        except Exception as e:
+            await queue.put(e)
+
+    async def watch() -> None:
+        await disconnected()
+        pump_task.cancel()
+        # wake the consumer if it is waiting; otherwise it sees the finished watcher before its next read
+        if queue.empty():
+            queue.put_nowait(_DISCONNECTED)
+
+    stats.started += 1
+    stats.active += 1
+    pump_task = asyncio.create_task(pump())
+    watcher = asyncio.create_task(watch()) if disconnected is not None else None
+    outcome = "disconnect"
+    last_event_at = last_sent_at = time.monotonic()
+    try:
+        while True:
+            if watcher is not None and watcher.done():
+                return
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                deadlines = []
+                if buffer and max_delay is not None:
+                    deadlines.append(first_at + max_delay)
+                if heartbeat_seconds > 0:
+                    deadlines.append(last_sent_at + heartbeat_seconds)
+                if idle_timeout_seconds > 0:
+                    deadlines.append(last_event_at + idle_timeout_seconds)
+                timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    now = time.monotonic()
+                    if idle_timeout_seconds > 0 and now >= last_event_at + idle_timeout_seconds:
+                        outcome = "idle"
+                        if buffer:
+                            yield flush()
+                        yield encoder.frame("error", f"No response for {idle_timeout_seconds:g} seconds")
+                        yield encoder.end_frame
+                        return
+                    if buffer and max_delay is not None and now >= first_at + max_delay:
+                        last_sent_at = now
+                        yield flush()
+                    elif heartbeat_seconds > 0 and now >= last_sent_at + heartbeat_seconds:
+                        stats.heartbeats += 1
+                        last_sent_at = now
+                        yield encoder.heartbeat_frame
+                    continue
+
+            if item is _DISCONNECTED:
+                return
+            if item is _DONE:
+                outcome = "completed"
+                break
+            if isinstance(item, Exception):
+                outcome = "failed"
+                raise item
+
+            last_event_at = time.monotonic()
+            event_type, payload = item
+            if event_type == "content" and (max_delay is not None or coalesce_bytes > 0):
+                if not payload:
+                    continue
+                if not buffer:
+                    first_at = last_event_at
+                buffer.append(payload)
+                buffered_bytes += len(payload.encode())
+                if coalesce_bytes > 0 and buffered_bytes >= coalesce_bytes:
+                    last_sent_at = last_event_at
+                    yield flush()
+                continue
+
+            if buffer:
+                yield flush()
+            last_sent_at = last_event_at
+            yield encoder.frame(event_type, payload)
+
+        if buffer:
+            yield flush()
+    finally:
+        # reached on completion, on an abort above, and when the server closes the response
+        stats.active -= 1
+        if outcome == "completed":
+            stats.completed += 1
+        elif outcome == "failed":
+            stats.failed += 1
+        else:
+            if outcome == "idle":
+                stats.idle_timeouts += 1
+            else:
+                stats.disconnects += 1
+            if pump_task.cancelled() or not pump_task.done():
+                stats.runs_cancelled += 1
+        pump_task.cancel()
+        if watcher is not None:
+            watcher.cancel()
+
+
+def build_encoder() -> SSEEncoder:
+    return SSEEncoder(dumps=json_backend(settings.SSE_JSON_BACKEND))
@@ -0,0 +1,195 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+from uuid import UUID
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # the Redis tier is optional
+    aioredis = None
+
+
+# sets KEYS[1] to ARGV[1] for ARGV[3] seconds, unless KEYS[1]'s version (KEYS[2]) is no longer ARGV[2]
+SET_IF_VERSION = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[2] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+return 1
+"""
+
+# (local epoch, Redis version of the key) taken before loading a value; see RecordCache.fill_token
+FillToken = Tuple[int, Optional[str]]
+
+
+def _version_key(key: str) -> str:
+    return f"{key}:version"
+
+
+def todo_key(todo_id: UUID) -> str:
+    return f"todo:{todo_id}"
+
+
+def collection_key(collection_id: UUID) -> str:
+    return f"collection:{collection_id}"
+
+
+class RecordCache:
+    """
+    Read-through cache for single todo and collection lookups.
+
+    Values are the serialized JSON bytes of the response schema, so a hit is returned as-is
+    without touching the database or Pydantic. Entries live in an in-process LRU and, when
+    `redis_url` is set and the `redis` package is installed, in Redis so every worker shares
+    them. The services invalidate affected keys on every write, but only this worker's local
+    tier, so local entries live for `local_ttl_seconds` (by default a few seconds): that is how
+    long other workers can serve a record changed elsewhere. Redis entries live `ttl_seconds`.
+
+    Each key has a version in Redis, bumped by every invalidation. A value loaded from the
+    database is only written to Redis if the key's version is still the one read before
+    loading it, so a slow read on one worker cannot put back a record another worker has just
+    changed.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int,
+        redis_url: Optional[str] = None,
+        local_ttl_seconds: Optional[float] = None,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.local_ttl_seconds = ttl_seconds if local_ttl_seconds is None else min(local_ttl_seconds, ttl_seconds)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._redis = aioredis.from_url(redis_url) if redis_url and aioredis else None
+        self._set_if_version = self._redis.register_script(SET_IF_VERSION) if self._redis is not None else None
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # bumped by every invalidation in this worker; a value read before a concurrent write is not stored
+        self.epoch = 0
+
+    def _get_local(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: bytes) -> None:
+        self._entries[key] = (time.monotonic() + self.local_ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Returns the cached bytes for `key`, or None (counted as a miss)."""
+        if not self.enabled:
+            return None
+        value = self._get_local(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        if self._redis is not None:
+            try:
+                value = await self._redis.get(key)
+            except Exception as e:
+                logger.warning("Record cache Redis read failed: %s", e)
+                value = None
+            if value is not None:
+                self.redis_hits += 1
+                self._set_local(key, value)
+                return value
+        self.misses += 1
+        return None
+
+    async def fill_token(self, key: str) -> FillToken:
+        """
+        Call before loading `key` from the database and pass the result to `set()`: it records
+        this worker's epoch and the key's version in Redis ("" when it has none, None when
+        Redis could not be read).
+        """
+        version: Optional[str] = ""
+        if self.enabled and self._redis is not None:
+            try:
+                raw = await self._redis.get(_version_key(key))
+                version = raw.decode() if raw is not None else ""
+            except Exception as e:
+                logger.warning("Record cache Redis read failed: %s", e)
+                version = None
+        return self.epoch, version
+
+    async def set(self, key: str, value: bytes, token: Optional[FillToken] = None) -> None:
+        """
+        Stores `value` under `key`. Pass the `fill_token()` taken before loading the value: if
+        the key was invalidated since, here or on another worker, the value may already be
+        stale and is not stored.
+        """
+        if not self.enabled or (token is not None and token[0] != self.epoch):
+            return
+        self._set_local(key, value)
+        if self._redis is None or (token is not None and token[1] is None):
+            return
+        try:
+            if token is None:
+                await self._redis.set(key, value, ex=int(self.ttl_seconds))
+            else:
+                await self._set_if_version(keys=[key, _version_key(key)], args=[value, token[1], int(self.ttl_seconds)])
+        except Exception as e:
+            logger.warning("Record cache Redis write failed: %s", e)
+
+    async def invalidate(self, keys: Iterable[str]) -> None:
+        """Drops `keys` from both tiers."""
+        keys = list(dict.fromkeys(keys))
+        if not self.enabled or not keys:
+            return
+        self.invalidations += len(keys)
+        self.epoch += 1
+        for key in keys:
+            self._entries.pop(key, None)
+        if self._redis is not None:
+            try:
+                async with self._redis.pipeline(transaction=True) as pipe:
+                    pipe.delete(*keys)
+                    for key in keys:
+                        # outlives every value filled before it, so a stale fill always sees a new version
+                        pipe.incr(_version_key(key))
+                        pipe.expire(_version_key(key), int(self.ttl_seconds))
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning("Record cache Redis delete failed: %s", e)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.redis_hits) / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+            "redis_enabled": self._redis is not None,
+        }
+
+
+record_cache = RecordCache(
+    ttl_seconds=settings.RECORD_CACHE_TTL_SECONDS,
+    max_entries=settings.RECORD_CACHE_MAX_ENTRIES,
+    redis_url=settings.REDIS_URL if settings.RECORD_CACHE_REDIS_ENABLED else None,
+    # writes only invalidate this worker's local tier, so it must stay short-lived even without Redis
+    local_ttl_seconds=settings.RECORD_CACHE_LOCAL_TTL_SECONDS,
+    enabled=settings.RECORD_CACHE_ENABLED,
+)
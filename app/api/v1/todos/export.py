@@ -0,0 +1,114 @@
+"""
+Streaming exports of the todo tables.
+
+Rows are read through a server-side cursor (`AsyncSession.stream` with `yield_per`) and
+encoded one batch at a time, so memory stays flat regardless of table size.
+"""
+import csv
+import io
+import json
+from enum import Enum
+from typing import AsyncIterator, List, Optional
+from uuid import UUID
+from sqlalchemy import select
+
+from app.api.v1.todos.models import Todo, TodoCollection
+from app.api.v1.todos.schemas import TodoStatus
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class ExportKind(str, Enum):
+    TODOS = "todos"
+    COLLECTIONS = "collections"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def _statement(kind: ExportKind, status: Optional[TodoStatus], collection_id: Optional[UUID]):
+    if kind == ExportKind.COLLECTIONS:
+        columns = TodoCollection.__table__.c
+        return select(columns.id, columns.name, columns.description, columns.created_at).order_by(columns.created_at, columns.id)
+
+    todos = Todo.__table__.c
+    stmt = (
+        select(
+            todos.id,
+            todos.title,
+            todos.description,
+            todos.status,
+            todos.collection_id,
+            TodoCollection.__table__.c.name.label("collection_name"),
+            todos.created_at,
+            todos.updated_at,
+        )
+        .outerjoin(TodoCollection.__table__, todos.collection_id == TodoCollection.__table__.c.id)
+        .order_by(todos.created_at, todos.id)
+    )
+    if status is not None:
+        stmt = stmt.where(todos.status == status)
+    if collection_id is not None:
+        stmt = stmt.where(todos.collection_id == collection_id)
+    return stmt
+
+
+def _value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _ndjson(columns: List[str], rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, (_value(v) for v in row))), ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def _csv(columns: List[str], rows, header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    writer.writerows([["" if v is None else _value(v) for v in row] for row in rows])
+    return buffer.getvalue()
+
+
+async def stream_export(
+    kind: ExportKind = ExportKind.TODOS,
+    format: ExportFormat = ExportFormat.NDJSON,
+    status: Optional[TodoStatus] = None,
+    collection_id: Optional[UUID] = None,
+    batch_size: int = settings.EXPORT_BATCH_SIZE,
+) -> AsyncIterator[str]:
+    """
+    Yields the rows of `kind` (oldest first) as NDJSON lines or CSV, one chunk per batch.
+    Opens its own session, since it outlives the request handler that returns the response.
+    """
+    stmt = _statement(kind, status, collection_id).execution_options(yield_per=batch_size)
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(stmt)
+        columns = list(result.keys())
+        header = True
+        async for rows in result.partitions():
+            if format == ExportFormat.CSV:
+                yield _csv(columns, rows, header)
+            else:
+                yield _ndjson(columns, rows)
+            header = False
+        if header and format == ExportFormat.CSV:
+            # empty table: still emit the header row
+            yield _csv(columns, [], True)
@@ -1,8 +1,8 @@
 import uuid
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 from datetime import datetime, timezone
 from typing import List, Optional
-from sqlalchemy import Boolean, DateTime, ForeignKey, String, JSON, Enum as SQLAEnum
+from sqlalchemy import Boolean, Computed, DateTime, ForeignKey, Index, String, JSON, Enum as SQLAEnum, func
 from enum import Enum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.database import Base
@@ -23,10 +23,30 @@ class Todo(Base):
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     status: Mapped[TodoStatus] = mapped_column(SQLAEnum(TodoStatus), default=TodoStatus.PENDING)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True),default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
-    collection_id: Mapped[Optional[UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("todo_collections.id"), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    collection_id: Mapped[Optional[UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("todo_collections.id", ondelete="CASCADE"), nullable=True)
     collection: Mapped["TodoCollection"] = relationship("TodoCollection", back_populates="todos")
+    # maintained by Postgres; deferred so regular loads don't fetch it
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+
+    __table_args__ = (
+        # keyset pagination on (created_at, id), optionally filtered by status or collection
+        Index("ix_todos_created_at_id", "created_at", "id"),
+        Index("ix_todos_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_todos_collection_id_created_at_id", "collection_id", "created_at", "id"),
+        # full-text search, and fuzzy title matching (pg_trgm)
+        Index("ix_todos_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_todos_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
 
     # user_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     # user: Mapped["User"] = relationship("User", back_populates="todos")  # Assuming User model exists
@@ -38,7 +58,13 @@ class TodoCollection(Base):
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
-    todos: Mapped[List[Todo]] = relationship("Todo", back_populates="collection", cascade="all, delete-orphan")
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
+    # the database deletes a collection's todos (ON DELETE CASCADE); the ORM does not load them first
+    todos: Mapped[List[Todo]] = relationship("Todo", back_populates="collection", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        Index("ix_todo_collections_created_at_id", "created_at", "id"),
+    )
 
     def __repr__(self):
         return f"<TodoCollection(id={self.id}, name={self.name})>"
\ No newline at end of file
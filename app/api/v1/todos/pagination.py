@@ -0,0 +1,63 @@
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at: datetime, id: UUID) -> str:
+    """Opaque cursor pointing at the (created_at, id) of the last row of a page."""
+    raw = f"{created_at.isoformat()}|{id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, UUID]]:
+    """Decodes a cursor from `encode_cursor`; raises ValueError when it is malformed."""
+    if not cursor:
+        return None
+    try:
+        created_at, id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def encode_rank_cursor(score: float, id: UUID) -> str:
+    """Opaque cursor pointing at the (score, id) of the last row of a ranked search page."""
+    raw = f"{score!r}|{id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_rank_cursor(cursor: Optional[str]) -> Optional[Tuple[float, UUID]]:
+    """Decodes a cursor from `encode_rank_cursor`; raises ValueError when it is malformed."""
+    if not cursor:
+        return None
+    try:
+        score, id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return float(score), UUID(id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def keyset_page(db: AsyncSession, stmt, model, limit: int, cursor: Optional[str]):
+    """
+    Returns one page of `stmt` ordered by (created_at, id) descending, and the cursor of
+    the next page (None on the last page). Raises ValueError for a malformed cursor.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    position = decode_cursor(cursor)
+    if position is not None:
+        stmt = stmt.where(tuple_(model.created_at, model.id) < tuple_(*position))
+    stmt = stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+    result = await db.execute(stmt)
+    rows = result.scalars().all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
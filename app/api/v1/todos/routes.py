@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
-from typing import List
+from typing import List, Optional
 
 from app.api.v1.todos.schemas import (
     TodoCreate,
@@ -12,29 +13,101 @@ from app.api.v1.todos.schemas import (
     TodoCollectionUpdate,
     TodoCollectionInDB,
     TodoCollectionResponse,
+    TodoCollectionPage,
+    TodoPage,
+    TodoSearchPage,
+    TodoStatus,
+    TodoBulkCreate,
+    TodoBulkUpdate,
+    TodoBulkStatusUpdate,
+    TodoBulkDelete,
+    TodoBulkResult,
+    TodoBulkDeleteResult,
 )
 from app.api.v1.todos.services import TodoService, TodoCollectionService
+from app.api.v1.todos.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.api.v1.todos.export import ExportFormat, ExportKind, MEDIA_TYPES, stream_export
+from app.api.v1.todos.cache import record_cache
 # Assuming you have a session provider
 from app.core.database import async_get_db
 
 todo_router = APIRouter()
+# bulk exports and cache stats live on their own router so they are not served to the agent as MCP tools
+ops_router = APIRouter()
 
 
 # ----------- TODO ROUTES -----------
 
-@todo_router.get("/", response_model=List[TodoResponse], operation_id="get_all_todos")
-async def get_all_todos(session: AsyncSession = Depends(async_get_db)):
+@todo_router.get("/", response_model=TodoPage, operation_id="get_all_todos")
+async def get_all_todos(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[TodoStatus] = None,
+    collection_id: Optional[UUID] = None,
+    session: AsyncSession = Depends(async_get_db),
+):
     service = TodoService(session)
-    return await service.get_all_todos()
+    try:
+        return await service.get_all_todos(limit=limit, cursor=cursor, status=status, collection_id=collection_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# Search and bulk routes are declared before "/{todo_id}" so "search"/"bulk" are not parsed as a todo id.
+
+@todo_router.get("/search", response_model=TodoSearchPage, operation_id="search_todos")
+async def search_todos(
+    query: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[TodoStatus] = None,
+    collection_id: Optional[UUID] = None,
+    session: AsyncSession = Depends(async_get_db),
+):
+    """Search todos by the words in their title and description, best matches first."""
+    service = TodoService(session)
+    try:
+        return await service.search_todos(query, limit=limit, cursor=cursor, status=status, collection_id=collection_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@todo_router.post("/bulk", response_model=List[TodoInDB], status_code=status.HTTP_201_CREATED, operation_id="create_todos")
+async def create_todos(todos: TodoBulkCreate, session: AsyncSession = Depends(async_get_db)):
+    """Create several todos in one transaction."""
+    service = TodoService(session)
+    return await service.create_todos(todos.items)
+
+
+@todo_router.put("/bulk", response_model=TodoBulkResult, operation_id="update_todos")
+async def update_todos(todos: TodoBulkUpdate, session: AsyncSession = Depends(async_get_db)):
+    """Update several todos in one transaction; unknown ids are listed in `not_found`."""
+    service = TodoService(session)
+    return await service.update_todos(todos.items)
+
+
+@todo_router.put("/bulk/status", response_model=TodoBulkResult, operation_id="set_todos_status")
+async def set_todos_status(todos: TodoBulkStatusUpdate, session: AsyncSession = Depends(async_get_db)):
+    """Move several todos to the same status; unknown ids are listed in `not_found`."""
+    service = TodoService(session)
+    return await service.set_todos_status(todos.ids, todos.status)
+
+
+@todo_router.post("/bulk/delete", response_model=TodoBulkDeleteResult, operation_id="delete_todos")
+async def delete_todos(todos: TodoBulkDelete, session: AsyncSession = Depends(async_get_db)):
+    """Delete several todos in one transaction; unknown ids are listed in `not_found`."""
+    service = TodoService(session)
+    return await service.delete_todos(todos.ids)
 
 
 @todo_router.get("/{todo_id}", response_model=TodoInDB, operation_id="get_todo_by_id")
 async def get_todo(todo_id: UUID, session: AsyncSession = Depends(async_get_db)):
     service = TodoService(session)
-    todo = await service.get_todo_by_id(todo_id)
-    if not todo:
+    payload = await service.get_todo_json(todo_id)
+    if payload is None:
         raise HTTPException(status_code=404, detail="Todo not found")
-    return todo
+    # already serialized TodoInDB JSON, returned without re-validation
+    return Response(content=payload, media_type="application/json")
 
 
 @todo_router.post("/", response_model=TodoInDB, status_code=status.HTTP_201_CREATED, operation_id="create_todo")
@@ -60,27 +133,44 @@ async def delete_todo(todo_id: UUID, session: AsyncSession = Depends(async_get_d
         raise HTTPException(status_code=404, detail="Todo not found")
 
 
-@todo_router.get("/collection/{collection_id}", response_model=List[TodoResponse], operation_id="get_todos_by_collection")
-async def get_todos_by_collection(collection_id: UUID, session: AsyncSession = Depends(async_get_db)):
+@todo_router.get("/collection/{collection_id}", response_model=TodoPage, operation_id="get_todos_by_collection")
+async def get_todos_by_collection(
+    collection_id: UUID,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[TodoStatus] = None,
+    session: AsyncSession = Depends(async_get_db),
+):
     service = TodoService(session)
-    return await service.get_todos_by_collection_id(collection_id)
+    try:
+        return await service.get_todos_by_collection_id(collection_id, limit=limit, cursor=cursor, status=status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # ----------- COLLECTION ROUTES -----------
 
-@todo_router.get("/collections/", response_model=List[TodoCollectionInDB], operation_id="get_all_collections")
-async def get_all_collections(session: AsyncSession = Depends(async_get_db)):
+@todo_router.get("/collections/", response_model=TodoCollectionPage, operation_id="get_all_collections")
+async def get_all_collections(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(async_get_db),
+):
     service = TodoCollectionService(session)
-    return await service.get_all_collections()
+    try:
+        return await service.get_all_collections(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @todo_router.get("/collections/{collection_id}", response_model=TodoCollectionResponse, operation_id="get_collection_by_id")
 async def get_collection(collection_id: UUID, session: AsyncSession = Depends(async_get_db)):
     service = TodoCollectionService(session)
-    collection = await service.get_collection_by_id(collection_id)
-    if not collection:
+    payload = await service.get_collection_json(collection_id)
+    if payload is None:
         raise HTTPException(status_code=404, detail="Collection not found")
-    return collection
+    # already serialized TodoCollectionResponse JSON, returned without re-validation
+    return Response(content=payload, media_type="application/json")
 
 
 @todo_router.post("/collections/", response_model=TodoCollectionInDB, status_code=status.HTTP_201_CREATED, operation_id="create_collection")
@@ -104,3 +194,26 @@ async def delete_collection(collection_id: UUID, session: AsyncSession = Depends
     success = await service.delete_collection(collection_id)
     if not success:
         raise HTTPException(status_code=404, detail="Collection not found")
+
+
+# ----------- OPS ROUTES -----------
+
+@ops_router.get("/export", operation_id="export_todos")
+async def export_todos(
+    kind: ExportKind = ExportKind.TODOS,
+    format: ExportFormat = ExportFormat.NDJSON,
+    status: Optional[TodoStatus] = None,
+    collection_id: Optional[UUID] = None,
+):
+    """Streams every todo (or collection) as NDJSON or CSV, oldest first."""
+    return StreamingResponse(
+        stream_export(kind=kind, format=format, status=status, collection_id=collection_id),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{kind.value}.{format.value}"'},
+    )
+
+
+@ops_router.get("/cache/stats", operation_id="todo_cache_stats")
+async def todo_cache_stats():
+    """Hit rate and size of the todo/collection record cache."""
+    return record_cache.stats()
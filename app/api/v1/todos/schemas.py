@@ -5,6 +5,9 @@ from datetime import datetime
 from enum import Enum
 
 
+MAX_BULK_ITEMS = 500
+
+
 class TodoStatus(str, Enum):
     PENDING = "pending"
     COMPLETED = "completed"
@@ -28,6 +31,7 @@ class TodoCollectionUpdate(BaseModel):
 
 class TodoCollectionInDB(TodoCollectionBase):
     id: UUID
+    created_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -35,6 +39,10 @@ class TodoCollectionInDB(TodoCollectionBase):
 class TodoCollectionResponse(TodoCollectionInDB):
     todos: Optional[List["TodoInDB"]] = None
 
+class TodoCollectionPage(BaseModel):
+    items: List[TodoCollectionInDB]
+    next_cursor: Optional[str] = None
+
 
 # --------------------
 # Todo Schemas
@@ -65,3 +73,43 @@ class TodoInDB(TodoBase):
 
 class TodoResponse(TodoInDB):
     collection: Optional[TodoCollectionInDB] = None
+
+class TodoPage(BaseModel):
+    items: List[TodoResponse]
+    next_cursor: Optional[str] = None
+
+class TodoSearchHit(TodoResponse):
+    score: float
+
+class TodoSearchPage(BaseModel):
+    items: List[TodoSearchHit]
+    next_cursor: Optional[str] = None
+
+
+# --------------------
+# Bulk Todo Schemas
+# --------------------
+
+class TodoBulkCreate(BaseModel):
+    items: List[TodoCreate] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class TodoBulkUpdateItem(TodoUpdate):
+    id: UUID
+
+class TodoBulkUpdate(BaseModel):
+    items: List[TodoBulkUpdateItem] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class TodoBulkStatusUpdate(BaseModel):
+    ids: List[UUID] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+    status: TodoStatus
+
+class TodoBulkDelete(BaseModel):
+    ids: List[UUID] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class TodoBulkResult(BaseModel):
+    items: List[TodoInDB]
+    not_found: List[UUID] = []
+
+class TodoBulkDeleteResult(BaseModel):
+    deleted: List[UUID]
+    not_found: List[UUID] = []
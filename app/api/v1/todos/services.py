@@ -1,5 +1,6 @@
-from typing import Optional
-from sqlalchemy import select, update
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import Float, cast, column, delete, func, insert, literal, or_, select, tuple_, update, values
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
@@ -17,7 +18,40 @@ from app.api.v1.todos.schemas import (
     TodoCollectionUpdate,
     TodoCollectionInDB,
     TodoCollectionResponse,
+    TodoCollectionPage,
+    TodoPage,
+    TodoSearchHit,
+    TodoSearchPage,
+    TodoStatus,
+    TodoBulkUpdateItem,
+    TodoBulkResult,
+    TodoBulkDeleteResult,
 )
+from app.api.v1.todos.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_rank_cursor,
+    encode_rank_cursor,
+    keyset_page,
+)
+from app.api.v1.todos.cache import record_cache, todo_key, collection_key
+from app.core.database import use_primary
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _previous(todo_ids: Iterable[UUID]):
+    """Pre-update (id, collection_id) of the given todos, joined into an UPDATE to learn where a moved todo came from."""
+    return select(Todo.id, Todo.collection_id).where(Todo.id.in_(list(todo_ids))).subquery("previous")
+
+
+async def _invalidate(todo_ids: Iterable[UUID] = (), collection_ids: Iterable[Optional[UUID]] = ()) -> None:
+    """Drops the cached todos and the cached collections (which embed their todos) touched by a write."""
+    await record_cache.invalidate(
+        [todo_key(todo_id) for todo_id in todo_ids]
+        + [collection_key(collection_id) for collection_id in collection_ids if collection_id is not None]
+    )
 
 
 class TodoService:
@@ -33,10 +67,25 @@ class TodoService:
         result = await self.db.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def get_todo_json(self, todo_id: UUID) -> Optional[bytes]:
+        """Get a Todo as serialized `TodoInDB` JSON, read through the record cache."""
+        key = todo_key(todo_id)
+        payload = await record_cache.get(key)
+        if payload is not None:
+            return payload
+        token = await record_cache.fill_token(key)
+        # filled from the primary, so replica lag is never cached
+        with use_primary(self.db):
+            todo = await self.get_todo_by_id(todo_id)
+        if not todo:
+            return None
+        payload = TodoInDB.model_validate(todo).model_dump_json().encode()
+        await record_cache.set(key, payload, token)
+        return payload
+
     async def create_todo(self, todo_create: TodoCreate) -> TodoInDB:
         """Create a new Todo."""
-        print("Creating Todo with data:")
-        print(todo_create)
+        logger.debug("Creating todo", extra={"collection_id": str(todo_create.collection_id)})
         todo = Todo(
             title=todo_create.title,
             description=todo_create.description,
@@ -46,51 +95,215 @@ class TodoService:
         self.db.add(todo)
         await self.db.commit()
         await self.db.refresh(todo)
+        await _invalidate(collection_ids=[todo.collection_id])
         return TodoInDB.model_validate(todo)
 
     async def update_todo(self, todo_id: UUID, todo_update: TodoUpdate) -> Optional[TodoInDB]:
-        """Update an existing Todo."""
+        """Update an existing Todo with a single UPDATE ... RETURNING."""
+        fields = todo_update.model_dump(exclude_unset=True)
+        if not fields:
+            todo = await self.db.scalar(select(Todo).where(Todo.id == todo_id))
+            return TodoInDB.model_validate(todo) if todo else None
+        previous = _previous([todo_id])
         result = await self.db.execute(
-            select(Todo)
-            .where(Todo.id == todo_id)
+            update(Todo)
+            .where(Todo.id == todo_id, Todo.id == previous.c.id)
+            .values(**fields)
+            .returning(Todo, previous.c.collection_id)
+            .execution_options(synchronize_session=False, populate_existing=True)
         )
-        todo = result.scalar_one_or_none()
-        if not todo:
+        row = result.first()
+        if row is None:
             return None
-        for key, value in todo_update.model_dump(exclude_unset=True).items():
-            setattr(todo, key, value)
+        todo, previous_collection_id = row
         await self.db.commit()
-        await self.db.refresh(todo)
+        await _invalidate([todo.id], [todo.collection_id, previous_collection_id])
         return TodoInDB.model_validate(todo)
 
     async def delete_todo(self, todo_id: UUID) -> bool:
-        """Delete a Todo by its ID."""
+        """Delete a Todo by its ID with a single DELETE ... RETURNING."""
         result = await self.db.execute(
-            select(Todo).where(Todo.id == todo_id)
+            delete(Todo)
+            .where(Todo.id == todo_id)
+            .returning(Todo.id, Todo.collection_id)
+            .execution_options(synchronize_session=False)
         )
-        todo = result.scalar_one_or_none()
-        if not todo:
+        row = result.first()
+        if row is None:
             return False
-        await self.db.delete(todo)
         await self.db.commit()
+        await _invalidate([row.id], [row.collection_id])
         return True
 
-    async def get_all_todos(self) -> list[TodoResponse]:
-        """Get all Todos."""
-        result = await self.db.execute(
-            select(Todo).options(selectinload(Todo.collection))
+    # ----------- BULK OPERATIONS -----------
+    # Each runs as multi-row INSERT/UPDATE/DELETE ... RETURNING statements in one transaction.
+
+    async def create_todos(self, todo_creates: List[TodoCreate]) -> List[TodoInDB]:
+        """Create several Todos with a single INSERT."""
+        rows = [todo_create.model_dump() for todo_create in todo_creates]
+        result = await self.db.scalars(
+            insert(Todo).returning(Todo, sort_by_parameter_order=True), rows
+        )
+        todos = [TodoInDB.model_validate(todo) for todo in result.all()]
+        await self.db.commit()
+        await _invalidate(collection_ids={todo.collection_id for todo in todos})
+        return todos
+
+    async def update_todos(self, todo_updates: List[TodoBulkUpdateItem]) -> TodoBulkResult:
+        """
+        Update several Todos, each with its own fields. Items that set the same fields share
+        one UPDATE ... FROM (VALUES ...) statement.
+        """
+        groups: Dict[Tuple[str, ...], List[dict]] = {}
+        # the last item wins when the same id is listed twice
+        for todo_update in {item.id: item for item in todo_updates}.values():
+            fields = todo_update.model_dump(exclude_unset=True)
+            key = tuple(sorted(name for name in fields if name != "id"))
+            groups.setdefault(key, []).append(fields)
+
+        table = Todo.__table__
+        updated: Dict[UUID, TodoInDB] = {}
+        previous_collection_ids = set()
+        for names, rows in groups.items():
+            if not names:
+                # nothing to change: just report the current rows
+                result = await self.db.scalars(select(Todo).where(Todo.id.in_([row["id"] for row in rows])))
+                for todo in result.all():
+                    updated[todo.id] = TodoInDB.model_validate(todo)
+                continue
+            data = values(
+                *[column(name, table.c[name].type) for name in ("id",) + names],
+                name="data",
+            ).data([tuple(row[name] for name in ("id",) + names) for row in rows])
+            previous = _previous(row["id"] for row in rows)
+            stmt = (
+                update(Todo)
+                .where(Todo.id == data.c.id, Todo.id == previous.c.id)
+                .values({name: data.c[name] for name in names})
+                .returning(Todo, previous.c.collection_id)
+                .execution_options(synchronize_session=False, populate_existing=True)
+            )
+            for todo, previous_collection_id in (await self.db.execute(stmt)).all():
+                updated[todo.id] = TodoInDB.model_validate(todo)
+                previous_collection_ids.add(previous_collection_id)
+        await self.db.commit()
+        await _invalidate(updated, {todo.collection_id for todo in updated.values()} | previous_collection_ids)
+
+        todo_ids = list(dict.fromkeys(item.id for item in todo_updates))
+        return TodoBulkResult(
+            items=[updated[todo_id] for todo_id in todo_ids if todo_id in updated],
+            not_found=[todo_id for todo_id in todo_ids if todo_id not in updated],
+        )
+
+    async def set_todos_status(self, todo_ids: List[UUID], status: TodoStatus) -> TodoBulkResult:
+        """Move several Todos to the same status with a single UPDATE."""
+        result = await self.db.scalars(
+            update(Todo)
+            .where(Todo.id.in_(todo_ids))
+            .values(status=status)
+            .returning(Todo)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        todos = {todo.id: TodoInDB.model_validate(todo) for todo in result.all()}
+        await self.db.commit()
+        await _invalidate(todos, {todo.collection_id for todo in todos.values()})
+        todo_ids = list(dict.fromkeys(todo_ids))
+        return TodoBulkResult(
+            items=[todos[todo_id] for todo_id in todo_ids if todo_id in todos],
+            not_found=[todo_id for todo_id in todo_ids if todo_id not in todos],
         )
-        todos = result.scalars().all()
-        return [TodoResponse.model_validate(todo) for todo in todos]
 
-    async def get_todos_by_collection_id(self, collection_id: UUID) -> list[TodoResponse]:
-        """Get all Todos in a specific collection."""
+    async def delete_todos(self, todo_ids: List[UUID]) -> TodoBulkDeleteResult:
+        """Delete several Todos with a single DELETE."""
         result = await self.db.execute(
-            select(Todo).where(Todo.collection_id == collection_id).options(
-                selectinload(Todo.collection))
+            delete(Todo)
+            .where(Todo.id.in_(todo_ids))
+            .returning(Todo.id, Todo.collection_id)
+            .execution_options(synchronize_session=False)
         )
-        todos = result.scalars().all()
-        return [TodoResponse.model_validate(todo) for todo in todos]
+        rows = result.all()
+        deleted = {row.id for row in rows}
+        await self.db.commit()
+        await _invalidate(deleted, {row.collection_id for row in rows})
+        todo_ids = list(dict.fromkeys(todo_ids))
+        return TodoBulkDeleteResult(
+            deleted=[todo_id for todo_id in todo_ids if todo_id in deleted],
+            not_found=[todo_id for todo_id in todo_ids if todo_id not in deleted],
+        )
+
+    async def get_all_todos(
+        self,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        status: Optional[TodoStatus] = None,
+        collection_id: Optional[UUID] = None,
+    ) -> TodoPage:
+        """Get a page of Todos, newest first, optionally filtered by status and collection."""
+        stmt = select(Todo).options(selectinload(Todo.collection))
+        if status is not None:
+            stmt = stmt.where(Todo.status == status)
+        if collection_id is not None:
+            stmt = stmt.where(Todo.collection_id == collection_id)
+        todos, next_cursor = await keyset_page(self.db, stmt, Todo, limit, cursor)
+        return TodoPage(
+            items=[TodoResponse.model_validate(todo) for todo in todos],
+            next_cursor=next_cursor,
+        )
+
+    async def search_todos(
+        self,
+        query: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        status: Optional[TodoStatus] = None,
+        collection_id: Optional[UUID] = None,
+    ) -> TodoSearchPage:
+        """
+        Search Todos by title and description, best matches first. Uses the full-text index
+        (title weighted above description) and, with TODO_SEARCH_FUZZY, trigram matching on
+        the title so typos and partial words still match. Raises ValueError for a bad cursor.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        tsquery = func.websearch_to_tsquery("english", query)
+        rank = func.ts_rank_cd(Todo.search_vector, tsquery)
+        match = Todo.search_vector.op("@@")(tsquery)
+        if settings.TODO_SEARCH_FUZZY:
+            rank = rank + func.word_similarity(query, Todo.title)
+            match = or_(match, literal(query).op("<%")(Todo.title))
+        score = cast(rank, Float)
+
+        stmt = select(Todo, score.label("score")).options(selectinload(Todo.collection)).where(match)
+        if status is not None:
+            stmt = stmt.where(Todo.status == status)
+        if collection_id is not None:
+            stmt = stmt.where(Todo.collection_id == collection_id)
+        position = decode_rank_cursor(cursor)
+        if position is not None:
+            stmt = stmt.where(tuple_(score, Todo.id) < tuple_(*position))
+        stmt = stmt.order_by(score.desc(), Todo.id.desc()).limit(limit + 1)
+
+        rows = (await self.db.execute(stmt)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_rank_cursor(rows[-1].score, rows[-1].Todo.id)
+        return TodoSearchPage(
+            items=[
+                TodoSearchHit(**TodoResponse.model_validate(todo).model_dump(), score=score)
+                for todo, score in rows
+            ],
+            next_cursor=next_cursor,
+        )
+
+    async def get_todos_by_collection_id(
+        self,
+        collection_id: UUID,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        status: Optional[TodoStatus] = None,
+    ) -> TodoPage:
+        """Get a page of Todos in a specific collection."""
+        return await self.get_all_todos(limit=limit, cursor=cursor, status=status, collection_id=collection_id)
 
     
 class TodoCollectionService:
@@ -107,6 +320,21 @@ class TodoCollectionService:
         result = await self.db.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def get_collection_json(self, collection_id: UUID) -> Optional[bytes]:
+        """Get a TodoCollection with its todos as serialized `TodoCollectionResponse` JSON, read through the record cache."""
+        key = collection_key(collection_id)
+        payload = await record_cache.get(key)
+        if payload is not None:
+            return payload
+        token = await record_cache.fill_token(key)
+        with use_primary(self.db):
+            collection = await self.get_collection_by_id(collection_id)
+        if not collection:
+            return None
+        payload = TodoCollectionResponse.model_validate(collection).model_dump_json().encode()
+        await record_cache.set(key, payload, token)
+        return payload
+
     async def create_collection(self, collection_create: TodoCollectionCreate) -> TodoCollectionInDB:
         """Create a new TodoCollection."""
         collection = TodoCollection(
@@ -119,33 +347,48 @@ class TodoCollectionService:
         return TodoCollectionInDB.model_validate(collection)
 
     async def update_collection(self, collection_id: UUID, collection_update: TodoCollectionUpdate) -> Optional[TodoCollectionInDB]:
-        """Update an existing TodoCollection."""
-        result = await self.db.execute(
-            select(TodoCollection).where(TodoCollection.id == collection_id)
+        """Update an existing TodoCollection with a single UPDATE ... RETURNING."""
+        fields = collection_update.model_dump(exclude_unset=True)
+        if not fields:
+            collection = await self.db.scalar(select(TodoCollection).where(TodoCollection.id == collection_id))
+            return TodoCollectionInDB.model_validate(collection) if collection else None
+        collection = await self.db.scalar(
+            update(TodoCollection)
+            .where(TodoCollection.id == collection_id)
+            .values(**fields)
+            .returning(TodoCollection)
+            .execution_options(synchronize_session=False, populate_existing=True)
         )
-        collection = result.scalar_one_or_none()
         if not collection:
             return None
-        for key, value in collection_update.model_dump(exclude_unset=True).items():
-            setattr(collection, key, value)
         await self.db.commit()
-        await self.db.refresh(collection)
+        await _invalidate(collection_ids=[collection.id])
         return TodoCollectionInDB.model_validate(collection)
 
     async def delete_collection(self, collection_id: UUID) -> bool:
-        """Delete a TodoCollection by its ID."""
+        """
+        Delete a TodoCollection by its ID with a single DELETE ... RETURNING; its todos are
+        removed by the database (ON DELETE CASCADE).
+        """
+        # RETURNING runs before the cascade, so it still sees the todos that are about to go
+        todo_ids = select(func.array_agg(Todo.id)).where(Todo.collection_id == TodoCollection.id).scalar_subquery()
         result = await self.db.execute(
-            select(TodoCollection).where(TodoCollection.id == collection_id)
+            delete(TodoCollection)
+            .where(TodoCollection.id == collection_id)
+            .returning(TodoCollection.id, todo_ids)
+            .execution_options(synchronize_session=False)
         )
-        collection = result.scalar_one_or_none()
-        if not collection:
+        row = result.first()
+        if row is None:
             return False
-        await self.db.delete(collection)
         await self.db.commit()
+        await _invalidate(row[1] or [], [row[0]])
         return True
 
-    async def get_all_collections(self) -> list[TodoCollectionInDB]:
-        """Get all TodoCollections."""
-        result = await self.db.execute(select(TodoCollection))
-        collections = result.scalars().all()
-        return [TodoCollectionInDB.model_validate(collection) for collection in collections]
\ No newline at end of file
+    async def get_all_collections(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> TodoCollectionPage:
+        """Get a page of TodoCollections, newest first."""
+        collections, next_cursor = await keyset_page(self.db, select(TodoCollection), TodoCollection, limit, cursor)
+        return TodoCollectionPage(
+            items=[TodoCollectionInDB.model_validate(collection) for collection in collections],
+            next_cursor=next_cursor,
+        )
@@ -0,0 +1,295 @@
+"""
+In-process LangChain tools for the todo agent.
+
+Each tool mirrors a todo route (same name as the route's `operation_id`, same arguments) but
+calls TodoService / TodoCollectionService directly instead of going through HTTP and the
+FastApiMCP server. All tool calls of one agent turn share a single database session; a call
+that fails rolls it back, so it never fails the calls after it.
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, List, Optional, Tuple
+from uuid import UUID
+from langchain_core.tools import BaseTool, ToolException, tool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.todos.schemas import (
+    TodoCreate,
+    TodoUpdate,
+    TodoStatus,
+    TodoCollectionCreate,
+    TodoCollectionUpdate,
+    TodoBulkCreate,
+    TodoBulkUpdate,
+    TodoBulkUpdateItem,
+    TodoBulkStatusUpdate,
+    TodoBulkDelete,
+)
+from app.api.v1.todos.services import TodoService, TodoCollectionService
+from app.api.v1.todos.pagination import DEFAULT_PAGE_SIZE
+from app.core.database import AsyncSessionLocal, publish_writes, set_consistency_key
+
+
+# (session, lock) for the current agent turn; the lock serializes concurrent tool calls on it
+_turn_session: ContextVar[Optional[Tuple[AsyncSession, asyncio.Lock]]] = ContextVar("todo_turn_session", default=None)
+
+
+@asynccontextmanager
+async def todo_tool_session(consistency_key: Optional[str] = None) -> AsyncIterator[AsyncSession]:
+    """
+    Opens the session shared by every todo tool call made inside this context.
+    `consistency_key` (the chat thread id) keeps the thread's reads on the primary right after it wrote.
+    """
+    async with AsyncSessionLocal() as session:
+        await set_consistency_key(session, consistency_key)
+        token = _turn_session.set((session, asyncio.Lock()))
+        try:
+            yield session
+        finally:
+            _turn_session.reset(token)
+
+
+@asynccontextmanager
+async def _session() -> AsyncIterator[AsyncSession]:
+    current = _turn_session.get()
+    if current is None:
+        # called outside an agent turn: use a short-lived session of its own
+        async with AsyncSessionLocal() as session:
+            yield session
+        return
+    session, lock = current
+    async with lock:
+        try:
+            yield session
+        except Exception:
+            # a failed statement leaves the shared transaction aborted; roll it back so the
+            # turn's next tool calls (e.g. the model's retry) can still use the session
+            await session.rollback()
+            raise
+        # the thread's requests on other workers read this write from the primary too
+        await publish_writes(session)
+
+
+class TodoUpdateArgs(TodoUpdate):
+    """update_todo's arguments: the todo's id and the fields to change."""
+    todo_id: UUID
+
+
+class CollectionUpdateArgs(TodoCollectionUpdate):
+    """update_collection's arguments: the collection's id and the fields to change."""
+    collection_id: UUID
+
+
+# ----------- TODO TOOLS -----------
+
+@tool("get_all_todos")
+async def get_all_todos(
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    status: Optional[TodoStatus] = None,
+    collection_id: Optional[UUID] = None,
+) -> dict:
+    """
+    Get a page of todos (newest first), each with its collection, optionally filtered by status
+    or collection. Pass the returned `next_cursor` as `cursor` to fetch the next page.
+    """
+    async with _session() as session:
+        try:
+            page = await TodoService(session).get_all_todos(limit=limit, cursor=cursor, status=status, collection_id=collection_id)
+        except ValueError as e:
+            raise ToolException(str(e))
+    return page.model_dump(mode="json")
+
+
+@tool("search_todos")
+async def search_todos(
+    query: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    status: Optional[TodoStatus] = None,
+    collection_id: Optional[UUID] = None,
+) -> dict:
+    """
+    Find todos by the words in their title or description (typos tolerated), best matches
+    first. Use this instead of listing every todo when looking for specific ones.
+    """
+    async with _session() as session:
+        try:
+            page = await TodoService(session).search_todos(query, limit=limit, cursor=cursor, status=status, collection_id=collection_id)
+        except ValueError as e:
+            raise ToolException(str(e))
+    return page.model_dump(mode="json")
+
+
+@tool("get_todo_by_id")
+async def get_todo_by_id(todo_id: UUID) -> dict:
+    """Get a single todo by its id."""
+    async with _session() as session:
+        payload = await TodoService(session).get_todo_json(todo_id)
+    if payload is None:
+        raise ToolException("Todo not found")
+    return json.loads(payload)
+
+
+@tool("create_todo", args_schema=TodoCreate)
+async def create_todo(
+    title: str,
+    description: Optional[str] = None,
+    status: Optional[TodoStatus] = TodoStatus.PENDING,
+    collection_id: Optional[UUID] = None,
+) -> dict:
+    """Create a new todo, optionally inside a collection."""
+    todo_create = TodoCreate(title=title, description=description, status=status, collection_id=collection_id)
+    async with _session() as session:
+        todo = await TodoService(session).create_todo(todo_create)
+    return todo.model_dump(mode="json")
+
+
+@tool("update_todo", args_schema=TodoUpdateArgs)
+async def update_todo(todo_id: UUID, **fields: Any) -> dict:
+    """Update the given fields of an existing todo. Pass null to clear the description or collection."""
+    # only the arguments the model passed arrive here, so an explicit null clears its field
+    todo_update = TodoUpdate(**fields)
+    async with _session() as session:
+        todo = await TodoService(session).update_todo(todo_id, todo_update)
+    if not todo:
+        raise ToolException("Todo not found")
+    return todo.model_dump(mode="json")
+
+
+@tool("delete_todo")
+async def delete_todo(todo_id: UUID) -> str:
+    """Delete a todo by its id."""
+    async with _session() as session:
+        success = await TodoService(session).delete_todo(todo_id)
+    if not success:
+        raise ToolException("Todo not found")
+    return "Todo deleted"
+
+
+@tool("create_todos", args_schema=TodoBulkCreate)
+async def create_todos(items: List[TodoCreate]) -> list:
+    """Create several todos in one call. Prefer this over repeated create_todo calls."""
+    async with _session() as session:
+        todos = await TodoService(session).create_todos(items)
+    return [todo.model_dump(mode="json") for todo in todos]
+
+
+@tool("update_todos", args_schema=TodoBulkUpdate)
+async def update_todos(items: List[TodoBulkUpdateItem]) -> dict:
+    """Update several todos in one call, each item with its id and the fields to change."""
+    async with _session() as session:
+        result = await TodoService(session).update_todos(items)
+    return result.model_dump(mode="json")
+
+
+@tool("set_todos_status", args_schema=TodoBulkStatusUpdate)
+async def set_todos_status(ids: List[UUID], status: TodoStatus) -> dict:
+    """Move several todos to the same status (e.g. complete or archive them) in one call."""
+    async with _session() as session:
+        result = await TodoService(session).set_todos_status(ids, status)
+    return result.model_dump(mode="json")
+
+
+@tool("delete_todos", args_schema=TodoBulkDelete)
+async def delete_todos(ids: List[UUID]) -> dict:
+    """Delete several todos by id in one call."""
+    async with _session() as session:
+        result = await TodoService(session).delete_todos(ids)
+    return result.model_dump(mode="json")
+
+
+@tool("get_todos_by_collection")
+async def get_todos_by_collection(
+    collection_id: UUID,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    status: Optional[TodoStatus] = None,
+) -> dict:
+    """Get a page of todos in a collection. Pass the returned `next_cursor` as `cursor` for the next page."""
+    async with _session() as session:
+        try:
+            page = await TodoService(session).get_todos_by_collection_id(collection_id, limit=limit, cursor=cursor, status=status)
+        except ValueError as e:
+            raise ToolException(str(e))
+    return page.model_dump(mode="json")
+
+
+# ----------- COLLECTION TOOLS -----------
+
+@tool("get_all_collections")
+async def get_all_collections(limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> dict:
+    """Get a page of todo collections. Pass the returned `next_cursor` as `cursor` for the next page."""
+    async with _session() as session:
+        try:
+            page = await TodoCollectionService(session).get_all_collections(limit=limit, cursor=cursor)
+        except ValueError as e:
+            raise ToolException(str(e))
+    return page.model_dump(mode="json")
+
+
+@tool("get_collection_by_id")
+async def get_collection_by_id(collection_id: UUID) -> dict:
+    """Get a todo collection by its id, including its todos."""
+    async with _session() as session:
+        payload = await TodoCollectionService(session).get_collection_json(collection_id)
+    if payload is None:
+        raise ToolException("Collection not found")
+    return json.loads(payload)
+
+
+@tool("create_collection", args_schema=TodoCollectionCreate)
+async def create_collection(name: str, description: Optional[str] = None) -> dict:
+    """Create a new todo collection."""
+    async with _session() as session:
+        collection = await TodoCollectionService(session).create_collection(
+            TodoCollectionCreate(name=name, description=description)
+        )
+    return collection.model_dump(mode="json")
+
+
+@tool("update_collection", args_schema=CollectionUpdateArgs)
+async def update_collection(collection_id: UUID, **fields: Any) -> dict:
+    """Update the name or description of a todo collection. Pass null to clear the description."""
+    collection_update = TodoCollectionUpdate(**fields)
+    async with _session() as session:
+        collection = await TodoCollectionService(session).update_collection(collection_id, collection_update)
+    if not collection:
+        raise ToolException("Collection not found")
+    return collection.model_dump(mode="json")
+
+
+@tool("delete_collection")
+async def delete_collection(collection_id: UUID) -> str:
+    """Delete a todo collection and every todo in it."""
+    async with _session() as session:
+        success = await TodoCollectionService(session).delete_collection(collection_id)
+    if not success:
+        raise ToolException("Collection not found")
+    return "Collection deleted"
+
+
+TODO_TOOLS: List[BaseTool] = [
+    get_all_todos,
+    search_todos,
+    get_todo_by_id,
+    create_todo,
+    update_todo,
+    delete_todo,
+    create_todos,
+    update_todos,
+    set_todos_status,
+    delete_todos,
+    get_todos_by_collection,
+    get_all_collections,
+    get_collection_by_id,
+    create_collection,
+    update_collection,
+    delete_collection,
+]
+
+for _todo_tool in TODO_TOOLS:
+    # report "not found" and similar failures back to the model instead of aborting the turn
+    _todo_tool.handle_tool_error = True
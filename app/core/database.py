@@ -1,21 +1,196 @@
 # pyright: strict = false
 # type: ignore
+import logging
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+from fastapi import Request
+from sqlalchemy import Select, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from .config import settings
+from .db_metrics import DatabaseMetrics, db_metrics, instrument_queries, instrumented_pool_class
 from sqlalchemy.ext.declarative import declarative_base
 
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # the shared read-your-writes marks are optional
+    aioredis = None
+
+
+def create_engine(name: str, url: str):
+    """Creates a pooled, instrumented async engine; its metrics are registered in `db_metrics`."""
+    metrics = DatabaseMetrics(name, slow_query_ms=settings.DB_SLOW_QUERY_MS)
+    connect_args = {}
+    if make_url(url).get_driver_name() == "asyncpg":
+        # prepared statements cached per connection (set to 0 behind pgbouncer in transaction mode)
+        connect_args["prepared_statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+    async_engine = create_async_engine(
+        url,
+        echo=False,
+        poolclass=instrumented_pool_class(metrics),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+    instrument_queries(async_engine.sync_engine, metrics)
+    db_metrics[name] = metrics
+    return async_engine
+
+
 # Create Async Engine
-engine = create_async_engine(settings.POSTGRES_URL, echo=False)
+engine = create_engine("primary", settings.POSTGRES_URL)
+# Optional read replica; without one every statement goes to the primary
+read_engine = create_engine("replica", settings.POSTGRES_READ_URL) if settings.POSTGRES_READ_URL else None
 
 Base = declarative_base()
 
+
+class StickyWrites:
+    """
+    Remembers which consistency keys (a chat thread id, or the X-Thread-Id header) wrote
+    recently, so their reads stay on the primary until the replica has caught up.
+
+    Marks are kept in this process and, when `redis_url` is set and the `redis` package is
+    installed, in Redis as well, so a thread that wrote through one worker also reads from the
+    primary on every other worker. If Redis is unreachable only this worker's marks are used.
+    """
+
+    def __init__(self, window_seconds: float, max_keys: int = 10000, redis_url: Optional[str] = None):
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._until: "OrderedDict[str, float]" = OrderedDict()
+        self._redis = aioredis.from_url(redis_url) if redis_url and aioredis else None
+
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        return f"sticky:{key}"
+
+    def mark(self, key: str) -> None:
+        self._until[key] = time.monotonic() + self.window_seconds
+        self._until.move_to_end(key)
+        while len(self._until) > self.max_keys:
+            self._until.popitem(last=False)
+
+    def active(self, key: str) -> bool:
+        until = self._until.get(key)
+        if until is None:
+            return False
+        if until < time.monotonic():
+            del self._until[key]
+            return False
+        return True
+
+    async def publish(self, key: str) -> None:
+        """Shares the mark of `key` with the other workers."""
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(self._redis_key(key), 1, px=max(int(self.window_seconds * 1000), 1))
+        except Exception as e:
+            logger.warning("Read-your-writes mark could not be written to Redis: %s", e)
+
+    async def aactive(self, key: str) -> bool:
+        """Whether `key` wrote within the window, through this worker or any other."""
+        if self.active(key):
+            return True
+        if self._redis is None:
+            return False
+        try:
+            return bool(await self._redis.exists(self._redis_key(key)))
+        except Exception as e:
+            logger.warning("Read-your-writes mark could not be read from Redis: %s", e)
+            return False
+
+
+sticky_writes = StickyWrites(
+    settings.READ_YOUR_WRITES_SECONDS,
+    # the marks only matter when reads can go to a replica
+    redis_url=settings.REDIS_URL if settings.POSTGRES_READ_URL and settings.READ_YOUR_WRITES_REDIS_ENABLED else None,
+)
+
+
+class RoutingSession(Session):
+    """
+    Routes plain SELECTs to the read replica and everything else (INSERT/UPDATE/DELETE,
+    flushes, raw SQL) to the primary. Once a session writes, or when its consistency key (set
+    with `set_consistency_key`) wrote within the read-your-writes window, all its statements
+    use the primary; so do the statements run inside a `use_primary(session)` block.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if read_engine is None:
+            return engine.sync_engine
+        if self._flushing or not isinstance(clause, Select):
+            self.info["wrote"] = True
+            return engine.sync_engine
+        if self.info.get("wrote") or self.info.get("use_primary"):
+            return engine.sync_engine
+        key = self.info.get("consistency_key")
+        if self.info.get("sticky") or (key is not None and sticky_writes.active(key)):
+            return engine.sync_engine
+        return read_engine.sync_engine
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_write(session):
+    key = session.info.get("consistency_key")
+    if session.info.get("wrote") and key is not None:
+        sticky_writes.mark(key)
+        # shared with the other workers by `publish_writes`, which can await Redis
+        session.info["unpublished_write"] = True
+
+
+async def set_consistency_key(session: AsyncSession, key: Optional[str]) -> None:
+    """
+    Ties `session` to a consistency key (a chat thread id, or the X-Thread-Id header): its
+    reads go to the primary while the key is within the read-your-writes window of a write
+    made through any worker.
+    """
+    session.info["consistency_key"] = key
+    if key is not None and read_engine is not None:
+        session.info["sticky"] = await sticky_writes.aactive(key)
+
+
+async def publish_writes(session: AsyncSession) -> None:
+    """Shares the read-your-writes mark of the writes `session` committed with the other workers."""
+    key = session.info.get("consistency_key")
+    if session.info.pop("unpublished_write", False) and key is not None:
+        await sticky_writes.publish(key)
+
+
+@contextmanager
+def use_primary(session: AsyncSession):
+    """Sends every statement `session` runs inside this block to the primary."""
+    previous = session.info.get("use_primary", False)
+    session.info["use_primary"] = True
+    try:
+        yield session
+    finally:
+        session.info["use_primary"] = previous
+
+
 # Create Async Session
 AsyncSessionLocal = sessionmaker(
-    bind=engine, class_=AsyncSession, expire_on_commit=False
+    class_=AsyncSession, sync_session_class=RoutingSession, expire_on_commit=False
 )
 
 # Dependency to get DB Session
-async def async_get_db():
+async def async_get_db(request: Request):
+    """
+    Yields a session for the request. The session only checks a connection out of the pool
+    on its first query, so requests that never hit the database (e.g. record cache hits)
+    never wait on the pool. Requests carrying an X-Thread-Id header read their own writes,
+    on whichever worker serves them: the write's mark is shared before the response is sent.
+    """
     async with AsyncSessionLocal() as session:
+        await set_consistency_key(session, request.headers.get("x-thread-id"))
         yield session
+        await publish_writes(session)
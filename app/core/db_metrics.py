@@ -0,0 +1,131 @@
+import logging
+import time
+from typing import Dict, Type
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from .metrics import db_query_seconds
+from .tracing import current_trace
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseMetrics:
+    """
+    Pool and query counters for one engine.
+
+    Checkouts are timed end to end (waiting for a free connection, opening an overflow
+    connection, pre-ping), `waiting` is the number of checkouts in progress right now, and
+    `pool_timeouts` counts checkouts that gave up because the pool was exhausted. Queries
+    slower than `slow_query_ms` are counted and logged.
+    """
+
+    def __init__(self, name: str, slow_query_ms: float):
+        self.name = name
+        self.slow_query_ms = slow_query_ms
+        self.pool = None
+        self.waiting = 0
+        self.max_waiting = 0
+        self.checkouts = 0
+        self.checkout_seconds = 0.0
+        self.max_checkout_seconds = 0.0
+        self.pool_timeouts = 0
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.max_query_seconds = 0.0
+        self.slow_queries = 0
+        self.query_errors = 0
+
+    def record_checkout(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.checkout_seconds += seconds
+        self.max_checkout_seconds = max(self.max_checkout_seconds, seconds)
+
+    def record_query(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.query_seconds += seconds
+        self.max_query_seconds = max(self.max_query_seconds, seconds)
+        db_query_seconds.observe(seconds, self.name)
+        trace = current_trace.get()
+        if trace is not None:
+            end = time.perf_counter()
+            trace.add_span("db", statement.split(None, 1)[0].upper() if statement else "query", end - seconds, end, engine=self.name)
+        if seconds * 1000 >= self.slow_query_ms:
+            self.slow_queries += 1
+            logger.warning(
+                "Slow query on %s (%.1fms): %s", self.name, seconds * 1000, " ".join(statement.split())[:200],
+                extra={"engine": self.name, "duration_ms": round(seconds * 1000, 1)},
+            )
+
+    def snapshot(self) -> dict:
+        pool = self.pool
+        return {
+            "pool": {
+                "size": pool.size() if pool else None,
+                "checked_out": pool.checkedout() if pool else None,
+                "idle": pool.checkedin() if pool else None,
+                "overflow": pool.overflow() if pool else None,
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "checkouts": self.checkouts,
+                "avg_checkout_ms": self.checkout_seconds / self.checkouts * 1000 if self.checkouts else 0.0,
+                "max_checkout_ms": self.max_checkout_seconds * 1000,
+                "timeouts": self.pool_timeouts,
+            },
+            "queries": {
+                "count": self.queries,
+                "avg_ms": self.query_seconds / self.queries * 1000 if self.queries else 0.0,
+                "max_ms": self.max_query_seconds * 1000,
+                "slow": self.slow_queries,
+                "slow_threshold_ms": self.slow_query_ms,
+                "errors": self.query_errors,
+            },
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that times every checkout into `metrics`."""
+    metrics: DatabaseMetrics
+
+    def connect(self):
+        metrics = self.metrics
+        metrics.pool = self
+        metrics.waiting += 1
+        metrics.max_waiting = max(metrics.max_waiting, metrics.waiting)
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            metrics.pool_timeouts += 1
+            logger.warning("Connection pool of %s exhausted: %s", metrics.name, self.status())
+            raise
+        finally:
+            metrics.waiting -= 1
+            metrics.record_checkout(time.perf_counter() - start)
+
+
+def instrumented_pool_class(metrics: DatabaseMetrics) -> Type[InstrumentedQueuePool]:
+    # a subclass per engine, so the pool keeps its metrics when the engine recreates it
+    return type(f"InstrumentedQueuePool_{metrics.name}", (InstrumentedQueuePool,), {"metrics": metrics})
+
+
+def instrument_queries(engine: Engine, metrics: DatabaseMetrics) -> None:
+    """Times every statement executed on `engine` (the sync engine behind an AsyncEngine)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        metrics.record_query(statement, time.perf_counter() - conn.info["query_start"].pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        metrics.query_errors += 1
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+db_metrics: Dict[str, DatabaseMetrics] = {}
@@ -0,0 +1,166 @@
+"""
+Structured, non-blocking logging.
+
+Loggers under "app" hand their records to a bounded in-memory queue; a QueueListener thread
+formats them (one JSON object or text line each) and writes them to stdout, so a slow stdout
+never stalls the event loop. Records that do not fit in a full queue are dropped and counted
+instead of blocking. Every record carries the id of the HTTP request it was logged under,
+which follows the request into the agent graph and the database layer through a context
+variable. The access log can be sampled per route.
+"""
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from typing import Dict, Optional
+from app.core.config import settings
+
+request_id: ContextVar[str] = ContextVar("request_id", default="-")
+
+# attributes every LogRecord has; anything else was passed with `extra=` and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps each record with the current request id, in the thread that logged it, unless it carries one."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id.get()
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, request id, message and any `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """`<time> <level> <logger> [<request id>] <message> key=value ...`, for reading logs locally."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = " ".join(f"{key}={value}" for key, value in record.__dict__.items() if key not in _RECORD_ATTRIBUTES)
+        line = (
+            f"{self.formatTime(record)} {record.levelname} {record.name} "
+            f"[{getattr(record, 'request_id', '-')}] {record.getMessage()}"
+        )
+        if fields:
+            line += " " + fields
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler for a bounded queue: a record that does not fit is dropped and counted, never waited for."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # formatting is left to the listener thread; only the message is resolved here, so
+        # mutable arguments cannot change before the record is written
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class AccessLogSampler:
+    """
+    Decides which requests make it into the access log: a share of `rate` of every route, or
+    of the route's own rate from `route_rates`, plus every failed or slow request.
+    """
+
+    def __init__(self, rate: float, route_rates: Dict[str, float], slow_ms: float):
+        self.rate = rate
+        self.route_rates = route_rates
+        self.slow_ms = slow_ms
+
+    def should_log(self, route: str, status_code: int, duration_ms: float) -> bool:
+        if status_code >= 500 or duration_ms >= self.slow_ms:
+            return True
+        rate = self.route_rates.get(route, self.rate)
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+def parse_route_rates(spec: str) -> Dict[str, float]:
+    """Parses "route:rate,..." (e.g. "/metrics:0,/api/v1/chatbot/stream/stats:0.01") into {route: rate}."""
+    rates: Dict[str, float] = {}
+    for item in spec.split(","):
+        route, _, rate = item.strip().rpartition(":")
+        if route and rate:
+            rates[route] = float(rate)
+    return rates
+
+
+class LoggingSystem:
+    """Owns the log queue, its handler and the listener thread writing the records out."""
+
+    def __init__(self):
+        self.handler: Optional[DroppingQueueHandler] = None
+        self.listener: Optional[logging.handlers.QueueListener] = None
+
+    def configure(self, level: str, fmt: str, queue_size: int) -> None:
+        """Routes every "app.*" logger through the queue; safe to call more than once."""
+        if self.listener is not None:
+            return
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(JSONFormatter() if fmt == "json" else TextFormatter())
+        log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.handler = DroppingQueueHandler(log_queue)
+        self.handler.addFilter(RequestIdFilter())
+        self.listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        self.listener.start()
+
+        app_logger = logging.getLogger("app")
+        app_logger.setLevel(level.upper())
+        app_logger.addHandler(self.handler)
+        app_logger.propagate = False
+
+    def shutdown(self) -> None:
+        """Writes out what is still queued and stops the listener thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        if self.handler is not None:
+            logging.getLogger("app").removeHandler(self.handler)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.handler.queue.qsize() if self.handler else 0,
+            "dropped": self.handler.dropped if self.handler else 0,
+        }
+
+
+logging_system = LoggingSystem()
+
+access_sampler = AccessLogSampler(
+    rate=settings.LOG_ACCESS_SAMPLE_RATE,
+    route_rates=parse_route_rates(settings.LOG_ACCESS_SAMPLE_ROUTES),
+    slow_ms=settings.LOG_SLOW_REQUEST_MS,
+)
+
@@ -0,0 +1,144 @@
+"""
+Process-wide latency histograms and counters, exposed in the Prometheus text format at /metrics.
+
+Kept dependency-free: a series is a list of per-bucket counts keyed by its label values, so an
+observation costs one dict lookup and one bisect.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# seconds; from a cached DB query up to a long research turn
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """A histogram with one series per combination of label values."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket..., count above the last bucket, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(list(self.buckets) + ["+Inf"], series):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, label_values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {cumulative}")
+        return lines
+
+
+class Counter:
+    """A monotonically increasing total with one series per combination of label values."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._series: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, *label_values: str) -> None:
+        self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in self._series.items():
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {_number(value)}")
+        return lines
+
+
+class Gauge:
+    """A value read when /metrics is scraped, e.g. the number of chat turns running right now."""
+
+    def __init__(self, name: str, help: str, read: Callable[[], float]):
+        self.name = name
+        self.help = help
+        self.read = read
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {_number(self.read())}"]
+
+
+class MetricsRegistry:
+    """Every metric of the process, in registration order."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, read: Callable[[], float]) -> Gauge:
+        return self._register(Gauge(name, help, read))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+http_request_seconds = metrics.histogram(
+    "va_http_request_duration_seconds", "HTTP request latency, until the response starts.", ("method", "route", "status"),
+)
+turn_seconds = metrics.histogram(
+    "va_chat_turn_duration_seconds", "Latency of a whole chat turn through the agent graph.", ("outcome",),
+)
+node_seconds = metrics.histogram(
+    "va_graph_node_duration_seconds", "Latency of one graph node run.", ("node",),
+)
+llm_seconds = metrics.histogram(
+    "va_llm_duration_seconds", "Latency of one chat model call.", ("node", "model", "outcome"),
+)
+llm_first_token_seconds = metrics.histogram(
+    "va_llm_time_to_first_token_seconds", "Time from a streamed chat model call to its first token.", ("node", "model"),
+)
+llm_tokens = metrics.counter(
+    "va_llm_tokens_total", "Tokens sent to and generated by chat models.", ("node", "model", "direction"),
+)
+tool_seconds = metrics.histogram(
+    "va_tool_duration_seconds", "Latency of one tool call (web search, todo tools).", ("tool", "outcome"),
+)
+db_query_seconds = metrics.histogram(
+    "va_db_query_duration_seconds", "Latency of one database statement.", ("engine",),
+)
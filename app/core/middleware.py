@@ -4,28 +4,50 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 import time
 import logging
+from uuid import uuid4
 from starlette.middleware.sessions import SessionMiddleware
-# from app.core.config import settings
+from app.core.config import settings
+from app.core.logs import access_sampler, request_id
+from app.core.metrics import http_request_seconds
 
 logger = logging.getLogger("uvicorn.access")
 logger.disabled = True
 
+access_logger = logging.getLogger("app.access")
+
 
 def register_middleware(app: FastAPI):
     @app.middleware("http")
     async def custom_logging(request: Request, call_next):
-        start_time = time.time()
-
-        response = await call_next(request)
-        processing_time = time.time() - start_time
-
-        client = request.client
-        client_host = client.host if client else "unknown"
-        client_port = client.port if client else "unknown"
+        start_time = time.perf_counter()
+        # the request id follows the request into the agent graph and the database logs
+        current_id = request.headers.get("x-request-id") or uuid4().hex
+        token = request_id.set(current_id)
+        try:
+            response = await call_next(request)
+        finally:
+            request_id.reset(token)
+        processing_time = time.perf_counter() - start_time
+        response.headers["X-Request-ID"] = current_id
 
-        message = f"{client_host}:{client_port} - {request.method} - {request.url.path} - {response.status_code} completed after {processing_time}s"
+        # the route template, not the path, so "/chatbot/{message}" stays one series
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        http_request_seconds.observe(processing_time, request.method, route_path, str(response.status_code))
 
-        print(message)
+        duration_ms = processing_time * 1000
+        if settings.LOG_ACCESS_ENABLED and access_sampler.should_log(route_path, response.status_code, duration_ms):
+            client = request.client
+            access_logger.info(
+                "%s %s %s", request.method, request.url.path, response.status_code,
+                extra={
+                    "request_id": current_id,
+                    "client": f"{client.host}:{client.port}" if client else "unknown",
+                    "route": route_path,
+                    "status": response.status_code,
+                    "duration_ms": round(duration_ms, 3),
+                },
+            )
         return response
 
     app.add_middleware(
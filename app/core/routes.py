@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 from app.api.v1.chatbot.route import va_router
-from app.api.v1.todos.routes import todo_router
+from app.api.v1.todos.routes import todo_router, ops_router
 
 router = APIRouter()
 
@@ -9,6 +9,12 @@ router.include_router(
     prefix="/chatbot",
     tags=["agentic chatbot"]
 )
+# registered before todo_router so "/todos/export" is not captured by "/todos/{todo_id}"
+router.include_router(
+    ops_router,
+    prefix="/todos",
+    tags=["todos ops"]
+)
 router.include_router(
     todo_router,
     prefix="/todos",
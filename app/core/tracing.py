@@ -0,0 +1,205 @@
+"""
+Per-turn tracing.
+
+Each chat turn gets a TurnTrace, kept in a context variable while the graph runs, so every
+graph node, model call, tool call and database statement of the turn adds a span to it,
+wherever it happens. Finished turns are kept in a ring buffer (GET /traces), turns slower
+than TRACE_SLOW_TURN_MS are logged with their slowest spans, and, with OTEL_EXPORTER_ENABLED
+and the OpenTelemetry SDK installed, every turn is exported over OTLP/HTTP to a collector.
+"""
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional
+from app.core.config import settings
+from app.core.metrics import turn_seconds
+
+logger = logging.getLogger(__name__)
+
+try:
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from opentelemetry.trace import set_span_in_context
+except ImportError:  # the OpenTelemetry exporter is optional
+    TracerProvider = None
+
+
+class Span:
+    """One timed step of a turn; `parent` is the id of the enclosing span, None for the turn itself."""
+    __slots__ = ("id", "parent", "kind", "name", "start", "end", "attributes")
+
+    def __init__(self, id: int, parent: Optional[int], kind: str, name: str, start: float, attributes: Dict[str, Any]):
+        self.id = id
+        self.parent = parent
+        self.kind = kind
+        self.name = name
+        self.start = start
+        self.end: Optional[float] = None
+        self.attributes = attributes
+
+    def to_dict(self, origin: float) -> dict:
+        return {
+            "id": self.id,
+            "parent": self.parent,
+            "kind": self.kind,
+            "name": self.name,
+            "start_ms": (self.start - origin) * 1000,
+            "duration_ms": (self.end - self.start) * 1000 if self.end is not None else None,
+            **self.attributes,
+        }
+
+
+class TurnTrace:
+    """The spans of one chat turn, timed with perf_counter from the turn's start."""
+
+    def __init__(self, thread_id: str):
+        self.thread_id = thread_id
+        self.started_at = time.time_ns()
+        self.origin = time.perf_counter()
+        self.outcome = "ok"
+        self._ids = itertools.count(1)
+        self.root = Span(0, None, "turn", "chat_turn", self.origin, {"thread_id": thread_id})
+        self.spans: List[Span] = []
+
+    def start_span(self, kind: str, name: str, parent: Optional[int] = None, **attributes: Any) -> Span:
+        span = Span(next(self._ids), 0 if parent is None else parent, kind, name, time.perf_counter(), attributes)
+        self.spans.append(span)
+        return span
+
+    def add_span(self, kind: str, name: str, start: float, end: float, parent: Optional[int] = None, **attributes: Any) -> Span:
+        span = self.start_span(kind, name, parent, **attributes)
+        span.start, span.end = start, end
+        return span
+
+    @property
+    def duration(self) -> float:
+        return (self.root.end or time.perf_counter()) - self.origin
+
+    def to_dict(self) -> dict:
+        return {
+            "thread_id": self.thread_id,
+            "outcome": self.outcome,
+            "duration_ms": self.duration * 1000,
+            "spans": [span.to_dict(self.origin) for span in self.spans],
+        }
+
+
+current_trace: ContextVar[Optional[TurnTrace]] = ContextVar("current_trace", default=None)
+
+
+class OTLPExporter:
+    """Replays finished turns as OpenTelemetry spans; the SDK batches and sends them off the event loop."""
+
+    def __init__(self, endpoint: str, service_name: str):
+        provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=f"{endpoint.rstrip('/')}/v1/traces")))
+        self.provider = provider
+        self.tracer = provider.get_tracer("va_agent")
+
+    def _ns(self, trace: TurnTrace, at: float) -> int:
+        return trace.started_at + int((at - trace.origin) * 1e9)
+
+    def export(self, trace: TurnTrace) -> None:
+        root = self.tracer.start_span(
+            trace.root.name, start_time=trace.started_at,
+            attributes={"thread_id": trace.thread_id, "outcome": trace.outcome},
+        )
+        started = {0: root}
+        # in start order, so a parent span is always created before its children
+        for span in sorted(trace.spans, key=lambda span: span.start):
+            parent = started.get(span.parent, root)
+            attributes = {k: v for k, v in span.attributes.items() if isinstance(v, (str, bool, int, float))}
+            otel_span = self.tracer.start_span(
+                f"{span.kind} {span.name}", context=set_span_in_context(parent),
+                start_time=self._ns(trace, span.start), attributes=attributes,
+            )
+            started[span.id] = otel_span
+        for span in trace.spans:
+            started[span.id].end(end_time=self._ns(trace, span.end if span.end is not None else trace.root.end))
+        root.end(end_time=self._ns(trace, trace.root.end))
+
+    def shutdown(self) -> None:
+        self.provider.shutdown()
+
+
+class Tracer:
+    """Starts turn traces and keeps the most recent finished ones."""
+
+    def __init__(self, enabled: bool, recent: int, slow_turn_ms: float, exporter: Optional[OTLPExporter] = None):
+        self.enabled = enabled
+        self.slow_turn_ms = slow_turn_ms
+        self.exporter = exporter
+        self.recent: Deque[TurnTrace] = deque(maxlen=recent)
+
+    @contextmanager
+    def turn(self, thread_id: str) -> Iterator[Optional[TurnTrace]]:
+        """Traces the chat turn run inside the block; yields None when tracing is off."""
+        if not self.enabled:
+            yield None
+            return
+        trace = TurnTrace(thread_id)
+        token = current_trace.set(trace)
+        try:
+            yield trace
+        except (asyncio.CancelledError, GeneratorExit):
+            trace.outcome = "cancelled"
+            raise
+        except Exception:
+            trace.outcome = "error"
+            raise
+        finally:
+            try:
+                current_trace.reset(token)
+            except ValueError:  # a generator closed from another context
+                pass
+            trace.root.end = time.perf_counter()
+            self.finish(trace)
+
+    def finish(self, trace: TurnTrace) -> None:
+        turn_seconds.observe(trace.duration, trace.outcome)
+        self.recent.append(trace)
+        if trace.duration * 1000 >= self.slow_turn_ms:
+            slowest = sorted(
+                (span for span in trace.spans if span.end is not None),
+                key=lambda span: span.end - span.start, reverse=True,
+            )[:5]
+            breakdown = ", ".join(f"{span.kind} {span.name} {(span.end - span.start) * 1000:.0f}ms" for span in slowest)
+            logger.warning(
+                "Slow turn on thread %s (%.0fms): %s", trace.thread_id, trace.duration * 1000, breakdown,
+                extra={"thread_id": trace.thread_id, "duration_ms": round(trace.duration * 1000, 1)},
+            )
+        if self.exporter is not None:
+            try:
+                self.exporter.export(trace)
+            except Exception as e:
+                logger.warning("Trace export failed: %s", e)
+
+    def snapshot(self, limit: int = 20) -> List[dict]:
+        return [trace.to_dict() for trace in list(self.recent)[-limit:]][::-1]
+
+    def shutdown(self) -> None:
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+def build_exporter() -> Optional[OTLPExporter]:
+    if not settings.OTEL_EXPORTER_ENABLED:
+        return None
+    if TracerProvider is None:
+        logger.warning("OTEL_EXPORTER_ENABLED is set but opentelemetry-sdk / opentelemetry-exporter-otlp-proto-http are not installed")
+        return None
+    return OTLPExporter(settings.OTEL_EXPORTER_OTLP_ENDPOINT, settings.OTEL_SERVICE_NAME)
+
+
+tracer = Tracer(
+    enabled=settings.TRACE_ENABLED,
+    recent=settings.TRACE_RECENT_TURNS,
+    slow_turn_ms=settings.TRACE_SLOW_TURN_MS,
+    exporter=build_exporter(),
+)
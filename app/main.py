@@ -1,9 +1,27 @@
+import logging
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from app.core.routes import router as main_router
 from app.core.middleware import register_middleware
 from contextlib import asynccontextmanager
 from fastapi_mcp import FastApiMCP
 from fastapi.routing import APIRoute
+from app.modules.agents.registry import subagents, tools_fingerprint
+from app.modules.agents.VA_graph import checkpointer
+from app.modules.agents.transport import http_transport
+from app.modules.agents.checkpointer import PostgresCheckpointSaver
+from app.core.db_metrics import db_metrics
+from app.core.database import engine
+from app.core.config import settings
+from app.core.logs import logging_system
+from app.core.metrics import metrics
+from app.core.tracing import tracer
+
+# before anything is served, so every request and turn logs through the queue
+logging_system.configure(settings.LOG_LEVEL, settings.LOG_FORMAT, settings.LOG_QUEUE_SIZE)
+metrics.gauge("va_log_records_dropped", "Log records dropped because the log queue was full.", lambda: logging_system.stats()["dropped"])
+
+logger = logging.getLogger(__name__)
 
 description = """
 Virtual Assistant Agent API allows you to interact with a virtual assistant that can perform various tasks such as searching the web, managing tasks, and more.
@@ -17,8 +35,22 @@ async def lifespan(app: FastAPI):
     """
     mcp = FastApiMCP(app, include_tags=["todos"])
     mcp.mount()
-    print("MCP mounted successfully")
+    logger.info("MCP mounted")
+
+    # Build the sub-agents once; the todo agent is rebuilt only when the served tool list changes
+    subagents.startup(mcp_fingerprint_source=lambda: tools_fingerprint(mcp.tools))
+    logger.info("Sub-agents initialized")
+
+    if isinstance(checkpointer, PostgresCheckpointSaver):
+        checkpointer.start()
     yield
+    if isinstance(checkpointer, PostgresCheckpointSaver):
+        await checkpointer.stop()
+    subagents.shutdown()
+    await http_transport.aclose()
+    tracer.shutdown()
+    await engine.dispose()
+    logging_system.shutdown()
 
 app = FastAPI(
     title="VA Agent API",
@@ -40,3 +72,19 @@ async def read_root():
     return {"message": "Welcome to the VA Agent API!"}
 
 
+@app.get("/db/stats", tags=["Root"])
+async def db_stats():
+    """Connection pool and query timing metrics for every database engine."""
+    return {name: metrics.snapshot() for name, metrics in db_metrics.items()}
+
+
+@app.get("/metrics", tags=["Root"], response_class=PlainTextResponse)
+async def get_metrics():
+    """Latency histograms and token counters in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/traces", tags=["Root"])
+async def get_traces(limit: int = 20):
+    """The spans of the most recent chat turns, newest first."""
+    return tracer.snapshot(limit)
@@ -1,25 +1,47 @@
-from langgraph.graph import StateGraph, START,MessagesState
+from langgraph.graph import StateGraph, START, END
 from .agents import (
+    VAState,
     va_agent,
     enhancer_agent,
     research_agent,
-    todo_agent
+    todo_agent,
+    merge_agent,
 )
-from langgraph.checkpoint.memory import MemorySaver
+from .router import pre_router
+from app.core.config import settings
+from app.core.database import engine
+from .checkpointer import PostgresCheckpointSaver
+from .memory import BoundedMemorySaver
 
 # Create the stateful graph
-builder = StateGraph(MessagesState)
+builder = StateGraph(VAState)
 
 # Add nodes
+builder.add_node("pre_router", pre_router)
 builder.add_node("va_agent", va_agent)
 builder.add_node("enhancer_agent", enhancer_agent)
 builder.add_node("research_agent", research_agent)
 builder.add_node("todo_agent", todo_agent)
+builder.add_node("merge_agent", merge_agent)
 
 # Define entry point
-builder.add_edge(START, "va_agent")
+builder.add_edge(START, "pre_router")
+builder.add_edge("merge_agent", END)
 
 
 # Build the graph
-checkpointer = MemorySaver()
+# Conversation state lives in Postgres so any worker can resume any thread;
+# set CHECKPOINTER_BACKEND=memory for a single-process setup with a bounded in-memory store.
+if settings.CHECKPOINTER_BACKEND == "postgres":
+    checkpointer = PostgresCheckpointSaver(
+        engine,
+        flush_interval=settings.CHECKPOINT_FLUSH_INTERVAL,
+        max_pending=settings.CHECKPOINT_MAX_PENDING,
+    )
+else:
+    checkpointer = BoundedMemorySaver(
+        max_bytes=settings.CHECKPOINT_MEMORY_MAX_BYTES,
+        ttl_seconds=settings.CHECKPOINT_MEMORY_TTL_SECONDS,
+        max_checkpoints=settings.CHECKPOINT_MEMORY_MAX_CHECKPOINTS,
+    )
 graph = builder.compile(checkpointer=checkpointer)
@@ -1,39 +1,55 @@
-from typing import Literal
+import logging
+from typing import Annotated, Dict, List, Literal, Optional
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage
 from langgraph.types import Command
 from pydantic import BaseModel, Field
-from langchain_tavily import TavilySearch
-from langgraph.prebuilt import create_react_agent
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langgraph.checkpoint.memory import MemorySaver
 from langchain_core.runnables import RunnableConfig
-from langgraph.graph import StateGraph, START, END, MessagesState
+from langgraph.graph import MessagesState
+from .registry import subagents
+from .history import compact_messages
+from .semantic_cache import semantic_cache
+from .llms import model_registry
+from .streaming import ANSWER_TAG
+from app.api.v1.todos.tools import todo_tool_session
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",
-)
-memory = MemorySaver()
+# the specialists that answer the user; they may run side by side within one turn
+SPECIALISTS = ("research_agent", "todo_agent")
+
+
+def merge_results(current: Dict[str, str], update: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """Reducer for the specialists' answers: each branch adds its own, None clears them."""
+    if update is None:
+        return {}
+    return {**current, **update}
+
+
+class VAState(MessagesState):
+    # answers of the specialists that ran this turn, by node name, until merge_agent adds them to the messages
+    results: Annotated[Dict[str, str], merge_results]
 
 
 class VAModel(BaseModel):
-    next: Literal["research_agent", "todo_agent", "enhancer_agent"] = Field(
-        description="Determines which specialist to activate next in the workflow sequence: "
+    next: List[Literal["research_agent", "todo_agent", "enhancer_agent"]] = Field(
+        min_length=1,
+        description="Determines which specialists to activate next in the workflow sequence: "
                     "'enhancer_agent' when user input requires clarification, expansion, or refinement, "
                     "'research_agent' when additional facts, context, or data collection is necessary, "
-                    "'todo_agent' when the task involves todo & todo collection management (adding, completing, listing, or deleting todos)."
+                    "'todo_agent' when the task involves todo & todo collection management (adding, completing, listing, or deleting todos). "
+                    "List both 'research_agent' and 'todo_agent' when the request has an independent research part and todo part; "
+                    "they then run at the same time. 'enhancer_agent' is always listed alone."
     )
     reason: str = Field(
         description="Detailed justification for the routing decision, explaining the rationale behind selecting the particular specialist and how this advances the task toward completion."
     )
 
 
-def va_agent(state: MessagesState) -> Command[Literal["research_agent", "todo_agent", "enhancer_agent"]]:
-
-    system_prompt = ('''
+# The supervisor prompt and its structured-output runnable are built once and reused every turn
+SUPERVISOR_SYSTEM_PROMPT = ('''
         You are a workflow supervisor managing a team of three specialized agents: Prompt Enhancer, Researcher, and Todo Agent. 
         Your role is to orchestrate the workflow by selecting the most appropriate next agent based on the current state and needs of the task. 
         Provide a clear, concise rationale for each decision to ensure transparency in your decision-making process.
@@ -45,23 +61,42 @@ def va_agent(state: MessagesState) -> Command[Literal["research_agent", "todo_ag
 
         **Your Responsibilities**:
         1. Analyze each user request and agent response for completeness, accuracy, and relevance.
-        2. Route the task to the most appropriate agent at each decision point.
+        2. Route the task to the most appropriate agent at each decision point. When a request has independent research and todo parts, select both the Researcher and the Todo Agent so they work in parallel.
         3. Maintain workflow momentum by avoiding redundant agent assignments.
         4. Continue the process until the user's request is fully and satisfactorily resolved.
 
         Your objective is to create an efficient workflow that leverages each agent's strengths while minimizing unnecessary steps, ultimately delivering complete and accurate solutions to user requests.
-    ''')
+''')
+
+# each node runs on its own model chain (LLM_MODEL_<NODE>); routing only needs a small, fast model
+# the supervisor is on the critical path of every turn, so its slow calls may be hedged (LLM_HEDGE_NODES)
+supervisor_llm = model_registry.hedge("va_agent", model_registry.get("va_agent").with_structured_output(VAModel))
+# the enhanced query is streamed to the user, the supervisor's routing call is not
+enhancer_llm = model_registry.get("enhancer_agent", tags=[ANSWER_TAG])
+
+
+async def va_agent(state: VAState) -> Command[Literal["research_agent", "todo_agent", "enhancer_agent"]]:
+    """
+        Supervisor node that routes the conversation to the next specialist, or to several
+        specialists at once, which then run as parallel branches of the same step.
+        Uses the async structured-output call so routing never blocks the event loop
+        shared by every other chat stream.
+    """
 
     messages = [
-        {"role": "system", "content": system_prompt},
-    ] + state["messages"]
+        {"role": "system", "content": SUPERVISOR_SYSTEM_PROMPT},
+    ] + compact_messages(state["messages"])
 
-    response = llm.with_structured_output(VAModel).invoke(messages)
+    response = await semantic_cache.acached(
+        "va_agent", SUPERVISOR_SYSTEM_PROMPT, state["messages"],
+        lambda: supervisor_llm.ainvoke(messages),
+    )
 
-    goto = response.next  # type: ignore
+    plan = [node for node in SPECIALISTS if node in response.next]  # type: ignore
+    goto = plan or ["enhancer_agent"]
     reason = response.reason  # type: ignore
 
-    print(f"--- Workflow Transition: Supervisor → {goto.upper()} ---")
+    logger.debug("Workflow transition: supervisor -> %s", " + ".join(goto))
 
     return Command(
         update={
@@ -73,7 +108,7 @@ def va_agent(state: MessagesState) -> Command[Literal["research_agent", "todo_ag
     )
 
 
-async def enhancer_agent(state: MessagesState) -> Command[Literal["va_agent"]]:
+async def enhancer_agent(state: VAState) -> Command[Literal["va_agent"]]:
     """
         Enhancer agent node that improves and clarifies user queries.
         Takes the original user input and transforms it into a more precise,
@@ -92,11 +127,14 @@ async def enhancer_agent(state: MessagesState) -> Command[Literal["va_agent"]]:
 
     messages = [
         {"role": "system", "content": system_prompt},
-    ] + state["messages"]
+    ] + compact_messages(state["messages"])
 
-    enhanced_query = await llm.ainvoke(messages)
+    enhanced_query = await semantic_cache.acached(
+        "enhancer_agent", system_prompt, state["messages"],
+        lambda: enhancer_llm.ainvoke(messages),
+    )
 
-    print(f"--- Workflow Transition: Prompt Enhancer → Supervisor ---")
+    logger.debug("Workflow transition: enhancer_agent -> va_agent")
 
     return Command(
         update={
@@ -113,65 +151,44 @@ async def enhancer_agent(state: MessagesState) -> Command[Literal["va_agent"]]:
 # This is the search agent that uses TavilySearch to perform web searches.
 
 
-async def research_agent(state: MessagesState):
-    """Run a class todo agent using the react agent framework and a remote MCP server."""
-    search_tool = TavilySearch(max_results=5)
-    tools = [search_tool]
-    graph = create_react_agent(
-        "google_genai:gemini-2.0-flash",
-        tools
-    )
+async def research_agent(state: VAState) -> Command[Literal["merge_agent"]]:
+    """Run the research agent using the react agent framework and the Tavily search tool."""
+    graph = subagents.get_research_agent()
 
     # Create event stream
-    result = await graph.ainvoke(state)
+    result = await graph.ainvoke({"messages": compact_messages(state["messages"])})
 
     return Command(
-        update={
-            "messages": [
-                HumanMessage(content=result["messages"]
-                             [-1].content, name="research_agent")
-            ]
-        },
-        goto=END,
+        update={"results": {"research_agent": result["messages"][-1].content}},
+        goto="merge_agent",
     )
 
 
-async def todo_agent(state: MessagesState):
-    """Run a class todo agent using the react agent framework and a remote MCP server."""
-    client = MultiServerMCPClient({
-        "fastapi-mcp": {
-            "url": "http://localhost:8000/mcp",
-            "transport": "sse",
-        }
-    })  # type: ignore
-    system_prompt = (
-        "You are a helpful and intelligent Todo Agent. "
-        "Your primary tasks include adding, completing, listing, and deleting todos, along with other todo-related actions. "
-        "You have access to specialized tools: 'todo tools' and 'todo collection tools' to assist with these tasks. "
-        "todos have ids etc , which identify them uniquely. so try use the ids when dealing on an individual todo. "
-        "Before performing any action, first check your memory to see if the required information is already available. "
-        "Only use a tool if the necessary data is not found in memory. "
-        "When using a tool, be thoughtful and deliberate—choose the most appropriate tool for the specific task at hand. "
-        "Use the tool name explicitly in your response when invoking a tool."
-        "you don't need to ask the user any permission to use the tools, just use them as needed. especially the todo tools."
-    )
-
-    remote_tools = await client.get_tools()
-    graph = create_react_agent(
-        "google_genai:gemini-2.0-flash",
-        tools=remote_tools,
-        prompt=system_prompt,
-    )
+async def todo_agent(state: VAState, config: RunnableConfig) -> Command[Literal["merge_agent"]]:
+    """Run the todo agent using the react agent framework and the todo tools (in-process or over MCP)."""
+    graph = await subagents.get_todo_agent()
 
-    # Create event stream
-    result = await graph.ainvoke(state)
+    # Every in-process tool call of this turn shares one DB session
+    async with todo_tool_session(consistency_key=config["configurable"].get("thread_id")):
+        result = await graph.ainvoke({"messages": compact_messages(state["messages"])})
 
     return Command(
-        update={
-            "messages": [
-                HumanMessage(content=result["messages"]
-                             [-1].content, name="todo_agent")
-            ]
-        },
-        goto=END,
+        update={"results": {"todo_agent": result["messages"][-1].content}},
+        goto="merge_agent",
     )
+
+
+def merge_agent(state: VAState):
+    """
+        Join point of the specialist branches. Runs once after every branch of the step has
+        finished and adds their answers to the conversation in a fixed order, however the
+        branches finished.
+    """
+    results = state["results"]
+    return {
+        "messages": [
+            HumanMessage(content=results[node], name=node)
+            for node in SPECIALISTS if node in results
+        ],
+        "results": None,
+    }
@@ -0,0 +1,404 @@
+import asyncio
+import logging
+import random
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+from .models import CheckpointBlob, CheckpointRecord, CheckpointWrite
+
+logger = logging.getLogger(__name__)
+
+
+CHECKPOINT_KEY = ("thread_id", "checkpoint_ns", "checkpoint_id")
+BLOB_KEY = ("thread_id", "checkpoint_ns", "channel", "version")
+WRITE_KEY = ("thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx")
+
+
+def _dedupe(rows: List[dict], key: Tuple[str, ...], keep_last: bool) -> List[dict]:
+    """
+    Drops rows that share a primary key, since one multi-row INSERT ... ON CONFLICT
+    statement cannot touch the same row twice.
+    """
+    unique: Dict[tuple, dict] = {}
+    for row in rows:
+        row_key = tuple(row[column] for column in key)
+        if keep_last or row_key not in unique:
+            unique[row_key] = row
+    return list(unique.values())
+
+
+class PostgresCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    LangGraph checkpointer backed by the app's async SQLAlchemy engine (asyncpg, pooled).
+
+    Checkpoints, channel blobs and task writes produced during a run are buffered in memory
+    and written in a single transaction when the run is flushed (see `aflush`), when the
+    buffer grows past `max_pending` rows, or by the periodic flusher started with `start()`.
+    Reading a thread that still has buffered rows flushes that thread first, so reads always
+    see this worker's own writes; once flushed, any worker can resume any thread.
+    """
+
+    def __init__(self, engine: AsyncEngine, flush_interval: float = 1.0, max_pending: int = 500):
+        super().__init__()
+        self.engine = engine
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending_checkpoints: Dict[str, List[dict]] = defaultdict(list)
+        self._pending_blobs: Dict[str, List[dict]] = defaultdict(list)
+        self._pending_writes: Dict[str, List[Tuple[dict, bool]]] = defaultdict(list)
+        self._pending_count = 0
+        # threads whose rows were taken off the buffer by the flush in progress, until it commits
+        self._in_flight: set = set()
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+
+    # ----------- LIFECYCLE -----------
+
+    def start(self) -> None:
+        """Starts the background task that periodically flushes buffered rows."""
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        """Stops the background flusher and writes out anything still buffered."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.aflush()
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.aflush()
+            except Exception as e:
+                logger.exception("Checkpoint flush failed: %s", e)
+
+    # ----------- BUFFERING -----------
+
+    def _has_pending(self, thread_id: str) -> bool:
+        return bool(
+            self._pending_checkpoints.get(thread_id)
+            or self._pending_blobs.get(thread_id)
+            or self._pending_writes.get(thread_id)
+        )
+
+    def _take_pending(self, thread_id: Optional[str]) -> Tuple[List[dict], List[dict], List[Tuple[dict, bool]]]:
+        thread_ids = [thread_id] if thread_id is not None else list(
+            set(self._pending_checkpoints) | set(self._pending_blobs) | set(self._pending_writes)
+        )
+        checkpoints, blobs, writes = [], [], []
+        for tid in thread_ids:
+            checkpoints.extend(self._pending_checkpoints.pop(tid, []))
+            blobs.extend(self._pending_blobs.pop(tid, []))
+            writes.extend(self._pending_writes.pop(tid, []))
+        self._pending_count -= len(checkpoints) + len(blobs) + len(writes)
+        return checkpoints, blobs, writes
+
+    def _restore_pending(self, checkpoints: List[dict], blobs: List[dict], writes: List[Tuple[dict, bool]]) -> None:
+        for row in reversed(checkpoints):
+            self._pending_checkpoints[row["thread_id"]].insert(0, row)
+        for row in reversed(blobs):
+            self._pending_blobs[row["thread_id"]].insert(0, row)
+        for row, upsert in reversed(writes):
+            self._pending_writes[row["thread_id"]].insert(0, (row, upsert))
+        self._pending_count += len(checkpoints) + len(blobs) + len(writes)
+
+    async def aflush(self, thread_id: Optional[str] = None) -> None:
+        """
+        Writes buffered rows (for one thread, or all threads) in a single transaction
+        using multi-row INSERT ... ON CONFLICT statements.
+        """
+        async with self._flush_lock:
+            checkpoints, blobs, writes = self._take_pending(thread_id)
+            if not (checkpoints or blobs or writes):
+                return
+            self._in_flight = {row["thread_id"] for row in checkpoints + blobs} | {row["thread_id"] for row, _ in writes}
+            try:
+                async with self.engine.begin() as conn:
+                    if blobs:
+                        stmt = insert(CheckpointBlob).on_conflict_do_nothing()
+                        await conn.execute(stmt, _dedupe(blobs, BLOB_KEY, keep_last=False))
+                    if checkpoints:
+                        stmt = insert(CheckpointRecord)
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=["thread_id", "checkpoint_ns", "checkpoint_id"],
+                            set_={
+                                "type": stmt.excluded.type,
+                                "checkpoint": stmt.excluded.checkpoint,
+                                "metadata_type": stmt.excluded.metadata_type,
+                                "metadata_blob": stmt.excluded.metadata_blob,
+                            },
+                        )
+                        await conn.execute(stmt, _dedupe(checkpoints, CHECKPOINT_KEY, keep_last=True))
+                    upserts = [row for row, upsert in writes if upsert]
+                    inserts = [row for row, upsert in writes if not upsert]
+                    if upserts:
+                        stmt = insert(CheckpointWrite)
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=["thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx"],
+                            set_={
+                                "channel": stmt.excluded.channel,
+                                "type": stmt.excluded.type,
+                                "blob": stmt.excluded.blob,
+                            },
+                        )
+                        await conn.execute(stmt, _dedupe(upserts, WRITE_KEY, keep_last=True))
+                    if inserts:
+                        stmt = insert(CheckpointWrite).on_conflict_do_nothing()
+                        await conn.execute(stmt, _dedupe(inserts, WRITE_KEY, keep_last=False))
+            except BaseException:
+                self._restore_pending(checkpoints, blobs, writes)
+                raise
+            finally:
+                self._in_flight = set()
+
+    async def _flush_if_needed(self, thread_id: str) -> None:
+        # a thread whose rows are being written waits for that flush, or it would read an older checkpoint
+        if self._has_pending(thread_id) or thread_id in self._in_flight:
+            await self.aflush(thread_id)
+        elif self._pending_count >= self.max_pending:
+            await self.aflush()
+
+    # ----------- READS -----------
+
+    async def _load_blobs(self, conn, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> Dict[str, Any]:
+        if not versions:
+            return {}
+        result = await conn.execute(
+            select(CheckpointBlob.channel, CheckpointBlob.type, CheckpointBlob.blob).where(
+                CheckpointBlob.thread_id == thread_id,
+                CheckpointBlob.checkpoint_ns == checkpoint_ns,
+                tuple_(CheckpointBlob.channel, CheckpointBlob.version).in_(
+                    [(channel, str(version)) for channel, version in versions.items()]
+                ),
+            )
+        )
+        return {
+            channel: self.serde.loads_typed((type_, blob))
+            for channel, type_, blob in result
+            if type_ != "empty"
+        }
+
+    async def _load_writes(self, conn, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[Tuple[str, str, Any]]:
+        result = await conn.execute(
+            select(CheckpointWrite.task_id, CheckpointWrite.channel, CheckpointWrite.type, CheckpointWrite.blob)
+            .where(
+                CheckpointWrite.thread_id == thread_id,
+                CheckpointWrite.checkpoint_ns == checkpoint_ns,
+                CheckpointWrite.checkpoint_id == checkpoint_id,
+            )
+            .order_by(CheckpointWrite.task_id, CheckpointWrite.idx)
+        )
+        return [
+            (task_id, channel, self.serde.loads_typed((type_, blob)))
+            for task_id, channel, type_, blob in result
+        ]
+
+    async def _to_tuple(self, conn, record) -> CheckpointTuple:
+        checkpoint: Checkpoint = self.serde.loads_typed((record.type, record.checkpoint))
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": record.thread_id,
+                    "checkpoint_ns": record.checkpoint_ns,
+                    "checkpoint_id": record.checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint,
+                "channel_values": await self._load_blobs(
+                    conn, record.thread_id, record.checkpoint_ns, checkpoint["channel_versions"]
+                ),
+            },
+            metadata=self.serde.loads_typed((record.metadata_type, record.metadata_blob)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": record.thread_id,
+                        "checkpoint_ns": record.checkpoint_ns,
+                        "checkpoint_id": record.parent_checkpoint_id,
+                    }
+                }
+                if record.parent_checkpoint_id
+                else None
+            ),
+            pending_writes=await self._load_writes(
+                conn, record.thread_id, record.checkpoint_ns, record.checkpoint_id
+            ),
+        )
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Get the checkpoint for `config`, or the latest checkpoint of the thread."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        await self._flush_if_needed(thread_id)
+
+        stmt = select(CheckpointRecord).where(
+            CheckpointRecord.thread_id == thread_id,
+            CheckpointRecord.checkpoint_ns == checkpoint_ns,
+        )
+        if checkpoint_id := get_checkpoint_id(config):
+            stmt = stmt.where(CheckpointRecord.checkpoint_id == checkpoint_id)
+        else:
+            stmt = stmt.order_by(CheckpointRecord.checkpoint_id.desc()).limit(1)
+
+        async with self.engine.connect() as conn:
+            record = (await conn.execute(stmt)).first()
+            if record is None:
+                return None
+            return await self._to_tuple(conn, record)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """List checkpoints, newest first, matching the given config and metadata filter."""
+        if config:
+            await self._flush_if_needed(config["configurable"]["thread_id"])
+        else:
+            await self.aflush()
+
+        stmt = select(CheckpointRecord).order_by(CheckpointRecord.checkpoint_id.desc())
+        if config:
+            stmt = stmt.where(CheckpointRecord.thread_id == config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                stmt = stmt.where(CheckpointRecord.checkpoint_ns == checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                stmt = stmt.where(CheckpointRecord.checkpoint_id == checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            stmt = stmt.where(CheckpointRecord.checkpoint_id < before_id)
+        if limit is not None and not filter:
+            stmt = stmt.limit(limit)
+
+        async with self.engine.connect() as conn:
+            records = (await conn.execute(stmt)).all()
+            for record in records:
+                if filter:
+                    metadata = self.serde.loads_typed((record.metadata_type, record.metadata_blob))
+                    if not all(metadata.get(key) == value for key, value in filter.items()):
+                        continue
+                if limit is not None:
+                    if limit <= 0:
+                        break
+                    limit -= 1
+                yield await self._to_tuple(conn, record)
+
+    # ----------- WRITES -----------
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Buffer a checkpoint and the channel values that changed with it."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        copy = checkpoint.copy()
+        values: Dict[str, Any] = copy.pop("channel_values")  # type: ignore[misc]
+
+        for channel, version in new_versions.items():
+            type_, blob = self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)
+            self._pending_blobs[thread_id].append({
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "channel": channel,
+                "version": str(version),
+                "type": type_,
+                "blob": blob,
+            })
+
+        type_, serialized = self.serde.dumps_typed(copy)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        self._pending_checkpoints[thread_id].append({
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"],
+            "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+            "type": type_,
+            "checkpoint": serialized,
+            "metadata_type": metadata_type,
+            "metadata_blob": metadata_blob,
+        })
+        self._pending_count += len(new_versions) + 1
+        if self._pending_count >= self.max_pending:
+            await self.aflush()
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Buffer the writes a task produced for the current checkpoint."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        upsert = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            self._pending_writes[thread_id].append(({
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+                "task_id": task_id,
+                "idx": WRITES_IDX_MAP.get(channel, idx),
+                "channel": channel,
+                "type": type_,
+                "blob": blob,
+                "task_path": task_path,
+            }, upsert))
+        self._pending_count += len(writes)
+        if self._pending_count >= self.max_pending:
+            await self.aflush()
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints, blobs and writes of a thread."""
+        async with self._flush_lock:
+            self._take_pending(thread_id)
+            async with self.engine.begin() as conn:
+                for model in (CheckpointWrite, CheckpointBlob, CheckpointRecord):
+                    await conn.execute(delete(model).where(model.thread_id == thread_id))
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        next_v = current_v + 1
+        next_h = random.random()
+        return f"{next_v:032}.{next_h:016}"
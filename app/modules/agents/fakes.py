@@ -0,0 +1,73 @@
+import asyncio
+import re
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from .limits import provider_limits
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline chat model for benchmarks and local runs (LLM_BACKEND=fake).
+
+    Replies with `reply` after `latency` seconds, ignores bound tools, and answers
+    `with_structured_output(schema)` calls with `schema(**structured_output)`. When streamed,
+    the reply arrives one word per chunk. Async calls share the Gemini concurrency limit,
+    like the model they stand in for.
+    """
+    reply: str = "This is an offline reply."
+    structured_output: Dict[str, Any] = {}
+    latency: float = 0.0
+    # like a provider's request timeout: a call slower than this raises TimeoutError instead
+    timeout: Optional[float] = None
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    async def _wait(self) -> None:
+        if self.timeout is not None and self.latency > self.timeout:
+            await asyncio.sleep(self.timeout)
+            raise TimeoutError(f"Fake model timed out after {self.timeout:g}s")
+        await asyncio.sleep(self.latency)
+
+    def _result(self) -> ChatResult:
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return self._result()
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        async with provider_limits.slot("gemini"):
+            await self._wait()
+            return self._result()
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        async with provider_limits.slot("gemini"):
+            await self._wait()
+            self.calls += 1
+            for token in re.findall(r"\S+\s*", self.reply):
+                yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> Runnable:
+        return self
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Runnable:
+        def respond(messages: Any) -> Any:
+            time.sleep(self.latency)
+            self.calls += 1
+            return schema(**self.structured_output)
+
+        async def arespond(messages: Any) -> Any:
+            async with provider_limits.slot("gemini"):
+                await self._wait()
+                self.calls += 1
+                return schema(**self.structured_output)
+
+        return RunnableLambda(respond, afunc=arespond)
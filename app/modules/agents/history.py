@@ -0,0 +1,58 @@
+from typing import List, Sequence
+from langchain_core.messages import (
+    AnyMessage,
+    HumanMessage,
+    RemoveMessage,
+    trim_messages,
+)
+from langchain_core.messages.utils import count_tokens_approximately
+from app.core.config import settings
+
+
+def _current_turn_start(messages: Sequence[AnyMessage]) -> int:
+    """Index of the latest message sent by the user (an unnamed HumanMessage)."""
+    for index in range(len(messages) - 1, -1, -1):
+        message = messages[index]
+        if isinstance(message, HumanMessage) and not message.name:
+            return index
+    return 0
+
+
+def compact_messages(messages: Sequence[AnyMessage]) -> List[AnyMessage]:
+    """
+    Returns the history to send to a model for this turn.
+
+    Supervisor routing notes (`va_agent` messages) from earlier turns are dropped, since they
+    only explain past routing decisions, and the rest is trimmed to the most recent
+    `HISTORY_MAX_TOKENS` (approximate count), always starting on a user message.
+    """
+    turn_start = _current_turn_start(messages)
+    kept = [
+        message for index, message in enumerate(messages)
+        if index >= turn_start or message.name != "va_agent"
+    ]
+    trimmed = trim_messages(
+        kept,
+        max_tokens=settings.HISTORY_MAX_TOKENS,
+        strategy="last",
+        token_counter=count_tokens_approximately,
+        start_on="human",
+        allow_partial=False,
+    )
+    # a single oversized turn is still sent rather than an empty prompt
+    return trimmed or list(messages[turn_start:])
+
+
+def history_removals(messages: Sequence[AnyMessage]) -> List[RemoveMessage]:
+    """
+    Returns RemoveMessage updates that drop everything before the last
+    `HISTORY_MAX_MESSAGES` messages from the stored state, so checkpoints stop growing.
+    Routing notes from earlier turns are dropped as well.
+    """
+    turn_start = _current_turn_start(messages)
+    cutoff = min(max(0, len(messages) - settings.HISTORY_MAX_MESSAGES), turn_start)
+    return [
+        RemoveMessage(id=message.id)
+        for index, message in enumerate(messages)
+        if message.id and (index < cutoff or (index < turn_start and message.name == "va_agent"))
+    ]
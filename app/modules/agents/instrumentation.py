@@ -0,0 +1,160 @@
+"""
+Callbacks attached to every chat turn's graph run: the span recorder for the turn's trace
+and, with LANGSMITH_TRACING on, the LangSmith tracer configured from Settings.
+"""
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.tracers.langchain import LangChainTracer
+from langsmith import Client
+from app.core.config import settings
+from app.core.metrics import llm_first_token_seconds, llm_seconds, llm_tokens, node_seconds, tool_seconds
+from app.core.tracing import Span, TurnTrace
+
+
+def model_labels(metadata: Optional[Dict[str, Any]]) -> Tuple[str, str]:
+    """(node, "provider:model") of a chat model call, from the metadata the model registry sets."""
+    metadata = metadata or {}
+    key = metadata.get("llm_key")
+    if key:
+        node, _, model = key.partition("/")
+        return node, model
+    return metadata.get("langgraph_node", "unknown"), metadata.get("ls_model_name", "unknown")
+
+
+class GraphTraceHandler(BaseCallbackHandler):
+    """
+    Adds a span to `trace` for every graph node (sub-agent nodes are named after their parent,
+    e.g. "research_agent/tools"), every chat model call, with its time to first token and
+    token counts, and every tool call, and feeds the matching latency histograms. Nested runs,
+    like the ReAct sub-agents, inherit the handler from the turn's graph run.
+    """
+    run_inline = True
+
+    def __init__(self, trace: TurnTrace):
+        self.trace = trace
+        # run id -> the span it opened, for the runs that are traced
+        self._spans: Dict[UUID, Span] = {}
+        # run id -> the innermost span around it, for every run in progress
+        self._enclosing: Dict[UUID, Optional[Span]] = {}
+
+    def _parent(self, parent_run_id: Optional[UUID]) -> Optional[Span]:
+        return self._enclosing.get(parent_run_id) if parent_run_id is not None else None
+
+    def _open(self, run_id: UUID, parent_run_id: Optional[UUID], kind: str, name: str, **attributes: Any) -> Span:
+        parent = self._parent(parent_run_id)
+        span = self.trace.start_span(kind, name, parent.id if parent is not None else None, **attributes)
+        self._spans[run_id] = span
+        self._enclosing[run_id] = span
+        return span
+
+    def _close(self, run_id: UUID, outcome: str) -> Optional[Span]:
+        self._enclosing.pop(run_id, None)
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.end = time.perf_counter()
+            span.attributes["outcome"] = outcome
+        return span
+
+    # graph nodes
+
+    def on_chain_start(self, serialized: Dict[str, Any], inputs: Any, *, run_id: UUID, parent_run_id: Optional[UUID] = None, metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            parent = self._parent(parent_run_id)
+            name = f"{parent.name}/{node}" if parent is not None and parent.kind == "node" else node
+            self._open(run_id, parent_run_id, "node", name)
+        else:
+            self._enclosing[run_id] = self._parent(parent_run_id)
+
+    def _end_chain(self, run_id: UUID, outcome: str) -> None:
+        span = self._close(run_id, outcome)
+        if span is not None:
+            node_seconds.observe(span.end - span.start, span.name)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_chain(run_id, "ok")
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_chain(run_id, "error")
+
+    # chat model calls
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, parent_run_id: Optional[UUID] = None, metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        node, model = model_labels(metadata)
+        self._open(run_id, parent_run_id, "llm", model, node=node)
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._spans.get(run_id)
+        if span is not None and "first_token_ms" not in span.attributes:
+            seconds = time.perf_counter() - span.start
+            span.attributes["first_token_ms"] = seconds * 1000
+            llm_first_token_seconds.observe(seconds, span.attributes["node"], span.name)
+
+    def _end_llm(self, run_id: UUID, outcome: str, response: Optional[LLMResult] = None) -> None:
+        span = self._close(run_id, outcome)
+        if span is None:
+            return
+        node = span.attributes["node"]
+        llm_seconds.observe(span.end - span.start, node, span.name, outcome)
+        if response is None:
+            return
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+        span.attributes["input_tokens"] = input_tokens
+        span.attributes["output_tokens"] = output_tokens
+        llm_tokens.inc(input_tokens, node, span.name, "input")
+        llm_tokens.inc(output_tokens, node, span.name, "output")
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_llm(run_id, "ok", response)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_llm(run_id, "error")
+
+    # tool calls
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name", "tool")
+        self._open(run_id, parent_run_id, "tool", name)
+
+    def _end_tool(self, run_id: UUID, outcome: str) -> None:
+        span = self._close(run_id, outcome)
+        if span is not None:
+            tool_seconds.observe(span.end - span.start, span.name, outcome)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_tool(run_id, "ok")
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_tool(run_id, "error")
+
+
+_langsmith_client = None
+
+
+def langsmith_tracer() -> Optional[LangChainTracer]:
+    """The LangSmith tracer for one turn, or None unless LANGSMITH_TRACING is on."""
+    global _langsmith_client
+    if not settings.LANGSMITH_TRACING:
+        return None
+    if _langsmith_client is None:
+        _langsmith_client = Client(api_url=settings.LANGSMITH_ENDPOINT, api_key=settings.LANGSMITH_API_KEY)
+    return LangChainTracer(project_name=settings.LANGSMITH_PROJECT, client=_langsmith_client)
+
+
+def turn_callbacks(trace: Optional[TurnTrace]) -> List[BaseCallbackHandler]:
+    """The callbacks of one chat turn's graph run."""
+    callbacks: List[BaseCallbackHandler] = []
+    if trace is not None:
+        callbacks.append(GraphTraceHandler(trace))
+    tracer = langsmith_tracer()
+    if tracer is not None:
+        callbacks.append(tracer)
+    return callbacks
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, ClassVar, Dict
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_groq import ChatGroq
+from app.core.config import settings
+from .transport import http_transport
+
+
+class ProviderLimit:
+    """Caps the number of concurrent requests to one upstream provider; a limit of 0 means unlimited."""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit) if limit > 0 else None
+        self.in_use = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.requests = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Holds one slot for the duration of the block, waiting for a free one first."""
+        if self._semaphore is None:
+            self.requests += 1
+            self.in_use += 1
+            try:
+                yield
+            finally:
+                self.in_use -= 1
+            return
+
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        start = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - start
+        self.requests += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self.in_use += 1
+        try:
+            yield
+        finally:
+            self.in_use -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "requests": self.requests,
+            "avg_wait_ms": self.wait_seconds / self.requests * 1000 if self.requests else 0.0,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+        }
+
+
+class ProviderLimits:
+    """The concurrency limit of every upstream provider the agents call."""
+
+    def __init__(self, limits: Dict[str, int]):
+        self._limits = {name: ProviderLimit(name, limit) for name, limit in limits.items()}
+
+    def slot(self, provider: str):
+        return self._limits[provider].slot()
+
+    def stats(self) -> dict:
+        return {name: limit.stats() for name, limit in self._limits.items()}
+
+
+provider_limits = ProviderLimits({
+    "gemini": settings.GEMINI_MAX_CONCURRENCY,
+    "groq": settings.GROQ_MAX_CONCURRENCY,
+    "tavily": settings.TAVILY_MAX_CONCURRENCY,
+    "mcp": settings.MCP_MAX_CONCURRENCY,
+})
+
+
+class ProviderLimitedChatModel:
+    """
+    Chat model mixin: every async request holds a slot of `provider` while it is generated
+    or streamed. List it before the model class it limits.
+    """
+    provider: ClassVar[str]
+
+    async def _agenerate(self, *args: Any, **kwargs: Any):
+        async with provider_limits.slot(self.provider):
+            return await super()._agenerate(*args, **kwargs)  # type: ignore[misc]
+
+    async def _astream(self, *args: Any, **kwargs: Any):
+        async with provider_limits.slot(self.provider):
+            async for chunk in super()._astream(*args, **kwargs):  # type: ignore[misc]
+                yield chunk
+
+
+class LimitedChatGoogleGenerativeAI(ProviderLimitedChatModel, ChatGoogleGenerativeAI):
+    """
+    ChatGoogleGenerativeAI sharing the process-wide Gemini concurrency limit, and one async
+    client (one gRPC channel) with every other Gemini model when the transport can build it.
+    """
+    provider: ClassVar[str] = "gemini"
+
+    @property
+    def async_client(self) -> Any:
+        shared = http_transport.gemini_client(self)
+        return shared if shared is not None else super().async_client
+
+
+class LimitedChatGroq(ProviderLimitedChatModel, ChatGroq):
+    """ChatGroq sharing the process-wide Groq concurrency limit."""
+    provider: ClassVar[str] = "groq"
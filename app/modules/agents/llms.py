@@ -0,0 +1,349 @@
+"""
+Per-node chat models.
+
+Every node that calls a model has its own model chain in Settings: LLM_MODEL_<NODE> is a
+comma-separated list of "provider:model" specs (providers: google, groq, fake), e.g.
+"groq:llama-3.1-8b-instant,google:gemini-2.0-flash". The first model serves the node; the
+next one takes over when it times out or is rate limited. LLM_NODE_TIMEOUTS and
+LLM_NODE_MAX_TOKENS set each node's per-request latency and output-token budget.
+LLM_HEDGE_NODES ("node:quantile,...", e.g. "va_agent:0.95") hedges a node's calls: a backup
+request is sent once a call is slower than that quantile of the node's recent calls.
+
+"fake:<seconds>" is an offline model answering after that many seconds (and timing out like a
+real one when that exceeds the node's budget), so turn latency of different configurations
+can be compared without any provider. LLM_BACKEND=fake turns every node into "fake:0".
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple, Type
+from uuid import UUID
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from app.core.config import settings
+from .fakes import FakeChatModel
+from .limits import LimitedChatGoogleGenerativeAI, LimitedChatGroq
+from .transport import http_transport
+
+try:
+    from google.api_core import exceptions as google_exceptions
+except ImportError:  # only needed to recognise Gemini rate limits and timeouts
+    google_exceptions = None
+
+try:
+    import groq
+except ImportError:  # only needed to recognise Groq rate limits and timeouts
+    groq = None
+
+
+NODE_MODEL_SETTINGS = {
+    "va_agent": settings.LLM_MODEL_VA_AGENT,
+    "enhancer_agent": settings.LLM_MODEL_ENHANCER_AGENT,
+    "research_agent": settings.LLM_MODEL_RESEARCH_AGENT,
+    "todo_agent": settings.LLM_MODEL_TODO_AGENT,
+}
+
+# what the offline supervisor answers with
+OFFLINE_ROUTE = {"next": ["research_agent"], "reason": "Offline routing decision."}
+
+
+def fallback_exceptions() -> Tuple[Type[BaseException], ...]:
+    """The errors that hand a request over to the next model of the chain: timeouts and rate limits."""
+    exceptions: List[Type[BaseException]] = [asyncio.TimeoutError, TimeoutError, httpx.TimeoutException]
+    if google_exceptions is not None:
+        exceptions += [
+            google_exceptions.ResourceExhausted,
+            google_exceptions.DeadlineExceeded,
+            google_exceptions.ServiceUnavailable,
+        ]
+    if groq is not None:
+        exceptions += [groq.RateLimitError, groq.APITimeoutError]
+    return tuple(exceptions)
+
+
+def parse_model_chain(spec: str) -> List[Tuple[str, str]]:
+    """Parses "provider:model,..." into [(provider, model), ...]."""
+    chain = []
+    for item in spec.split(","):
+        provider, _, model = item.strip().partition(":")
+        if provider:
+            chain.append((provider, model))
+    return chain
+
+
+def parse_node_values(spec: str) -> Dict[str, float]:
+    """Parses "node:value,..." (e.g. "va_agent:20,research_agent:60") into {node: value}."""
+    values: Dict[str, float] = {}
+    for item in spec.split(","):
+        node, _, value = item.strip().partition(":")
+        if node and value:
+            values[node] = float(value)
+    return values
+
+
+class ModelStats(BaseCallbackHandler):
+    """
+    Latency, output tokens and failures of every model of every node. Attached to each model
+    as a callback, so it also sees the calls made inside the ReAct sub-agents.
+    """
+    run_inline = True
+
+    def __init__(self):
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self._started: Dict[UUID, Tuple[float, Dict[str, Any]]] = {}
+
+    def _entry(self, key: str) -> Dict[str, Any]:
+        return self.models.setdefault(key, {
+            "calls": 0, "errors": 0, "fallbacks": 0, "over_budget": 0,
+            "seconds": 0.0, "max_seconds": 0.0, "output_tokens": 0,
+        })
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        # only the start callback carries the run's metadata
+        if metadata and "llm_key" in metadata:
+            self._started[run_id] = (time.perf_counter(), metadata)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        if run_id not in self._started:
+            return
+        started, metadata = self._started.pop(run_id)
+        entry = self._entry(metadata["llm_key"])
+        seconds = time.perf_counter() - started
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                entry["output_tokens"] += usage.get("output_tokens", 0)
+        budget = metadata.get("llm_timeout")
+        if budget and seconds > budget:
+            entry["over_budget"] += 1
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        if run_id not in self._started:
+            return
+        _, metadata = self._started.pop(run_id)
+        entry = self._entry(metadata["llm_key"])
+        entry["errors"] += 1
+        if metadata.get("llm_has_fallback") and isinstance(error, fallback_exceptions()):
+            entry["fallbacks"] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            key: {
+                "calls": entry["calls"],
+                "errors": entry["errors"],
+                "fallbacks": entry["fallbacks"],
+                "over_budget": entry["over_budget"],
+                "avg_ms": entry["seconds"] / entry["calls"] * 1000 if entry["calls"] else 0.0,
+                "max_ms": entry["max_seconds"] * 1000,
+                "output_tokens": entry["output_tokens"],
+            }
+            for key, entry in self.models.items()
+        }
+
+
+model_stats = ModelStats()
+
+
+class Hedger:
+    """
+    Hedged requests for one node. A call still unanswered after the `quantile` latency of the
+    node's recent calls gets an identical backup call; whichever answers first wins and the
+    other is cancelled. Nothing is hedged until `min_samples` calls have been timed, so about
+    1 - quantile of the calls send a second request.
+    """
+
+    def __init__(self, node: str, quantile: float, min_samples: int, window: int = 200):
+        self.node = node
+        self.quantile = quantile
+        self.min_samples = max(min_samples, 1)
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before the backup call, None while there are too few samples."""
+        if len(self.latencies) < self.min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))]
+
+    async def ainvoke(self, runnable: Runnable, input: Any, config: Optional[RunnableConfig] = None) -> Any:
+        self.calls += 1
+        start = time.perf_counter()
+        primary = asyncio.create_task(runnable.ainvoke(input, config))
+        tasks = [primary]
+        try:
+            delay = self.delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    self.hedged += 1
+                    tasks.append(asyncio.create_task(runnable.ainvoke(input, config)))
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error  # type: ignore[misc]
+        finally:
+            # a primary cut short by its backup is timed up to that point: a lower bound that
+            # keeps slow calls in the window, so the quantile does not drift down
+            if not (primary.done() and not primary.cancelled() and primary.exception() is not None):
+                self.latencies.append(time.perf_counter() - start)
+            for task in tasks:
+                task.cancel()
+
+    def wrap(self, runnable: Runnable) -> Runnable:
+        async def hedged(input: Any, config: RunnableConfig) -> Any:
+            return await self.ainvoke(runnable, input, config)
+
+        return RunnableLambda(hedged, name=f"{self.node}_hedged")
+
+    def stats(self) -> dict:
+        delay = self.delay()
+        return {
+            "quantile": self.quantile,
+            "delay_ms": delay * 1000 if delay is not None else None,
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+def build_chat_model(
+    provider: str,
+    model: str,
+    timeout: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    tags: Sequence[str] = (),
+    metadata: Optional[Dict[str, Any]] = None,
+) -> BaseChatModel:
+    """Builds one chat model of a node's chain, with its budget, tags and stats callback."""
+    common: Dict[str, Any] = {"tags": list(tags), "metadata": metadata or {}, "callbacks": [model_stats]}
+    if provider == "google":
+        return LimitedChatGoogleGenerativeAI(
+            model=model,
+            timeout=timeout,
+            max_output_tokens=max_tokens,
+            max_retries=settings.LLM_MAX_RETRIES,
+            **common,
+        )
+    if provider == "groq":
+        return LimitedChatGroq(
+            model=model,
+            api_key=settings.GROQ_API_KEY,
+            http_async_client=http_transport.client,
+            timeout=timeout,
+            max_tokens=max_tokens,
+            max_retries=settings.LLM_MAX_RETRIES,
+            **common,
+        )
+    if provider == "fake":
+        return FakeChatModel(
+            latency=float(model or 0),
+            timeout=timeout,
+            structured_output=OFFLINE_ROUTE,
+            **common,
+        )
+    raise ValueError(f"Unknown model provider {provider!r}")
+
+
+class ModelRegistry:
+    """Builds each node's model chain once, from Settings, and hands it out to the nodes."""
+
+    def __init__(
+        self,
+        node_models: Dict[str, str],
+        timeouts: Dict[str, float],
+        max_tokens: Dict[str, float],
+        hedge_quantiles: Optional[Dict[str, float]] = None,
+        hedge_min_samples: int = 20,
+    ):
+        self.node_models = node_models
+        self.timeouts = timeouts
+        self.max_tokens = max_tokens
+        self.hedgers = {
+            node: Hedger(node, quantile, hedge_min_samples)
+            for node, quantile in (hedge_quantiles or {}).items()
+        }
+        self._models: Dict[str, Runnable] = {}
+
+    def chain(self, node: str) -> List[Tuple[str, str]]:
+        chain = parse_model_chain(self.node_models[node])
+        if settings.LLM_BACKEND == "fake":
+            chain = [(provider, model) if provider == "fake" else ("fake", "0") for provider, model in chain]
+        return chain
+
+    def get(self, node: str, tags: Sequence[str] = ()) -> Runnable:
+        """
+        Returns the chat model of `node`: its first model, falling back to the next ones on
+        timeouts and rate limits. Tool binding and structured output apply to every model.
+        """
+        if node in self._models:
+            return self._models[node]
+
+        chain = self.chain(node)
+        timeout = self.timeouts.get(node)
+        max_tokens = int(self.max_tokens[node]) if node in self.max_tokens else None
+        models = [
+            build_chat_model(
+                provider,
+                model,
+                timeout=timeout,
+                max_tokens=max_tokens,
+                tags=tags,
+                metadata={
+                    "llm_key": f"{node}/{provider}:{model}",
+                    "llm_timeout": timeout,
+                    "llm_has_fallback": index < len(chain) - 1,
+                },
+            )
+            for index, (provider, model) in enumerate(chain)
+        ]
+        runnable: Runnable = models[0]
+        if len(models) > 1:
+            runnable = models[0].with_fallbacks(models[1:], exceptions_to_handle=fallback_exceptions())
+        self._models[node] = runnable
+        return runnable
+
+    def hedge(self, node: str, runnable: Runnable) -> Runnable:
+        """Wraps `runnable` (a call of `node`) in hedged requests when LLM_HEDGE_NODES lists the node."""
+        hedger = self.hedgers.get(node)
+        return hedger.wrap(runnable) if hedger is not None else runnable
+
+    def stats(self) -> dict:
+        return {
+            "nodes": {
+                node: {
+                    "chain": [f"{provider}:{model}" for provider, model in self.chain(node)],
+                    "timeout_seconds": self.timeouts.get(node),
+                    "max_tokens": self.max_tokens.get(node),
+                }
+                for node in self.node_models
+            },
+            "models": model_stats.snapshot(),
+            "hedging": {node: hedger.stats() for node, hedger in self.hedgers.items()},
+            "transport": http_transport.stats(),
+        }
+
+
+model_registry = ModelRegistry(
+    NODE_MODEL_SETTINGS,
+    timeouts=parse_node_values(settings.LLM_NODE_TIMEOUTS),
+    max_tokens=parse_node_values(settings.LLM_NODE_MAX_TOKENS),
+    hedge_quantiles=parse_node_values(settings.LLM_HEDGE_NODES),
+    hedge_min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+)
@@ -0,0 +1,149 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Sequence, Tuple
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata
+from langgraph.checkpoint.memory import InMemorySaver
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """
+    In-process checkpointer with per-thread TTL and LRU eviction under a byte budget.
+
+    Every thread's serialized checkpoints, blobs and writes are accounted for. Threads idle
+    for longer than `ttl_seconds` are dropped, and when the total exceeds `max_bytes` the least
+    recently used threads are dropped until the store fits again. The thread being written
+    is never evicted by its own write. Within a thread only the latest `max_checkpoints`
+    checkpoints per namespace are kept, together with the channel blobs they reference.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float, max_checkpoints: int = 2):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_checkpoints = max_checkpoints
+        self.total_bytes = 0
+        self.evictions = 0
+        # thread_id -> [last access (monotonic), bytes]
+        self._threads: "OrderedDict[str, list]" = OrderedDict()
+        # (thread_id, checkpoint_ns, checkpoint_id) -> channel versions of that checkpoint
+        self._versions: Dict[Tuple[str, str, str], ChannelVersions] = {}
+
+    def _touch(self, thread_id: str, added_bytes: int = 0) -> None:
+        entry = self._threads.pop(thread_id, None) or [0.0, 0]
+        entry[0] = time.monotonic()
+        entry[1] += added_bytes
+        self._threads[thread_id] = entry
+        self.total_bytes += added_bytes
+
+    def _evict(self, current_thread_id: str) -> None:
+        now = time.monotonic()
+        for thread_id, (last_access, _) in list(self._threads.items()):
+            if now - last_access <= self.ttl_seconds:
+                break
+            if thread_id != current_thread_id:
+                self.delete_thread(thread_id)
+                self.evictions += 1
+
+        while self.total_bytes > self.max_bytes:
+            victim = next((tid for tid in self._threads if tid != current_thread_id), None)
+            if victim is None:
+                break
+            self.delete_thread(victim)
+            self.evictions += 1
+
+    def _put_size(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str, versions: ChannelVersions) -> int:
+        """Bytes currently stored under the keys a `put` for this checkpoint writes to."""
+        size = 0
+        saved = self.storage.get(thread_id, {}).get(checkpoint_ns, {}).get(checkpoint_id)
+        if saved is not None:
+            size += len(saved[0][1]) + len(saved[1][1])
+        for channel, version in versions.items():
+            blob = self.blobs.get((thread_id, checkpoint_ns, channel, version))
+            if blob is not None:
+                size += len(blob[1])
+        return size
+
+    def _prune(self, thread_id: str, checkpoint_ns: str) -> int:
+        """Drops checkpoints older than the latest `max_checkpoints`; returns the bytes freed."""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.max_checkpoints:
+            return 0
+
+        ordered = sorted(checkpoints)
+        freed = 0
+        for checkpoint_id in ordered[:-self.max_checkpoints]:
+            saved, saved_metadata, _ = checkpoints.pop(checkpoint_id)
+            freed += len(saved[1]) + len(saved_metadata[1])
+            for _, _, value, _ in self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), {}).values():
+                freed += len(value[1])
+            self._versions.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+
+        referenced = set()
+        for checkpoint_id in ordered[-self.max_checkpoints:]:
+            versions = self._versions.get((thread_id, checkpoint_ns, checkpoint_id), {})
+            referenced.update(versions.items())
+        for key in [
+            key for key in self.blobs
+            if key[0] == thread_id and key[1] == checkpoint_ns and (key[2], key[3]) not in referenced
+        ]:
+            freed += len(self.blobs.pop(key)[1])
+        return freed
+
+    def get_tuple(self, config: RunnableConfig):
+        thread_id = config["configurable"]["thread_id"]
+        if thread_id in self._threads:
+            self._touch(thread_id)
+        return super().get_tuple(config)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+
+        before = self._put_size(thread_id, checkpoint_ns, checkpoint["id"], new_versions)
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        after = self._put_size(thread_id, checkpoint_ns, checkpoint["id"], new_versions)
+        self._versions[(thread_id, checkpoint_ns, checkpoint["id"])] = dict(checkpoint["channel_versions"])
+        freed = self._prune(thread_id, checkpoint_ns)
+
+        self._touch(thread_id, after - before - freed)
+        self._evict(thread_id)
+        return next_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        outer_key = (thread_id, config["configurable"].get("checkpoint_ns", ""), config["configurable"]["checkpoint_id"])
+        before = sum(len(value[1]) for _, _, value, _ in self.writes.get(outer_key, {}).values())
+        super().put_writes(config, writes, task_id, task_path)
+        after = sum(len(value[1]) for _, _, value, _ in self.writes.get(outer_key, {}).values())
+
+        self._touch(thread_id, after - before)
+        self._evict(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        for key in [key for key in self._versions if key[0] == thread_id]:
+            del self._versions[key]
+        entry = self._threads.pop(thread_id, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def stats(self) -> dict:
+        return {
+            "threads": len(self._threads),
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,165 @@
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+from typing import Any, Callable, List, Optional
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langgraph.prebuilt import create_react_agent
+from .search import build_search_tool
+from .limits import provider_limits
+from .llms import model_registry
+from .streaming import ANSWER_TAG
+from app.core.config import settings
+from app.api.v1.todos.tools import TODO_TOOLS
+
+logger = logging.getLogger(__name__)
+
+
+MCP_SERVER_URL = "http://localhost:8000/mcp"
+
+TODO_SYSTEM_PROMPT = (
+    "You are a helpful and intelligent Todo Agent. "
+    "Your primary tasks include adding, completing, listing, and deleting todos, along with other todo-related actions. "
+    "You have access to specialized tools: 'todo tools' and 'todo collection tools' to assist with these tasks. "
+    "todos have ids etc , which identify them uniquely. so try use the ids when dealing on an individual todo. "
+    "Before performing any action, first check your memory to see if the required information is already available. "
+    "Only use a tool if the necessary data is not found in memory. "
+    "When using a tool, be thoughtful and deliberate—choose the most appropriate tool for the specific task at hand. "
+    "Use the tool name explicitly in your response when invoking a tool."
+    "When several todos are created, updated, completed or deleted at once, use the batch tools "
+    "(create_todos, update_todos, set_todos_status, delete_todos) in a single call instead of one call per todo. "
+    "To find particular todos by what they say, use search_todos rather than listing every todo. "
+    "you don't need to ask the user any permission to use the tools, just use them as needed. especially the todo tools."
+)
+
+
+def subagent_model(node: str):
+    """
+    The model chain the ReAct sub-agent `node` runs on (LLM_MODEL_<NODE>).
+    It carries ANSWER_TAG, so the chat stream forwards its tokens as they are generated.
+    """
+    return model_registry.get(node, tags=[ANSWER_TAG])
+
+
+def tools_fingerprint(tools: List[Any]) -> str:
+    """
+    Returns a stable hash of a tool list (name, description and input schema),
+    so a changed tool list on the MCP server can be detected without rebuilding the agent.
+    """
+    payload = [
+        {
+            "name": tool.name,
+            "description": tool.description,
+            "schema": getattr(tool, "inputSchema", None) or getattr(tool, "args", None),
+        }
+        for tool in sorted(tools, key=lambda t: t.name)
+    ]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def limit_mcp_tool(tool: BaseTool) -> BaseTool:
+    """Makes every call of a tool served over MCP hold a slot of the MCP concurrency limit."""
+    call = tool.coroutine  # type: ignore[attr-defined]
+
+    @functools.wraps(call)
+    async def limited_call(*args: Any, **kwargs: Any) -> Any:
+        async with provider_limits.slot("mcp"):
+            return await call(*args, **kwargs)
+
+    tool.coroutine = limited_call  # type: ignore[attr-defined]
+    return tool
+
+
+class SubAgentRegistry:
+    """
+    Holds the compiled ReAct sub-agents and their tool sets for the lifetime of the process.
+
+    Both agents are built once at startup. By default the todo agent uses the in-process todo
+    tools; with TODO_TOOLS_TRANSPORT=mcp it uses the tools this same app serves over MCP, which
+    cannot be fetched before the server is accepting requests, so it is built lazily on first
+    use and rebuilt only when the MCP server's tool list changes.
+    """
+
+    def __init__(self):
+        self._research_agent = None
+        self._todo_agent = None
+        self._todo_tools: List[BaseTool] = []
+        self._todo_tools_fingerprint: Optional[str] = None
+        self._mcp_fingerprint_source: Optional[Callable[[], str]] = None
+        self._lock = asyncio.Lock()
+
+    def startup(self, mcp_fingerprint_source: Optional[Callable[[], str]] = None) -> None:
+        """
+        Builds the sub-agents that have no dependency on the running server.
+        `mcp_fingerprint_source` returns the current fingerprint of the served MCP tool list.
+        """
+        self._mcp_fingerprint_source = mcp_fingerprint_source
+        self._research_agent = self._build_research_agent()
+        if settings.TODO_TOOLS_TRANSPORT == "inprocess":
+            self._todo_agent = self._build_todo_agent(TODO_TOOLS)
+
+    def shutdown(self) -> None:
+        """Drops every cached sub-agent and tool set."""
+        self._research_agent = None
+        self._todo_agent = None
+        self._todo_tools = []
+        self._todo_tools_fingerprint = None
+
+    def _build_research_agent(self):
+        search_tool = build_search_tool(max_results=5)
+        return create_react_agent(subagent_model("research_agent"), [search_tool])
+
+    def get_research_agent(self):
+        """Returns the compiled research sub-agent."""
+        if self._research_agent is None:
+            self._research_agent = self._build_research_agent()
+        return self._research_agent
+
+    def _build_todo_agent(self, tools: List[BaseTool]):
+        self._todo_tools = tools
+        return create_react_agent(
+            subagent_model("todo_agent"),
+            tools=tools,
+            prompt=TODO_SYSTEM_PROMPT,
+        )
+
+    def _todo_agent_is_stale(self) -> bool:
+        if self._todo_agent is None:
+            return True
+        if settings.TODO_TOOLS_TRANSPORT == "inprocess" or self._mcp_fingerprint_source is None:
+            return False
+        return self._mcp_fingerprint_source() != self._todo_tools_fingerprint
+
+    async def get_todo_agent(self):
+        """Returns the compiled todo sub-agent, (re)building it when the MCP tool list changed."""
+        if not self._todo_agent_is_stale():
+            return self._todo_agent
+
+        async with self._lock:
+            if not self._todo_agent_is_stale():
+                return self._todo_agent
+
+            if settings.TODO_TOOLS_TRANSPORT == "inprocess":
+                self._todo_agent = self._build_todo_agent(TODO_TOOLS)
+                return self._todo_agent
+
+            client = MultiServerMCPClient({
+                "fastapi-mcp": {
+                    "url": MCP_SERVER_URL,
+                    "transport": "sse",
+                }
+            })  # type: ignore
+            remote_tools = [limit_mcp_tool(tool) for tool in await client.get_tools()]
+
+            if self._mcp_fingerprint_source is not None:
+                self._todo_tools_fingerprint = self._mcp_fingerprint_source()
+            else:
+                self._todo_tools_fingerprint = tools_fingerprint(remote_tools)
+            self._todo_agent = self._build_todo_agent(remote_tools)
+            logger.info("Todo agent built with %d MCP tools", len(remote_tools))
+            return self._todo_agent
+
+
+subagents = SubAgentRegistry()
@@ -0,0 +1,113 @@
+import logging
+import re
+import time
+from typing import Dict, List, Literal, Optional, Pattern, Tuple
+from langchain_core.messages import HumanMessage
+from langgraph.types import Command
+from langgraph.graph import MessagesState
+from app.core.config import settings
+from .history import history_removals
+
+logger = logging.getLogger(__name__)
+
+
+# Weighted patterns per specialist. A message is fast-routed only when one label clearly dominates.
+ROUTE_PATTERNS: Dict[str, List[Tuple[Pattern[str], float]]] = {
+    "todo_agent": [
+        (re.compile(r"\b(todos?|to-dos?|to do list|todo list|task list|checklist)\b", re.I), 2.0),
+        (re.compile(r"\b(my|the)\s+(\w+\s+)?(list|lists|tasks|collection|collections)\b", re.I), 1.5),
+        (re.compile(r"\b(add|create|remove|delete|complete|finish|archive|mark|check off|tick off|rename)\b", re.I), 1.0),
+        (re.compile(r"\b(remind me to|i need to|don't forget to)\b", re.I), 1.0),
+    ],
+    "research_agent": [
+        (re.compile(r"\b(search|look up|lookup|research|google|browse|find out)\b", re.I), 2.0),
+        (re.compile(r"\b(latest|news|today's|current|recent|price of|weather)\b", re.I), 1.5),
+        (re.compile(r"^\s*(what|who|when|where|why|how|which)\b", re.I), 1.0),
+        (re.compile(r"\b(explain|tell me about|compare|difference between)\b", re.I), 1.0),
+    ],
+}
+
+
+class RouterStats:
+    """Counters for the fast-path router, used to see how many supervisor calls it saves."""
+
+    def __init__(self):
+        self.total = 0
+        self.fallbacks = 0
+        self.hits: Dict[str, int] = {label: 0 for label in ROUTE_PATTERNS}
+        self.total_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+
+    def record(self, label: Optional[str], latency_ms: float) -> None:
+        self.total += 1
+        self.total_latency_ms += latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        if label is None:
+            self.fallbacks += 1
+        else:
+            self.hits[label] += 1
+
+    def snapshot(self) -> dict:
+        hits = sum(self.hits.values())
+        return {
+            "total": self.total,
+            "hits": hits,
+            "hits_by_route": dict(self.hits),
+            "fallbacks": self.fallbacks,
+            "hit_rate": hits / self.total if self.total else 0.0,
+            "supervisor_calls_saved": hits,
+            "avg_latency_ms": self.total_latency_ms / self.total if self.total else 0.0,
+            "max_latency_ms": self.max_latency_ms,
+        }
+
+
+router_stats = RouterStats()
+
+
+def classify(text: str) -> Tuple[Optional[str], float]:
+    """
+    Scores `text` against every route and returns (label, confidence).
+    The label is None when no route reaches the minimum score or the winner is not dominant enough.
+    """
+    scores = {
+        label: sum(weight for pattern, weight in patterns if pattern.search(text))
+        for label, patterns in ROUTE_PATTERNS.items()
+    }
+    total = sum(scores.values())
+    if not total:
+        return None, 0.0
+
+    label, best = max(scores.items(), key=lambda item: item[1])
+    confidence = best / total
+    if best < settings.FAST_ROUTER_MIN_SCORE or confidence < settings.FAST_ROUTER_MIN_CONFIDENCE:
+        return None, confidence
+    return label, confidence
+
+
+def _latest_user_message(state: MessagesState) -> Optional[str]:
+    for message in reversed(state["messages"]):
+        if isinstance(message, HumanMessage) and not message.name:
+            return message.content if isinstance(message.content, str) else None
+    return None
+
+
+def pre_router(state: MessagesState) -> Command[Literal["va_agent", "research_agent", "todo_agent"]]:
+    """
+        Local pre-routing stage in front of the supervisor.
+        Compacts the stored history, then sends high-confidence todo or research intents
+        straight to the specialist and falls back to the LLM supervisor when the intent is unclear.
+    """
+    update = {"messages": history_removals(state["messages"])}
+    if not settings.FAST_ROUTER_ENABLED:
+        return Command(update=update, goto="va_agent")
+
+    start_time = time.perf_counter()
+    text = _latest_user_message(state)
+    label, confidence = classify(text) if text else (None, 0.0)
+    router_stats.record(label, (time.perf_counter() - start_time) * 1000)
+
+    if label is None:
+        return Command(update=update, goto="va_agent")
+
+    logger.debug("Workflow transition: fast router -> %s", label, extra={"confidence": round(confidence, 2)})
+    return Command(update=update, goto=label)
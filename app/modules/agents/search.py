@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+from langchain_core.tools import BaseTool
+from langchain_tavily import TavilySearch
+from langchain_tavily.tavily_search import TavilySearchInput
+from pydantic import BaseModel
+from app.core.config import settings
+from .limits import provider_limits
+from .transport import PooledTavilySearchAPIWrapper
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # the Redis tier is optional
+    aioredis = None
+
+
+def normalize_query(query: str) -> str:
+    """Lower-cases the query and collapses whitespace and trailing punctuation."""
+    return re.sub(r"\s+", " ", query).strip().rstrip("?!.").lower()
+
+
+def search_cache_key(query: str, options: Dict[str, Any]) -> str:
+    """Cache key for a search: the normalized query plus every non-default search option."""
+    payload = json.dumps(
+        {"query": normalize_query(query), **{k: v for k, v in options.items() if v is not None}},
+        sort_keys=True,
+        default=str,
+    )
+    return "search:" + hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SearchCache:
+    """
+    Two-tier cache for web search results.
+
+    Results live in an in-process LRU with TTL and, when `redis_url` is set and the `redis`
+    package is installed, in Redis so every worker shares them. Concurrent lookups for the
+    same key are coalesced so only one of them reaches the search provider.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, redis_url: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._redis = aioredis.from_url(redis_url) if redis_url and aioredis else None
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _get_local(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _get_redis(self, key: str) -> Optional[Any]:
+        if self._redis is None:
+            return None
+        try:
+            raw = await self._redis.get(key)
+        except Exception as e:
+            logger.warning("Search cache Redis read failed: %s", e)
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    async def _set_redis(self, key: str, value: Any) -> None:
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(key, json.dumps(value, default=str), ex=int(self.ttl_seconds))
+        except Exception as e:
+            logger.warning("Search cache Redis write failed: %s", e)
+
+    async def _load(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        value = await self._get_redis(key)
+        if value is not None:
+            self.redis_hits += 1
+            self._set_local(key, value)
+            return value
+
+        self.misses += 1
+        value = await fetch()
+        if not (isinstance(value, dict) and "error" in value):
+            self._set_local(key, value)
+            await self._set_redis(key, value)
+        return value
+
+    def _load_done(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            # mark a failure as retrieved even when every waiter went away
+            task.exception()
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the cached value for `key`, or runs `fetch()` once and caches its result.
+        Identical concurrent lookups share the same upstream call. Results carrying an
+        "error" key are returned but not cached.
+        """
+        value = self._get_local(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._load_done(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.redis_hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (lookups - self.misses) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "redis_enabled": self._redis is not None,
+        }
+
+
+class FakeSearchTool(BaseTool):
+    """
+    Offline stand-in for TavilySearch that returns deterministic results after `latency` seconds.
+    Selected with SEARCH_BACKEND=fake.
+    """
+    name: str = "tavily_search"
+    description: str = "A search engine for current events. Input should be a search query."
+    args_schema: Type[BaseModel] = TavilySearchInput
+    max_results: int = 5
+    latency: float = 0.0
+    calls: int = 0
+
+    def _results(self, query: str) -> Dict[str, Any]:
+        self.calls += 1
+        slug = re.sub(r"[^a-z0-9]+", "-", normalize_query(query)).strip("-")
+        return {
+            "query": query,
+            "answer": None,
+            "images": [],
+            "follow_up_questions": None,
+            "results": [
+                {
+                    "title": f"Result {i + 1} for {query}",
+                    "url": f"https://example.com/{slug}/{i + 1}",
+                    "content": f"Offline search result {i + 1} about {query}.",
+                    "score": 1.0 - i / 10,
+                    "raw_content": None,
+                }
+                for i in range(self.max_results)
+            ],
+            "response_time": self.latency,
+        }
+
+    def _run(self, query: str, **kwargs: Any) -> Dict[str, Any]:
+        time.sleep(self.latency)
+        return self._results(query)
+
+    async def _arun(self, query: str, **kwargs: Any) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        return self._results(query)
+
+
+class CachedSearchTool(BaseTool):
+    """
+    Wraps a search tool (keeping its name and schema) so every call goes through a SearchCache,
+    when one is set, and every upstream search holds a slot of the Tavily concurrency limit.
+    """
+    name: str = "tavily_search"
+    description: str = ""
+    args_schema: Type[BaseModel] = TavilySearchInput
+    tool: BaseTool
+    cache: Optional[SearchCache] = None
+
+    def _run(self, query: str, **kwargs: Any) -> Any:
+        return self.tool._run(query=query, **kwargs)
+
+    async def _search(self, query: str, **kwargs: Any) -> Any:
+        async with provider_limits.slot("tavily"):
+            return await self.tool._arun(query=query, **kwargs)
+
+    async def _arun(self, query: str, **kwargs: Any) -> Any:
+        kwargs.pop("run_manager", None)
+        if self.cache is None:
+            return await self._search(query, **kwargs)
+        key = search_cache_key(query, kwargs)
+        return await self.cache.get_or_fetch(key, lambda: self._search(query, **kwargs))
+
+
+search_cache = SearchCache(
+    ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS,
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    redis_url=settings.REDIS_URL if settings.SEARCH_CACHE_REDIS_ENABLED else None,
+)
+
+
+def build_search_tool(max_results: int = 5) -> BaseTool:
+    """Returns the research agent's search tool, wrapped in the shared search cache when enabled."""
+    if settings.SEARCH_BACKEND == "fake":
+        tool: BaseTool = FakeSearchTool(max_results=max_results)
+    else:
+        tool = TavilySearch(max_results=max_results, api_wrapper=PooledTavilySearchAPIWrapper())
+    return CachedSearchTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        tool=tool,
+        cache=search_cache if settings.SEARCH_CACHE_ENABLED else None,
+    )
@@ -0,0 +1,188 @@
+import hashlib
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from langchain_core.messages import AnyMessage, HumanMessage
+from app.core.config import settings
+
+
+EMBEDDING_DIM = 1 << 16
+
+
+def embed_text(text: str) -> Dict[int, float]:
+    """
+    Deterministic local embedding: hashed word unigrams, bigrams and character trigrams,
+    L2-normalized and returned as a sparse {index: weight} vector. Needs no network or model.
+    """
+    words = re.findall(r"[a-z0-9']+", text.lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"#{word}#"
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+
+    vector: Dict[int, float] = {}
+    for feature in features:
+        index = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=4).digest(), "big") % EMBEDDING_DIM
+        vector[index] = vector.get(index, 0.0) + 1.0
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {index: weight / norm for index, weight in vector.items()} if norm else {}
+
+
+def cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    """Cosine similarity of two normalized sparse vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(index, 0.0) for index, weight in a.items())
+
+
+def _numbers(text: str) -> frozenset:
+    """Numbers and ids in a message; two messages only match when these are identical."""
+    return frozenset(re.findall(r"\d[\w-]*", text.lower()))
+
+
+def parse_enabled_nodes(spec: str, default_threshold: float) -> Dict[str, float]:
+    """Parses "node[:threshold],..." (e.g. "va_agent:0.85,enhancer_agent:0.97") into {node: threshold}."""
+    nodes: Dict[str, float] = {}
+    for item in spec.split(","):
+        node, _, threshold = item.strip().partition(":")
+        if node:
+            nodes[node] = float(threshold) if threshold else default_threshold
+    return nodes
+
+
+def _turn(messages: Sequence[AnyMessage]) -> Tuple[Optional[str], Tuple[str, ...], str]:
+    """
+    Splits the history into the latest user message, the names of the nodes that already
+    answered in this turn, e.g. ("va_agent", "enhancer_agent"), and a hash of the conversation
+    before that message, which the node reads as well.
+    """
+    for index in range(len(messages) - 1, -1, -1):
+        message = messages[index]
+        if isinstance(message, HumanMessage) and not message.name:
+            text = message.content if isinstance(message.content, str) else None
+            history = hashlib.sha256()
+            for earlier in messages[:index]:
+                history.update(f"{earlier.type}:{earlier.name or ''}:{earlier.content}\x00".encode())
+            return text, tuple(m.name or m.type for m in messages[index + 1:]), history.hexdigest()
+    return None, (), ""
+
+
+class SemanticCache:
+    """
+    Semantic cache for LLM completions and routing decisions.
+
+    Entries are namespaced by node, system prompt and the shape of the current turn (which
+    nodes already answered), and matched on the embedding of the latest user message. A stored
+    result is only reused after the same earlier conversation, since the node reads all of it,
+    so a result never crosses from one thread's history into another's. Only nodes listed in
+    `enabled_nodes` are cached (none by default), each with its own similarity threshold:
+    routing decisions tolerate looser matches than free-text completions. A lookup whose best
+    cosine similarity reaches the node's threshold, and whose numbers/ids are identical,
+    returns the stored value instead of calling the model. Each namespace holds at most
+    `max_entries` (LRU) entries that expire after `ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        enabled_nodes: Dict[str, float],
+        embed: Callable[[str], Dict[int, float]] = embed_text,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled_nodes = dict(enabled_nodes)
+        self.embed = embed
+        # namespace -> entry key -> (expires_at, vector, numbers, history, value)
+        self._namespaces: Dict[str, "OrderedDict[Tuple[str, str], Tuple[float, Dict[int, float], frozenset, str, Any]]"] = {}
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    @staticmethod
+    def _namespace(node: str, system_prompt: str, shape: Tuple[str, ...]) -> str:
+        prompt_hash = hashlib.sha256(system_prompt.encode()).hexdigest()[:16]
+        return f"{node}:{prompt_hash}:{'/'.join(shape)}"
+
+    def lookup(self, namespace: str, vector: Dict[int, float], numbers: frozenset, history: str, threshold: float) -> Optional[Any]:
+        entries = self._namespaces.get(namespace)
+        if not entries:
+            return None
+        now = time.monotonic()
+        best_key, best_score = None, threshold
+        for key, (expires_at, stored, stored_numbers, stored_history, _) in list(entries.items()):
+            if expires_at < now:
+                del entries[key]
+                continue
+            if stored_numbers != numbers or stored_history != history:
+                continue
+            score = cosine(vector, stored)
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is None:
+            return None
+        entries.move_to_end(best_key)
+        return entries[best_key][4]
+
+    def store(self, namespace: str, text: str, vector: Dict[int, float], numbers: frozenset, history: str, value: Any) -> None:
+        entries = self._namespaces.setdefault(namespace, OrderedDict())
+        key = (history, text)
+        entries[key] = (time.monotonic() + self.ttl_seconds, vector, numbers, history, value)
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    async def acached(
+        self,
+        node: str,
+        system_prompt: str,
+        messages: Sequence[AnyMessage],
+        call: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Returns a cached result for `node` when the latest user message is close enough to a
+        previous one seen in the same situation, after the same history; otherwise awaits
+        `call()` and stores its result. Nodes that did not opt in always call through.
+        """
+        if node not in self.enabled_nodes:
+            return await call()
+
+        text, shape, history = _turn(messages)
+        if not text:
+            return await call()
+
+        namespace = self._namespace(node, system_prompt, shape)
+        vector = self.embed(text)
+        numbers = _numbers(text)
+        value = self.lookup(namespace, vector, numbers, history, self.enabled_nodes[node])
+        if value is not None:
+            self.hits[node] = self.hits.get(node, 0) + 1
+            return value
+
+        self.misses[node] = self.misses.get(node, 0) + 1
+        value = await call()
+        self.store(namespace, text, vector, numbers, history, value)
+        return value
+
+    def stats(self) -> dict:
+        nodes: List[str] = sorted(set(self.hits) | set(self.misses))
+        return {
+            "enabled_nodes": dict(self.enabled_nodes),
+            "entries": sum(len(entries) for entries in self._namespaces.values()),
+            "nodes": {
+                node: {
+                    "hits": self.hits.get(node, 0),
+                    "misses": self.misses.get(node, 0),
+                    "hit_rate": self.hits.get(node, 0) / (self.hits.get(node, 0) + self.misses.get(node, 0)),
+                }
+                for node in nodes
+            },
+        }
+
+
+semantic_cache = SemanticCache(
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+    enabled_nodes=parse_enabled_nodes(settings.SEMANTIC_CACHE_NODES, settings.SEMANTIC_CACHE_THRESHOLD),
+)
@@ -0,0 +1,17 @@
+"""
+The runs of the graph whose events the chat stream forwards to the client.
+
+The chat service subscribes to `astream_events` with `CHAT_EVENT_FILTER`, so node, chain,
+sub-graph and untagged model events are dropped inside LangChain instead of being handed to
+the service one by one and discarded there.
+"""
+
+# carried by every chat model whose tokens are shown to the user
+ANSWER_TAG = "va:answer"
+
+SEARCH_TOOL_NAME = "tavily_search"
+
+CHAT_EVENT_FILTER = {
+    "include_tags": [ANSWER_TAG],
+    "include_names": [SEARCH_TOOL_NAME],
+}
@@ -0,0 +1,145 @@
+"""
+Shared, pooled HTTP transport for the upstream providers.
+
+Every Groq model and every Tavily search goes through one process-wide `httpx.AsyncClient`,
+whose keep-alive pool reuses TLS connections across turns instead of opening one per call
+(the stock Tavily wrapper opens a new aiohttp session, hence a new connection, per search).
+Gemini speaks gRPC, so all Gemini models share one async client and its single multiplexed
+HTTP/2 channel instead, built with langchain-google-genai's private helpers; when those are
+not importable each Gemini model keeps its own client.
+"""
+import json
+import time
+from typing import Any, Dict, Optional, Tuple
+import httpx
+from langchain_tavily._utilities import TavilySearchAPIWrapper
+from app.core.config import settings
+
+try:
+    from langchain_google_genai import _genai_extension as genaix
+    from langchain_google_genai._common import get_client_info
+except ImportError:  # private modules of langchain-google-genai; the shared Gemini client is optional
+    genaix = None
+    get_client_info = None
+
+
+class HTTPTransport:
+    """
+    The process-wide pooled HTTP client, with per-call timeouts and request counters, and the
+    shared Gemini gRPC clients.
+    """
+
+    def __init__(self, max_connections: int, max_keepalive_connections: int, keepalive_expiry: float, connect_timeout: float):
+        self.limits = httpx.Limits(
+            max_connections=max_connections or None,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.connect_timeout = connect_timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._gemini_clients: Dict[Tuple[Any, ...], Any] = {}
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.seconds = 0.0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client; created on first use and again after `aclose()`."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=httpx.Timeout(None, connect=self.connect_timeout),
+            )
+        return self._client
+
+    def timeout(self, seconds: Optional[float]) -> httpx.Timeout:
+        """A per-call timeout of `seconds` for the whole exchange; connecting keeps its own, shorter limit."""
+        return httpx.Timeout(seconds, connect=self.connect_timeout)
+
+    async def post_json(self, url: str, payload: Any, headers: Dict[str, str], timeout: Optional[float] = None) -> httpx.Response:
+        start = time.perf_counter()
+        self.requests += 1
+        try:
+            return await self.client.post(url, json=payload, headers=headers, timeout=self.timeout(timeout))
+        except httpx.TimeoutException:
+            self.timeouts += 1
+            raise
+        except httpx.HTTPError:
+            self.errors += 1
+            raise
+        finally:
+            self.seconds += time.perf_counter() - start
+
+    def gemini_client(self, model: Any) -> Optional[Any]:
+        """
+        The async Gemini client of `model`, shared by every model with the same key, transport
+        and endpoint, or None when the helpers to build it are unavailable. Must be called
+        inside the event loop, as the gRPC channel is bound to it.
+        """
+        if genaix is None:
+            return None
+        api_key = None
+        if not model.credentials and model.google_api_key is not None:
+            api_key = model.google_api_key.get_secret_value()
+        key = (api_key, id(model.credentials), model.transport, repr(model.client_options))
+        client = self._gemini_clients.get(key)
+        if client is None:
+            transport = model.transport
+            if transport == "rest":  # the async client only speaks gRPC
+                transport = "grpc_asyncio"
+            client = self._gemini_clients[key] = genaix.build_generative_async_service(
+                credentials=model.credentials,
+                api_key=api_key,
+                client_info=get_client_info("ChatGoogleGenerativeAI"),
+                client_options=model.client_options,
+                transport=transport,
+            )
+        return client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        for client in self._gemini_clients.values():
+            await client.transport.close()
+        self._gemini_clients.clear()
+
+    def stats(self) -> dict:
+        return {
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry_seconds": self.limits.keepalive_expiry,
+            "gemini_clients": len(self._gemini_clients),
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "avg_ms": self.seconds / self.requests * 1000 if self.requests else 0.0,
+        }
+
+
+http_transport = HTTPTransport(
+    max_connections=settings.HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=settings.HTTP_KEEPALIVE_SECONDS,
+    connect_timeout=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+)
+
+
+class PooledTavilySearchAPIWrapper(TavilySearchAPIWrapper):
+    """TavilySearchAPIWrapper whose async searches go through the shared HTTP transport, with a timeout."""
+
+    async def raw_results_async(self, query: str, **options: Any) -> Dict:
+        payload = {"query": query, **{k: v for k, v in options.items() if v is not None}}
+        headers = {
+            "Authorization": f"Bearer {self.tavily_api_key.get_secret_value()}",
+            "Content-Type": "application/json",
+            "X-Client-Source": "langchain-tavily",
+        }
+        response = await http_transport.post_json(
+            f"{settings.TAVILY_API_URL}/search", payload, headers, timeout=settings.TAVILY_TIMEOUT_SECONDS,
+        )
+        if response.status_code != 200:
+            raise Exception(f"Error {response.status_code}: {response.reason_phrase}")
+        return json.loads(response.content)
+
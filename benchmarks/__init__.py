@@ -0,0 +1,15 @@
+"""
+Benchmarks of the API and the agent graph; see README.md for how to run each one.
+
+Importing the package sets the defaults they run with (fake models and search, in-memory
+graph state, and only errors logged, so log lines do not interleave with the results) before
+`app` reads its Settings. Values already in the environment win.
+"""
+import os
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("SEARCH_BACKEND", "fake")
+os.environ.setdefault("CHECKPOINTER_BACKEND", "memory")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+os.environ.setdefault("LOG_LEVEL", "ERROR")
@@ -0,0 +1,103 @@
+"""
+N single-todo requests against one batch request, for create, status change and delete.
+
+Each operation runs on N todos as N requests to the single-todo routes, then as one request to
+the matching batch route (POST /bulk, PUT /bulk/status, POST /bulk/delete), through the ASGI
+app. Reports the median wall time over `--repeat` runs and the SQL statements each side sent.
+
+    python -m benchmarks.bulk_writes --sizes 5 15 50 --repeat 5
+
+Needs POSTGRES_URL pointing at a scratch database with the migrations applied. Every todo it
+creates is deleted again.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List, Tuple
+import httpx
+from sqlalchemy import event
+from app.core.database import engine
+from app.main import app
+
+TODOS = "/api/v1/todos"
+
+statements: List[str] = []
+
+
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+async def timed(run: Callable[[], Awaitable[None]]) -> Tuple[float, int]:
+    statements.clear()
+    start = time.perf_counter()
+    await run()
+    return time.perf_counter() - start, len(statements)
+
+
+async def measure(client: httpx.AsyncClient, size: int) -> dict:
+    """One run of every operation on `size` todos, singles first; returns {(operation, side): (seconds, statements)}."""
+    results = {}
+    ids: List[str] = []
+
+    async def create_singles():
+        for i in range(size):
+            ids.append((await client.post(f"{TODOS}/", json={"title": f"bench-bulk-{i}"})).json()["id"])
+
+    async def status_singles():
+        for todo_id in ids:
+            await client.put(f"{TODOS}/{todo_id}", json={"status": "completed"})
+
+    async def delete_singles():
+        for todo_id in ids:
+            await client.delete(f"{TODOS}/{todo_id}")
+
+    results["create", "single"] = await timed(create_singles)
+    results["status", "single"] = await timed(status_singles)
+    results["delete", "single"] = await timed(delete_singles)
+    ids.clear()
+
+    async def create_batch():
+        response = await client.post(f"{TODOS}/bulk", json={"items": [{"title": f"bench-bulk-{i}"} for i in range(size)]})
+        ids.extend(todo["id"] for todo in response.json())
+
+    async def status_batch():
+        await client.put(f"{TODOS}/bulk/status", json={"ids": ids, "status": "completed"})
+
+    async def delete_batch():
+        await client.post(f"{TODOS}/bulk/delete", json={"ids": ids})
+
+    results["create", "batch"] = await timed(create_batch)
+    results["status", "batch"] = await timed(status_batch)
+    results["delete", "batch"] = await timed(delete_batch)
+    return results
+
+
+async def run(sizes: List[int], repeat: int) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await measure(client, 2)  # warm-up: connections, prepared statements
+        print(f"{'N':>4} {'operation':>9} {'N singles':>10} {'stmts':>6} {'1 batch':>9} {'stmts':>6} {'speed-up':>9}")
+        for size in sizes:
+            runs = [await measure(client, size) for _ in range(repeat)]
+            for operation in ("create", "status", "delete"):
+                single = statistics.median(r[operation, "single"][0] for r in runs)
+                batch = statistics.median(r[operation, "batch"][0] for r in runs)
+                print(
+                    f"{size:>4} {operation:>9} {single * 1000:>8.1f}ms {runs[0][operation, 'single'][1]:>6} "
+                    f"{batch * 1000:>7.1f}ms {runs[0][operation, 'batch'][1]:>6} {single / batch:>8.1f}x"
+                )
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 15, 50])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
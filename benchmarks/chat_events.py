@@ -0,0 +1,68 @@
+"""
+Events the chat loop receives per turn, with and without CHAT_EVENT_FILTER.
+
+Replays the same turns through `graph.astream_events` twice, unfiltered as the chat service
+used to subscribe and with the filter from app/modules/agents/streaming.py, and reports the
+events delivered per turn, how many of them are answer tokens, and the time per turn. The
+token count must match: the filter drops only events the chat loop discarded anyway.
+
+    python -m benchmarks.chat_events --rounds 50
+
+Runs in-process on the fake models and search, no database or network needed.
+"""
+import argparse
+import asyncio
+import collections
+import time
+import uuid
+from typing import Counter, Tuple
+from langchain_core.messages import HumanMessage
+from app.modules.agents.registry import subagents
+from app.modules.agents.streaming import ANSWER_TAG, CHAT_EVENT_FILTER
+from app.modules.agents.VA_graph import graph
+
+# one message per supervisor route: research, plain answer, todo agent
+MESSAGES = ["what is the latest news on rust", "hello there friend", "add buy milk to my todo list"]
+
+
+async def replay(rounds: int, event_filter: dict) -> Tuple[Counter, int, float]:
+    """Runs `rounds` of MESSAGES on fresh threads; returns (events by type, answer tokens, seconds)."""
+    events: Counter = collections.Counter()
+    tokens = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in MESSAGES:
+            config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+            async for event in graph.astream_events(
+                {"messages": [HumanMessage(content=message)]}, config=config, version="v2", **event_filter
+            ):
+                events[event["event"]] += 1
+                if event["event"] == "on_chat_model_stream" and ANSWER_TAG in event.get("tags", []):
+                    tokens += 1
+    return events, tokens, time.perf_counter() - start
+
+
+async def run(rounds: int, verbose: bool) -> None:
+    subagents.startup()
+    await replay(1, {})  # warm-up: builds the sub-agents and compiles their graphs
+    turns = rounds * len(MESSAGES)
+    print(f"{turns} turns")
+    print(f"{'subscription':<12} {'events/turn':>12} {'tokens/turn':>12} {'ms/turn':>8}")
+    for label, event_filter in (("unfiltered", {}), ("filtered", CHAT_EVENT_FILTER)):
+        events, tokens, seconds = await replay(rounds, event_filter)
+        print(f"{label:<12} {sum(events.values()) / turns:>12.1f} {tokens / turns:>12.1f} {seconds / turns * 1000:>8.2f}")
+        if verbose:
+            for event_type, count in events.most_common():
+                print(f"    {event_type:<28} {count / turns:>6.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=50, help="times each message is replayed")
+    parser.add_argument("--verbose", action="store_true", help="break the events down by type")
+    args = parser.parse_args()
+    asyncio.run(run(args.rounds, args.verbose))
+
+
+if __name__ == "__main__":
+    main()
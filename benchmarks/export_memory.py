@@ -0,0 +1,139 @@
+"""
+Peak RSS of a full todo export against the number of rows.
+
+For each row count, seeds that many todos, then exports the table in a fresh process per
+mode, so each measures its own peak:
+
+- stream:   GET /api/v1/todos/export (NDJSON through a server-side cursor), each chunk
+            discarded once sent
+- buffered: every row loaded with one query and encoded into a single response body, the way
+            a non-streaming list endpoint builds it
+
+    python -m benchmarks.export_memory --rows 10000 100000 300000
+
+Needs POSTGRES_URL pointing at a scratch database with the migrations applied. The seeded
+rows are deleted afterwards.
+"""
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import time
+from sqlalchemy import text
+
+SEED_PREFIX = "bench-export-"
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def seed(rows: int) -> None:
+    from app.core.database import engine
+
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM todos WHERE title LIKE :prefix"), {"prefix": SEED_PREFIX + "%"})
+        await conn.execute(
+            text(
+                "INSERT INTO todos (id, title, description, status, created_at, updated_at) "
+                "SELECT gen_random_uuid(), :prefix || g, repeat('x', 200), 'PENDING', now(), now() "
+                "FROM generate_series(1, :rows) g"
+            ),
+            {"prefix": SEED_PREFIX, "rows": rows},
+        )
+    await engine.dispose()
+
+
+async def cleanup() -> None:
+    from app.core.database import engine
+
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM todos WHERE title LIKE :prefix"), {"prefix": SEED_PREFIX + "%"})
+    await engine.dispose()
+
+
+async def export_streamed() -> int:
+    """
+    Calls the ASGI app directly and drops each body chunk as it arrives, like a server writing
+    it to the socket (httpx's ASGITransport would collect the whole body first).
+    """
+    from app.main import app
+
+    lines = 0
+    finished = asyncio.Event()
+
+    async def receive() -> dict:
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        nonlocal lines
+        if message["type"] == "http.response.body":
+            lines += message.get("body", b"").count(b"\n")
+            if not message.get("more_body"):
+                finished.set()
+
+    path = "/api/v1/todos/export"
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    await app(scope, receive, send)
+    return lines
+
+
+async def export_buffered() -> int:
+    from app.api.v1.todos.export import ExportKind, _ndjson, _statement
+    from app.core.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(_statement(ExportKind.TODOS, None, None))
+        columns = list(result.keys())
+        body = _ndjson(columns, result.all()).encode()
+    return body.count(b"\n")
+
+
+def child(mode: str) -> None:
+    """Runs one export in this process and prints its row count, time and peak RSS growth as JSON."""
+    import app.main  # noqa: F401  imported before the baseline, as a server would have it loaded
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    lines = asyncio.run(export_streamed() if mode == "stream" else export_buffered())
+    print(json.dumps({
+        "lines": lines,
+        "seconds": time.perf_counter() - start,
+        "rss_growth_mb": peak_rss_mb() - baseline,
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--modes", nargs="+", choices=["stream", "buffered"], default=["stream", "buffered"])
+    parser.add_argument("--child", choices=["stream", "buffered"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child)
+        return
+
+    print(f"{'rows':>9} {'mode':>9} {'exported':>9} {'seconds':>8} {'peak RSS growth':>16}")
+    try:
+        for rows in args.rows:
+            asyncio.run(seed(rows))
+            for mode in args.modes:
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.export_memory", "--child", mode],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                result = json.loads(out.strip().splitlines()[-1])
+                print(f"{rows:>9} {mode:>9} {result['lines']:>9} {result['seconds']:>8.2f} {result['rss_growth_mb']:>13.1f} MB")
+    finally:
+        asyncio.run(cleanup())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Per-request cost of the access log: every request logged, sampled, and turned off.
+
+Each configuration runs in a fresh process with its LOG_* settings in the environment, sends
+`--requests` GETs of a cheap route (/api/v1/chatbot/stream/stats) through the ASGI app and
+reports the best of `--repeat` rounds in microseconds per request. The process's stdout, where
+the log listener writes, goes to a file (`--log-file`, a temporary file by default), so the
+lines written and the records dropped by the bounded queue are reported too.
+
+    python -m benchmarks.logging_overhead --requests 5000 --repeat 3
+
+Point `--log-file` at a pipe or a slow disk to see how a slow sink behaves; the request path
+never writes to it. Runs in-process, no database or network needed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict
+
+ROUTE = "/api/v1/chatbot/stream/stats"
+
+CONFIGS: Dict[str, Dict[str, str]] = {
+    "every request": {"LOG_ACCESS_ENABLED": "true", "LOG_ACCESS_SAMPLE_RATE": "1.0"},
+    "sampled at 1%": {"LOG_ACCESS_ENABLED": "true", "LOG_ACCESS_SAMPLE_RATE": "0.01"},
+    "access log off": {"LOG_ACCESS_ENABLED": "false"},
+}
+
+
+async def replay(requests: int, repeat: int) -> float:
+    """Best round of `requests` sequential GETs, in microseconds per request."""
+    import httpx
+    from app.main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(200):  # warm-up
+            await client.get(ROUTE)
+        rounds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(requests):
+                await client.get(ROUTE)
+            rounds.append((time.perf_counter() - start) / requests * 1e6)
+    return min(rounds)
+
+
+def child(requests: int, repeat: int) -> None:
+    """Runs the requests in this process; the result goes to stderr, as stdout carries the log."""
+    from app.core.logs import logging_system
+
+    us_per_request = asyncio.run(replay(requests, repeat))
+    dropped = logging_system.stats()["dropped"]
+    logging_system.shutdown()
+    print(json.dumps({"us_per_request": us_per_request, "dropped": dropped}), file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--log-file", help="where the log is written (default: a temporary file)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.requests, args.repeat)
+        return
+
+    print(f"{'access log':<15} {'us/request':>11} {'log lines':>10} {'dropped':>8}")
+    for name in args.configs:
+        env = {
+            **os.environ,
+            "LOG_LEVEL": "INFO",
+            "LOG_FORMAT": "json",
+            "LOG_ACCESS_SAMPLE_ROUTES": "",
+            **CONFIGS[name],
+        }
+        with tempfile.NamedTemporaryFile("w+b") as scratch:
+            path = args.log_file or scratch.name
+            with open(path, "wb") as log:
+                err = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.logging_overhead", "--child",
+                     "--requests", str(args.requests), "--repeat", str(args.repeat)],
+                    check=True, stdout=log, stderr=subprocess.PIPE, text=True, env=env,
+                ).stderr
+            lines = 0
+            if os.path.isfile(path):
+                with open(path, "rb") as log:
+                    lines = sum(1 for _ in log)
+        result = json.loads(err.strip().splitlines()[-1])
+        print(f"{name:<15} {result['us_per_request']:>11.0f} {lines:>10} {result['dropped']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Turn latency across per-node model chain configurations.
+
+Each configuration is a set of LLM_MODEL_<NODE> chains (and LLM_NODE_TIMEOUTS budgets) made of
+"fake:<seconds>" models, which answer after that many seconds and time out like a provider
+would. Every configuration runs in a fresh process with its environment set, replays
+`--turns` research turns through the chat service and reports the median turn time and which
+model of each node's chain answered:
+
+- uniform:     the same 1 s model on every node
+- tiered:      a 0.2 s router, a 0.3 s enhancer and the 1 s model for the research agent
+- fallback:    slow primaries (5 s router, 3 s research) with 0.5 s / 1.5 s budgets, so the
+               next model of each chain takes over
+- no-fallback: the same slow primaries alone with the default budgets; the turn waits them out
+
+    python -m benchmarks.model_tiers --turns 3 --configs uniform tiered fallback
+
+The fast router and the semantic cache are off, so every turn reaches the models. Runs
+offline, no database or network needed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+MESSAGE = "look up the colour of the sky"
+
+CONFIGS: Dict[str, Dict[str, str]] = {
+    "uniform": {
+        "LLM_MODEL_VA_AGENT": "fake:1",
+        "LLM_MODEL_ENHANCER_AGENT": "fake:1",
+        "LLM_MODEL_RESEARCH_AGENT": "fake:1",
+        "LLM_MODEL_TODO_AGENT": "fake:1",
+    },
+    "tiered": {
+        "LLM_MODEL_VA_AGENT": "fake:0.2",
+        "LLM_MODEL_ENHANCER_AGENT": "fake:0.3",
+        "LLM_MODEL_RESEARCH_AGENT": "fake:1",
+        "LLM_MODEL_TODO_AGENT": "fake:1",
+    },
+    "fallback": {
+        "LLM_MODEL_VA_AGENT": "fake:5,fake:0.2",
+        "LLM_MODEL_ENHANCER_AGENT": "fake:0.3",
+        "LLM_MODEL_RESEARCH_AGENT": "fake:3,fake:1",
+        "LLM_MODEL_TODO_AGENT": "fake:1",
+        "LLM_NODE_TIMEOUTS": "va_agent:0.5,enhancer_agent:30,research_agent:1.5,todo_agent:60",
+    },
+    "no-fallback": {
+        "LLM_MODEL_VA_AGENT": "fake:5",
+        "LLM_MODEL_ENHANCER_AGENT": "fake:0.3",
+        "LLM_MODEL_RESEARCH_AGENT": "fake:3",
+        "LLM_MODEL_TODO_AGENT": "fake:1",
+    },
+}
+
+
+async def replay(turns: int) -> List[float]:
+    from app.api.v1.chatbot.service import VAServices
+
+    service = VAServices()
+    seconds = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        answer = [payload async for event, payload in service.chat_events(MESSAGE) if event == "content"]
+        seconds.append(time.perf_counter() - start)
+        if not answer:
+            raise RuntimeError("the turn produced no answer")
+    return seconds
+
+
+def answered_by() -> Dict[str, Dict[str, int]]:
+    """Completed calls of each fake model, per node; a model that timed out has none."""
+    from app.modules.agents.llms import model_registry
+
+    answered = {}
+    for node in model_registry.node_models:
+        runnable = model_registry.get(node)
+        # with_fallbacks keeps the primary in `runnable` and the rest in `fallbacks`
+        models = [getattr(runnable, "runnable", runnable), *getattr(runnable, "fallbacks", [])]
+        for (_, model), fake in zip(model_registry.chain(node), models):
+            if fake.calls:
+                answered.setdefault(node, {})[f"fake:{model}"] = fake.calls
+    return answered
+
+
+def child(turns: int) -> None:
+    """Replays the turns in this process and prints their times and the answering models as JSON."""
+    from app.modules.agents.registry import subagents
+
+    subagents.startup()
+    seconds = asyncio.run(replay(turns))
+    print(json.dumps({"seconds": seconds, "answered_by": answered_by()}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.turns)
+        return
+
+    print(f"{'configuration':<12} {'median turn':>12}  answered by (calls)")
+    for name in args.configs:
+        env = {
+            **os.environ,
+            "LLM_BACKEND": "fake",
+            "FAST_ROUTER_ENABLED": "false",
+            "SEMANTIC_CACHE_NODES": "",
+            "LLM_HEDGE_NODES": "",
+            **CONFIGS[name],
+        }
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.model_tiers", "--child", "--turns", str(args.turns)],
+            check=True, capture_output=True, text=True, env=env,
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        answered = ", ".join(
+            f"{node} {model} ({calls})" for node, models in result["answered_by"].items() for model, calls in models.items()
+        )
+        print(f"{name:<12} {statistics.median(result['seconds']):>11.2f}s  {answered}")
+
+
+if __name__ == "__main__":
+    main()
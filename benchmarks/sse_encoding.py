@@ -0,0 +1,134 @@
+"""
+Throughput and bytes on the wire of the chat SSE encoder.
+
+Replays a recorded-shape chat turn (a checkpoint, `--tokens` content tokens, a web search and
+a short answer after it) through app/api/v1/chatbot/sse.py and through the f-string framing
+it replaced. Framing alone is timed first (events per second per encoder); then whole streams
+through encode_stream, which adds the pump task and queue, report events per second, frames and
+bytes sent for each configuration:
+
+- previous framing: `json.dumps` of a dict per event, URLs encoded twice
+- templates with the stdlib json and with orjson (SSE_JSON_BACKEND)
+- templates with byte coalescing (SSE_COALESCE_BYTES)
+- a paced stream (one token per `--pace-ms`) without and with timed coalescing (SSE_COALESCE_MS)
+
+    python -m benchmarks.sse_encoding --tokens 20000 --repeat 5
+
+Runs in-process, no database or network needed.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import AsyncIterator, Callable, List, Tuple
+from app.api.v1.chatbot.sse import ChatEvent, SSEEncoder, encode_stream, json_backend
+
+WORDS = "the quick brown fox jumps over the lazy dog and then writes a long answer about todos".split()
+
+
+def recorded_turn(tokens: int) -> List[ChatEvent]:
+    rng = random.Random(1)
+    answer = [("content", rng.choice(WORDS) + " ") for _ in range(tokens)]
+    search = [("search_start", "weather in berlin"), ("search_results", [f"https://example.com/{i}" for i in range(5)])]
+    return [("checkpoint", "1f0a2b3c-4d5e-6f70-8192-a3b4c5d6e7f8"), *answer, *search, *answer[: tokens // 10], ("end", None)]
+
+
+def previous_frame(event: ChatEvent) -> str:
+    """The framing before sse.py: a dict per event through json.dumps, URLs as a JSON string."""
+    event_type, payload = event
+    if event_type == "checkpoint":
+        return f"data: {json.dumps({'type': 'checkpoint', 'checkpoint_id': payload})}\n\n"
+    if event_type == "content":
+        return f"data: {json.dumps({'type': 'content', 'content': payload})}\n\n"
+    if event_type == "search_start":
+        return f"data: {json.dumps({'type': 'search_start', 'query': payload})}\n\n"
+    if event_type == "search_results":
+        return f"data: {json.dumps({'type': 'search_results', 'urls': json.dumps(payload)})}\n\n"
+    return f"data: {json.dumps({'type': 'end'})}\n\n"
+
+
+async def replay(events: List[ChatEvent], pace: float = 0) -> AsyncIterator[ChatEvent]:
+    for event in events:
+        if pace and event[0] == "content":
+            await asyncio.sleep(pace)
+        yield event
+
+
+async def previous_stream(events: List[ChatEvent]) -> AsyncIterator[bytes]:
+    async for event in replay(events):
+        yield previous_frame(event).encode()
+
+
+async def drain(frames: AsyncIterator[bytes]) -> Tuple[float, int, int]:
+    """Consumes a stream; returns (seconds, frames, bytes)."""
+    count = size = 0
+    start = time.perf_counter()
+    async for frame in frames:
+        count += 1
+        size += len(frame)
+    return time.perf_counter() - start, count, size
+
+
+def frame_rate(frame: Callable[[ChatEvent], bytes], events: List[ChatEvent], repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for event in events:
+            frame(event)
+        runs.append(time.perf_counter() - start)
+    return len(events) / statistics.median(runs)
+
+
+async def run(tokens: int, repeat: int, pace_ms: float, paced_tokens: int, coalesce_bytes: int, coalesce_ms: float) -> None:
+    events = recorded_turn(tokens)
+    print(f"{len(events)} events per turn, median of {repeat} runs")
+    print(f"{'framing only':<26} {'events/s':>10}")
+    json_encoder, orjson_encoder = SSEEncoder(json_backend("json")), SSEEncoder(json_backend("orjson"))
+    framers = {
+        "previous framing": lambda event: previous_frame(event).encode(),
+        "templates, json": lambda event: json_encoder.frame(*event),
+        "templates, orjson": lambda event: orjson_encoder.frame(*event),
+    }
+    for label, frame in framers.items():
+        print(f"{label:<26} {frame_rate(frame, events, repeat):>10.0f}")
+
+    configs = {
+        "previous framing": lambda: previous_stream(events),
+        "templates, json": lambda: encode_stream(replay(events), SSEEncoder(json_backend("json"))),
+        "templates, orjson": lambda: encode_stream(replay(events), SSEEncoder(json_backend("orjson"))),
+        f"orjson, coalesce {coalesce_bytes} B": lambda: encode_stream(
+            replay(events), SSEEncoder(json_backend("orjson")), coalesce_bytes=coalesce_bytes
+        ),
+    }
+    print(f"\n{'whole stream':<26} {'events/s':>10} {'frames':>7} {'bytes':>9}")
+    for label, stream in configs.items():
+        runs = [await drain(stream()) for _ in range(repeat)]
+        seconds = statistics.median(r[0] for r in runs)
+        print(f"{label:<26} {len(events) / seconds:>10.0f} {runs[0][1]:>7} {runs[0][2]:>9}")
+
+    # a token every pace_ms, as from a model: throughput is set by the source, so only the wire is compared
+    paced = events[:1] + events[1 : paced_tokens + 1] + events[-1:]
+    print(f"\n{len(paced)} events paced at {pace_ms:g} ms per token")
+    print(f"{'configuration':<26} {'frames':>7} {'bytes':>9}")
+    for label, coalesce in (("no coalescing", 0), (f"coalesce {coalesce_ms:g} ms", coalesce_ms)):
+        encoder = SSEEncoder(json_backend("orjson"))
+        _, count, size = await drain(encode_stream(replay(paced, pace_ms / 1000), encoder, coalesce_ms=coalesce))
+        print(f"{label:<26} {count:>7} {size:>9}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=20000, help="content tokens before the search")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--coalesce-bytes", type=int, default=64)
+    parser.add_argument("--pace-ms", type=float, default=1)
+    parser.add_argument("--paced-tokens", type=int, default=500)
+    parser.add_argument("--coalesce-ms", type=float, default=30)
+    args = parser.parse_args()
+    asyncio.run(run(args.tokens, args.repeat, args.pace_ms, args.paced_tokens, args.coalesce_bytes, args.coalesce_ms))
+
+
+if __name__ == "__main__":
+    main()
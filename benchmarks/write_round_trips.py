@@ -0,0 +1,160 @@
+"""
+Per-request latency of the single-statement writes (UPDATE/DELETE ... RETURNING) against the
+select, mutate, commit, refresh sequence the todo services used before.
+
+Each operation runs `--requests` times through TodoService / TodoCollectionService and through
+`PreviousWrites`, a copy of the previous implementation; reports median and p95 latency and
+the SQL statements one request sends. delete_collection deletes a collection holding
+`--children` todos: the previous path loads and deletes each of them through the ORM cascade,
+the current one leaves them to ON DELETE CASCADE.
+
+    python -m benchmarks.write_round_trips --requests 200 --children 50
+
+Needs POSTGRES_URL pointing at a scratch database with the migrations applied. Every row it
+creates is deleted again.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List, Optional
+from uuid import UUID
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import selectinload
+from app.api.v1.todos.models import Todo, TodoCollection
+from app.api.v1.todos.schemas import TodoCollectionUpdate, TodoStatus, TodoUpdate
+from app.api.v1.todos.services import TodoCollectionService, TodoService
+from app.core.database import AsyncSessionLocal, engine
+
+statements: List[str] = []
+
+
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+class PreviousWrites:
+    """The write paths as they were before RETURNING: load the row, change it, commit, refresh."""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def update_todo(self, todo_id: UUID, todo_update: TodoUpdate) -> Optional[Todo]:
+        todo = (await self.db.execute(select(Todo).where(Todo.id == todo_id))).scalar_one_or_none()
+        if not todo:
+            return None
+        for key, value in todo_update.model_dump(exclude_unset=True).items():
+            setattr(todo, key, value)
+        await self.db.commit()
+        await self.db.refresh(todo)
+        return todo
+
+    async def delete_todo(self, todo_id: UUID) -> bool:
+        todo = (await self.db.execute(select(Todo).where(Todo.id == todo_id))).scalar_one_or_none()
+        if not todo:
+            return False
+        await self.db.delete(todo)
+        await self.db.commit()
+        return True
+
+    async def update_collection(self, collection_id: UUID, collection_update: TodoCollectionUpdate) -> Optional[TodoCollection]:
+        collection = (await self.db.execute(select(TodoCollection).where(TodoCollection.id == collection_id))).scalar_one_or_none()
+        if not collection:
+            return None
+        for key, value in collection_update.model_dump(exclude_unset=True).items():
+            setattr(collection, key, value)
+        await self.db.commit()
+        await self.db.refresh(collection)
+        return collection
+
+    async def delete_collection(self, collection_id: UUID) -> bool:
+        # the ORM cascade loads every todo of the collection and deletes them one by one
+        collection = (await self.db.execute(
+            select(TodoCollection).where(TodoCollection.id == collection_id).options(selectinload(TodoCollection.todos))
+        )).scalar_one_or_none()
+        if not collection:
+            return False
+        await self.db.delete(collection)
+        await self.db.commit()
+        return True
+
+
+async def new_todos(count: int, collection_id: Optional[UUID] = None) -> List[UUID]:
+    async with engine.begin() as conn:
+        result = await conn.execute(
+            insert(Todo).returning(Todo.id),
+            [{"title": f"bench-rt-{i}", "status": TodoStatus.PENDING, "collection_id": collection_id} for i in range(count)],
+        )
+        return [row.id for row in result]
+
+
+async def new_collections(count: int) -> List[UUID]:
+    async with engine.begin() as conn:
+        result = await conn.execute(
+            insert(TodoCollection).returning(TodoCollection.id),
+            [{"name": f"bench-rt-{i}"} for i in range(count)],
+        )
+        return [row.id for row in result]
+
+
+async def measure(ids: List[UUID], call: Callable[..., Awaitable], service) -> dict:
+    """Runs `call(service(session), id)` once per id, each in its own session like a request."""
+    latencies, counts = [], []
+    for item_id in ids:
+        async with AsyncSessionLocal() as session:
+            statements.clear()
+            start = time.perf_counter()
+            await call(service(session), item_id)
+            latencies.append(time.perf_counter() - start)
+            counts.append(len(statements))
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "statements": max(counts),
+    }
+
+
+async def run(requests: int, children: int) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    operations = {
+        "update_todo": (lambda s, i: s.update_todo(i, TodoUpdate(status=TodoStatus.COMPLETED)), lambda n: new_todos(n)),
+        "delete_todo": (lambda s, i: s.delete_todo(i), lambda n: new_todos(n)),
+        "update_collection": (lambda s, i: s.update_collection(i, TodoCollectionUpdate(name="renamed")), new_collections),
+        "delete_collection": (lambda s, i: s.delete_collection(i), new_collections),
+    }
+    services = {
+        "previous": (PreviousWrites, PreviousWrites),
+        "RETURNING": (TodoService, TodoCollectionService),
+    }
+    await measure(await new_todos(5), operations["delete_todo"][0], TodoService)  # warm-up
+    print(f"{'operation':>18} {'implementation':>15} {'p50':>8} {'p95':>8} {'statements':>11}")
+    created_collections: List[UUID] = []
+    for name, (call, create) in operations.items():
+        for label, (todo_service, collection_service) in services.items():
+            ids = await create(requests)
+            if name.endswith("collection"):
+                created_collections += ids
+                if name == "delete_collection":
+                    for collection_id in ids:
+                        await new_todos(children, collection_id)
+            result = await measure(ids, call, collection_service if name.endswith("collection") else todo_service)
+            print(f"{name:>18} {label:>15} {result['p50']:>6.2f}ms {result['p95']:>6.2f}ms {result['statements']:>11}")
+            if name == "update_todo":
+                await measure(ids, operations["delete_todo"][0], TodoService)
+    async with AsyncSessionLocal() as session:
+        for collection_id in created_collections:
+            await TodoCollectionService(session).delete_collection(collection_id)
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--children", type=int, default=50, help="todos in each collection deleted by delete_collection")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.children))
+
+
+if __name__ == "__main__":
+    main()
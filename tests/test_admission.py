@@ -0,0 +1,152 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from app.api.v1.chatbot import route
+from app.api.v1.chatbot.admission import AdmissionController, AdmissionRejected, RateLimiter, rate_limit_keys
+from app.modules.agents.limits import ProviderLimit, ProviderLimits
+
+app = FastAPI()
+app.include_router(route.va_router)
+
+
+def test_enter_admits_then_queues_then_rejects():
+    controller = AdmissionController(max_active=1, max_queued=2, queue_timeout=5)
+    running, first, second = controller.enter(), controller.enter(), controller.enter()
+    assert (running.position, first.position, second.position) == (0, 1, 2)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.enter()
+    assert rejected.value.status_code == 503 and rejected.value.retry_after >= 1
+
+    running.release()
+    assert (first.admitted, first.position, second.position) == (True, 0, 1)
+    stats = controller.stats()
+    assert (stats["active"], stats["queued_now"], stats["rejected"]) == (1, 1, 1)
+
+
+def test_queued_ticket_reports_its_position_until_admitted():
+    async def main():
+        controller = AdmissionController(max_active=1, max_queued=5, queue_timeout=5)
+        running, ahead, ticket = controller.enter(), controller.enter(), controller.enter()
+
+        async def free_slots():
+            for holder in (running, ahead):
+                await asyncio.sleep(0.05)
+                holder.release()
+
+        releaser = asyncio.create_task(free_slots())
+        positions = [position async for position in ticket.wait()]
+        await releaser
+        return positions, ticket.admitted
+
+    assert asyncio.run(main()) == ([2, 1], True)
+
+
+def test_rate_limiter_has_a_bucket_per_client_and_conversation():
+    limiter = RateLimiter(per_minute=6, burst=2)
+    alice = rate_limit_keys("10.0.0.1", "thread-1")
+    assert limiter.acquire(alice) == 0 and limiter.acquire(alice) == 0
+    # the burst is used up; a token comes back every 10 seconds
+    assert 9 < limiter.acquire(alice) <= 10
+
+    # another client resuming the same conversation draws from its empty bucket too
+    assert limiter.acquire(rate_limit_keys("10.0.0.2", "thread-1")) > 0
+    # a new conversation from another client is not limited; neither is a request without a thread
+    assert limiter.acquire(rate_limit_keys("10.0.0.2", "thread-2")) == 0
+    assert limiter.acquire(rate_limit_keys("10.0.0.3", None)) == 0
+    assert (limiter.allowed, limiter.limited) == (4, 2)
+
+    assert RateLimiter(per_minute=0, burst=1).acquire(alice) == 0
+
+
+def get(path: str) -> httpx.Response:
+    async def main():
+        transport = httpx.ASGITransport(app=app, client=("10.0.0.1", 1234))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path)
+
+    return asyncio.run(main())
+
+
+def test_rate_limited_request_gets_429_with_retry_after(monkeypatch):
+    limiter = RateLimiter(per_minute=60, burst=1)
+    monkeypatch.setattr(route, "chat_rate_limiter", limiter)
+    limiter.acquire(rate_limit_keys("10.0.0.1", "thread-1"))
+
+    response = get("/hello?checkpoint_id=thread-1")
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_request_beyond_the_queue_gets_503(monkeypatch):
+    controller = AdmissionController(max_active=1, max_queued=0, queue_timeout=5)
+    monkeypatch.setattr(route, "chat_rate_limiter", RateLimiter(per_minute=0, burst=1))
+    monkeypatch.setattr(route, "admission", controller)
+    controller.enter()
+
+    response = get("/hello")
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_client_leaving_before_the_stream_starts_releases_its_ticket(monkeypatch):
+    controller = AdmissionController(max_active=1, max_queued=5, queue_timeout=5)
+    monkeypatch.setattr(route, "chat_rate_limiter", RateLimiter(per_minute=0, burst=1))
+    monkeypatch.setattr(route, "admission", controller)
+    sent = []
+
+    async def main():
+        scope = {
+            "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/hello", "raw_path": b"/hello", "root_path": "",
+            "query_string": b"", "headers": [], "client": ("10.0.0.1", 1234), "server": ("test", 80),
+        }
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            # a slow socket: the client is gone before the response has even started
+            await asyncio.sleep(0.1)
+            sent.append(message["type"])
+
+        await app(scope, receive, send)
+
+    asyncio.run(main())
+
+    assert sent == []  # the stream never started
+    assert controller.stats()["active"] == 0
+
+
+def test_provider_limit_caps_concurrent_slots():
+    limit = ProviderLimit("gemini", 2)
+    in_flight = []
+
+    async def call():
+        async with limit.slot():
+            in_flight.append(limit.in_use)
+            await asyncio.sleep(0.05)
+
+    async def main():
+        await asyncio.gather(*(call() for _ in range(5)))
+
+    asyncio.run(main())
+
+    assert max(in_flight) == 2
+    stats = limit.stats()
+    assert (stats["requests"], stats["in_use"], stats["waiting"]) == (5, 0, 0)
+    assert stats["max_waiting"] >= 3 and stats["max_wait_ms"] > 0
+
+
+def test_provider_limits_of_zero_are_unlimited():
+    limits = ProviderLimits({"groq": 0})
+
+    async def main():
+        async with limits.slot("groq"), limits.slot("groq"), limits.slot("groq"):
+            return limits.stats()["groq"]["in_use"]
+
+    assert asyncio.run(main()) == 3
+    assert limits.stats()["groq"]["requests"] == 3
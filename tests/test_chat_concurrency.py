@@ -0,0 +1,85 @@
+import asyncio
+import time
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
+from app.api.v1.chatbot.service import VAServices
+from app.core.config import settings
+from app.modules.agents import agents
+from app.modules.agents.llms import model_registry
+from app.modules.agents.registry import subagents
+
+# how long the stand-in supervisor model takes to route one turn
+MODEL_LATENCY = 0.2
+STREAMS = 8
+
+
+def slow_supervisor() -> RunnableLambda:
+    """A structured-output runnable answering after MODEL_LATENCY; invoke() blocks, ainvoke() awaits."""
+    def route() -> agents.VAModel:
+        return agents.VAModel.model_construct(next="research_agent", reason="needs research")
+
+    def invoke(messages):
+        time.sleep(MODEL_LATENCY)
+        return route()
+
+    async def ainvoke(messages):
+        await asyncio.sleep(MODEL_LATENCY)
+        return route()
+
+    return RunnableLambda(invoke, afunc=ainvoke)
+
+
+async def timed_routes(count: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        agents.va_agent({"messages": [HumanMessage(content=f"question {i}")]}) for i in range(count)
+    ))
+    return time.perf_counter() - start
+
+
+def test_concurrent_supervisor_calls_do_not_serialize(monkeypatch):
+    monkeypatch.setattr(agents, "supervisor_llm", slow_supervisor())
+
+    async def main():
+        single = await timed_routes(1)
+        concurrent = await timed_routes(STREAMS)
+        return single, concurrent
+
+    single, concurrent = asyncio.run(main())
+    # a blocking call would take STREAMS times as long
+    assert concurrent < 2 * single
+
+
+async def run_turn(service: VAServices, message: str) -> str:
+    content = []
+    async for event, payload in service.chat_events(message):
+        if event == "content":
+            content.append(payload)
+    return "".join(content)
+
+
+async def timed_turns(count: int) -> float:
+    service = VAServices()
+    start = time.perf_counter()
+    answers = await asyncio.gather(*(run_turn(service, f"question {i}") for i in range(count)))
+    assert all(answers)
+    return time.perf_counter() - start
+
+
+def test_concurrent_chat_streams_do_not_serialize(monkeypatch):
+    subagents.startup()
+    # the offline supervisor routes every turn to the research agent: two model calls per turn
+    for node in ("va_agent", "research_agent"):
+        monkeypatch.setattr(model_registry.get(node), "latency", MODEL_LATENCY)
+
+    async def main():
+        await timed_turns(1)  # warm-up: builds the sub-agents and compiles their graphs
+        single = await timed_turns(1)
+        # as many streams as the provider concurrency limit lets run at once
+        concurrent = await timed_turns(settings.GEMINI_MAX_CONCURRENCY)
+        return single, concurrent
+
+    single, concurrent = asyncio.run(main())
+    assert single >= 2 * MODEL_LATENCY
+    # serialized streams would take GEMINI_MAX_CONCURRENCY times as long
+    assert concurrent < 2 * single, f"{settings.GEMINI_MAX_CONCURRENCY} streams took {concurrent:.2f}s, one took {single:.2f}s"
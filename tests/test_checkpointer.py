@@ -0,0 +1,60 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import List
+from langgraph.checkpoint.base import empty_checkpoint
+from app.modules.agents.checkpointer import PostgresCheckpointSaver
+
+
+class StubResult:
+    def first(self):
+        return None
+
+
+class StubConnection:
+    def __init__(self, log: List[str]):
+        self.log = log
+
+    async def execute(self, stmt, params=None):
+        # the flush executes multi-row inserts with parameters, reads execute bare selects
+        self.log.append("write" if params is not None else "read")
+        return StubResult()
+
+
+class StubEngine:
+    """Logs the statements run through it; a flush's transaction commits only once `release` is set."""
+
+    def __init__(self):
+        self.log: List[str] = []
+        self.release = asyncio.Event()
+
+    @asynccontextmanager
+    async def begin(self):
+        yield StubConnection(self.log)
+        await self.release.wait()
+        self.log.append("commit")
+
+    @asynccontextmanager
+    async def connect(self):
+        yield StubConnection(self.log)
+
+
+def test_read_waits_for_the_flush_of_its_thread():
+    async def main():
+        engine = StubEngine()
+        saver = PostgresCheckpointSaver(engine, max_pending=1000)
+        config = {"configurable": {"thread_id": "t1", "checkpoint_ns": ""}}
+        await saver.aput(config, empty_checkpoint(), {}, {})
+
+        flush = asyncio.create_task(saver.aflush())
+        await asyncio.sleep(0.01)  # the flush has taken the rows off the buffer and not committed yet
+        read = asyncio.create_task(saver.aget_tuple(config))
+        await asyncio.sleep(0.01)
+        assert "read" not in engine.log
+
+        engine.release.set()
+        await flush
+        assert await read is None
+        return engine.log
+
+    log = asyncio.run(main())
+    assert log.index("commit") < log.index("read")
@@ -0,0 +1,52 @@
+import asyncio
+from typing import List
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.v1.todos.models import Todo
+from app.core.database import async_get_db, engine
+
+app = FastAPI()
+
+
+@app.get("/no-query")
+async def no_query(db: AsyncSession = Depends(async_get_db)):
+    # e.g. a record cache hit: the session is injected but never used
+    return {"ok": True}
+
+
+@app.get("/query")
+async def query(db: AsyncSession = Depends(async_get_db)):
+    await db.execute(select(Todo.id).limit(1))
+    return {"ok": True}
+
+
+def checkouts_during(path: str) -> int:
+    """Connections checked out of the primary's pool while serving `path`."""
+    log: List[None] = []
+
+    def on_checkout(*args):
+        log.append(None)
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(path, headers={"X-Thread-Id": "thread-1"})
+        assert response.status_code == 200
+        await engine.dispose()
+
+    event.listen(engine.sync_engine, "checkout", on_checkout)
+    try:
+        asyncio.run(main())
+    finally:
+        event.remove(engine.sync_engine, "checkout", on_checkout)
+    return len(log)
+
+
+def test_route_that_never_queries_opens_no_connection():
+    assert checkouts_during("/no-query") == 0
+
+
+def test_route_that_queries_checks_out_one_connection(database):
+    assert checkouts_during("/query") == 1
@@ -0,0 +1,83 @@
+import time
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import create_checkpoint, empty_checkpoint
+from app.core.config import settings
+from app.modules.agents.history import compact_messages, history_removals
+from app.modules.agents.memory import BoundedMemorySaver
+
+
+def save(saver: BoundedMemorySaver, thread_id: str, text: str = "x" * 1000) -> None:
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"messages": text}
+    checkpoint["channel_versions"] = {"messages": 1}
+    saver.put(config, create_checkpoint(checkpoint, None, 1), {}, {"messages": 1})
+
+
+def read(saver: BoundedMemorySaver, thread_id: str):
+    return saver.get_tuple({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}})
+
+
+def test_over_budget_store_evicts_least_recently_used_thread():
+    saver = BoundedMemorySaver(max_bytes=10**9, ttl_seconds=3600)
+    for thread_id in ("a", "b", "c"):
+        save(saver, thread_id)
+    assert read(saver, "a") is not None  # "b" is now the least recently used
+    # room for exactly the three threads stored so far
+    saver.max_bytes = saver.total_bytes
+
+    save(saver, "d")
+
+    assert read(saver, "b") is None
+    assert all(read(saver, thread_id) is not None for thread_id in ("a", "c", "d"))
+    assert saver.stats()["threads"] == 3 and saver.evictions == 1
+    assert saver.total_bytes <= saver.max_bytes
+
+
+def test_expired_thread_is_dropped():
+    saver = BoundedMemorySaver(max_bytes=10**9, ttl_seconds=0.05)
+    save(saver, "idle")
+    time.sleep(0.1)
+
+    save(saver, "active")
+
+    assert read(saver, "idle") is None
+    assert read(saver, "active") is not None
+    assert saver.stats()["threads"] == 1 and saver.evictions == 1
+
+
+def conversation() -> list:
+    """Three turns, each a user question, a supervisor routing note and an answer; then a new question."""
+    messages = []
+    for turn in range(3):
+        messages += [
+            HumanMessage(content=f"question {turn}", id=f"q{turn}"),
+            HumanMessage(content=f"route {turn} to research", name="va_agent", id=f"r{turn}"),
+            AIMessage(content=f"answer {turn}", id=f"a{turn}"),
+        ]
+    messages.append(HumanMessage(content="question 3", id="q3"))
+    return messages
+
+
+def test_compact_messages_drops_old_routing_notes_and_keeps_latest_turn(monkeypatch):
+    messages = conversation()
+    assert [m.id for m in compact_messages(messages)] == ["q0", "a0", "q1", "a1", "q2", "a2", "q3"]
+
+    # a budget far too small for the history still keeps the current user turn
+    monkeypatch.setattr(settings, "HISTORY_MAX_TOKENS", 1)
+    assert [m.id for m in compact_messages(messages)] == ["q3"]
+
+
+def test_history_removals_drop_messages_before_the_window(monkeypatch):
+    monkeypatch.setattr(settings, "HISTORY_MAX_MESSAGES", 4)
+    removed = {removal.id for removal in history_removals(conversation())}
+    # the last four messages stay, except the earlier turn's routing note
+    assert removed == {"q0", "r0", "a0", "q1", "r1", "a1", "r2"}
+
+
+def test_history_removals_never_cut_into_the_latest_turn(monkeypatch):
+    monkeypatch.setattr(settings, "HISTORY_MAX_MESSAGES", 1)
+    messages = conversation() + [HumanMessage(content="routing", name="va_agent", id="r3")]
+    removed = {removal.id for removal in history_removals(messages)}
+    assert "q3" not in removed and "r3" not in removed
+    assert "a2" in removed
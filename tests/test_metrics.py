@@ -0,0 +1,57 @@
+import asyncio
+import re
+import httpx
+import pytest
+from app.api.v1.chatbot.service import VAServices
+from app.core.logs import logging_system
+from app.modules.agents.registry import subagents
+
+
+@pytest.fixture
+def app():
+    # importing the app starts its log listener; stop it again after the test
+    from app.main import app
+    yield app
+    logging_system.shutdown()
+
+
+def series(text: str, name: str, **labels: str) -> list:
+    """The exposition lines of `name` whose labels include `labels`."""
+    pattern = re.compile(rf"^{name}\{{(?P<labels>[^}}]*)\}} (?P<value>\S+)$")
+    lines = []
+    for line in text.splitlines():
+        match = pattern.match(line)
+        if match and all(f'{key}="{value}"' in match["labels"] for key, value in labels.items()):
+            lines.append((match["labels"], float(match["value"])))
+    return lines
+
+
+def test_metrics_expose_node_and_model_histograms(app):
+    subagents.startup()
+
+    async def main():
+        async for _ in VAServices().chat_events("what is the weather in Paris"):
+            pass
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/metrics")
+
+    response = asyncio.run(main())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+
+    # the offline supervisor routes the turn to the research agent
+    for name, labels in (
+        ("va_graph_node_duration_seconds", {"node": "va_agent"}),
+        ("va_graph_node_duration_seconds", {"node": "research_agent"}),
+        ("va_llm_duration_seconds", {"node": "research_agent", "model": "fake:0"}),
+    ):
+        assert f"# TYPE {name} histogram" in text
+        buckets = series(text, f"{name}_bucket", **labels)
+        (_, count), = series(text, f"{name}_count", **labels)
+        (_, total), = series(text, f"{name}_sum", **labels)
+        assert count >= 1 and total > 0
+        # cumulative buckets, ending in +Inf with the total count
+        assert [value for _, value in buckets] == sorted(value for _, value in buckets)
+        assert buckets[-1] == (buckets[-1][0], count) and 'le="+Inf"' in buckets[-1][0]
@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from uuid import UUID
+from sqlalchemy import delete
+from app.api.v1.todos.models import Todo, TodoCollection, TodoStatus
+from app.api.v1.todos.services import TodoService
+from app.core.database import AsyncSessionLocal, engine
+
+PAGE_SIZE = 4
+
+
+async def walk(service: TodoService, **filters) -> List:
+    """Every item of every page, following next_cursor to the end."""
+    items, cursor = [], None
+    while True:
+        page = await service.get_all_todos(limit=PAGE_SIZE, cursor=cursor, **filters)
+        assert len(page.items) <= PAGE_SIZE
+        items += page.items
+        cursor = page.next_cursor
+        if cursor is None:
+            return items
+
+
+def test_keyset_pages_cover_every_row_once(database):
+    # most rows share one created_at, so only the id tells them apart
+    created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    async def main():
+        async with AsyncSessionLocal() as session:
+            collections = [TodoCollection(name="paging"), TodoCollection(name="other")]
+            session.add_all(collections)
+            await session.flush()
+            todos = [
+                Todo(
+                    title=f"todo {i}",
+                    status=TodoStatus.PENDING if i % 3 else TodoStatus.COMPLETED,
+                    collection_id=collections[0].id,
+                    created_at=created_at if i < 13 else created_at - timedelta(seconds=i),
+                )
+                for i in range(19)
+            ]
+            # same timestamp, different collection: must not leak into the filtered pages
+            todos.append(Todo(title="elsewhere", collection_id=collections[1].id, created_at=created_at))
+            session.add_all(todos)
+            await session.commit()
+            collection_id: UUID = collections[0].id
+            try:
+                service = TodoService(session)
+                every = await walk(service, collection_id=collection_id)
+                pending = await walk(service, collection_id=collection_id, status=TodoStatus.PENDING)
+            finally:
+                await session.execute(delete(TodoCollection).where(TodoCollection.id.in_([c.id for c in collections])))
+                await session.commit()
+        await engine.dispose()
+        return todos[:19], every, pending
+
+    todos, every, pending = asyncio.run(main())
+
+    def expected(status: Optional[TodoStatus] = None) -> List[UUID]:
+        rows = [todo for todo in todos if status is None or todo.status == status]
+        return [todo.id for todo in sorted(rows, key=lambda todo: (todo.created_at, todo.id), reverse=True)]
+
+    assert [item.id for item in every] == expected()
+    assert [item.id for item in pending] == expected(TodoStatus.PENDING)
+    assert all(item.status == TodoStatus.PENDING for item in pending)
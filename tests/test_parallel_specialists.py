@@ -0,0 +1,43 @@
+import asyncio
+import time
+from uuid import uuid4
+from langchain_core.messages import HumanMessage
+from app.modules.agents.VA_graph import graph
+from app.modules.agents.llms import model_registry
+from app.modules.agents.registry import subagents
+
+# fake model latency of each specialist's single model call
+LATENCY = {"research_agent": 0.3, "todo_agent": 0.2}
+
+
+async def run_turn(message: str):
+    config = {"configurable": {"thread_id": str(uuid4())}}
+    start = time.perf_counter()
+    state = await graph.ainvoke({"messages": [HumanMessage(content=message)]}, config)
+    return state, time.perf_counter() - start
+
+
+def test_multi_target_plan_runs_specialists_in_parallel(monkeypatch):
+    subagents.startup()
+    # the supervisor plans both specialists for the turn
+    monkeypatch.setattr(
+        model_registry.get("va_agent"), "structured_output",
+        {"next": ["research_agent", "todo_agent"], "reason": "research and todo parts"},
+    )
+    for node, latency in LATENCY.items():
+        model = model_registry.get(node)
+        monkeypatch.setattr(model, "latency", latency)
+        monkeypatch.setattr(model, "reply", f"answer from {node}")
+
+    async def main():
+        await run_turn("warm-up")  # compiles the sub-agents' graphs
+        return await run_turn("look up the weather in Paris and add an umbrella to my todo list")
+
+    state, elapsed = asyncio.run(main())
+
+    # merge_agent added both branches' answers, in a fixed order
+    merged = [(message.name, message.content) for message in state["messages"] if message.name in LATENCY]
+    assert merged == [("research_agent", "answer from research_agent"), ("todo_agent", "answer from todo_agent")]
+    assert state["results"] == {}
+    # run one after the other, the branches would take at least 0.5 s
+    assert max(LATENCY.values()) <= elapsed < sum(LATENCY.values()) - 0.1
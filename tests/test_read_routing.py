@@ -0,0 +1,81 @@
+import asyncio
+import os
+from typing import List, Tuple
+from uuid import uuid4
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.api.v1.todos.models import Todo
+from app.api.v1.todos.schemas import TodoCreate
+from app.api.v1.todos.services import TodoService
+from app.core import database as app_database
+from app.core.database import AsyncSessionLocal, StickyWrites, publish_writes, set_consistency_key
+
+
+@pytest.fixture
+def replica(database, monkeypatch):
+    """A second engine on the test database standing in for the replica; yields the (engine, statement) log."""
+    log: List[Tuple[str, str]] = []
+    replica_engine = create_async_engine(os.environ["POSTGRES_URL"])
+    monkeypatch.setattr(app_database, "read_engine", replica_engine)
+    listeners = [
+        (engine.sync_engine, lambda *args, name=name: log.append((name, args[2].split()[0])))
+        for name, engine in (("primary", app_database.engine), ("replica", replica_engine))
+    ]
+    for sync_engine, listener in listeners:
+        event.listen(sync_engine, "before_cursor_execute", listener)
+    yield log
+    for sync_engine, listener in listeners:
+        event.remove(sync_engine, "before_cursor_execute", listener)
+    asyncio.run(replica_engine.dispose())
+
+
+def test_reads_go_to_the_replica_and_writes_to_the_primary(replica):
+    thread, other_thread = f"thread-{uuid4()}", f"thread-{uuid4()}"
+
+    async def session_for(key):
+        session = AsyncSessionLocal()
+        await set_consistency_key(session, key)
+        return session
+
+    async def main():
+        try:
+            async with await session_for(thread) as session:
+                await session.execute(select(Todo).limit(1))
+                assert replica[-1] == ("replica", "SELECT")
+
+                todo = await TodoService(session).create_todo(TodoCreate(title="routing"))
+                assert ("primary", "INSERT") in replica
+                await publish_writes(session)
+
+                replica.clear()
+                await session.execute(select(Todo).limit(1))
+                assert replica == [("primary", "SELECT")]
+
+            # the thread's next request reads its own write from the primary, other threads do not
+            for key, expected in ((thread, "primary"), (other_thread, "replica"), (None, "replica")):
+                async with await session_for(key) as session:
+                    replica.clear()
+                    await session.execute(select(Todo).where(Todo.id == todo.id))
+                    assert replica == [(expected, "SELECT")], key
+
+            async with AsyncSessionLocal() as session:
+                assert await TodoService(session).delete_todo(todo.id)
+        finally:
+            await app_database.engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_write_marks_are_shared_between_workers(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(app_database.aioredis, "from_url", lambda url: fakeredis.FakeAsyncRedis(server=server))
+    worker_a, worker_b = (StickyWrites(window_seconds=5, redis_url="redis://fake") for _ in range(2))
+
+    async def main():
+        worker_a.mark("thread-1")
+        await worker_a.publish("thread-1")
+        return await worker_b.aactive("thread-1"), await worker_b.aactive("thread-2")
+
+    assert asyncio.run(main()) == (True, False)
@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from app.api.v1.todos import cache as cache_module
+from app.api.v1.todos.cache import RecordCache, record_cache
+from app.core.config import settings
+
+
+def test_local_tier_is_short_lived_without_redis():
+    assert record_cache.local_ttl_seconds == min(settings.RECORD_CACHE_LOCAL_TTL_SECONDS, settings.RECORD_CACHE_TTL_SECONDS)
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    """Two workers' caches sharing one in-memory Redis."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # runs the version check script
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(cache_module.aioredis, "from_url", lambda url: fakeredis.FakeAsyncRedis(server=server))
+    return [RecordCache(ttl_seconds=300, max_entries=16, redis_url="redis://fake", local_ttl_seconds=5) for _ in range(2)]
+
+
+def test_fill_is_shared_through_redis(workers):
+    a, b = workers
+
+    async def main():
+        token = await a.fill_token("todo:1")
+        await a.set("todo:1", b"v1", token)
+        return await b.get("todo:1")
+
+    assert asyncio.run(main()) == b"v1"
+
+
+def test_stale_fill_is_not_written_after_another_workers_invalidation(workers):
+    a, b = workers
+
+    async def main():
+        token = await a.fill_token("todo:1")  # a loads the old record...
+        await b.invalidate(["todo:1"])        # ...while b changes it
+        await a.set("todo:1", b"old", token)
+        return await b.get("todo:1")
+
+    assert asyncio.run(main()) is None
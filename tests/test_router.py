@@ -0,0 +1,48 @@
+from langchain_core.messages import AIMessage, HumanMessage
+from app.core.config import settings
+from app.modules.agents import router
+from app.modules.agents.router import RouterStats, classify, pre_router
+
+TODO_MESSAGE = "add buy milk to my grocery list"
+RESEARCH_MESSAGE = "search for the latest news about electric cars"
+# "my list" hints at todos and a leading "how" at research: no route clearly dominates
+AMBIGUOUS_MESSAGE = "how do I check my list"
+
+
+def test_classify_todo_intent():
+    label, confidence = classify(TODO_MESSAGE)
+    assert label == "todo_agent"
+    assert confidence >= settings.FAST_ROUTER_MIN_CONFIDENCE
+
+
+def test_classify_research_intent():
+    label, confidence = classify(RESEARCH_MESSAGE)
+    assert label == "research_agent"
+    assert confidence >= settings.FAST_ROUTER_MIN_CONFIDENCE
+
+
+def test_classify_ambiguous_or_unmatched_text():
+    assert classify(AMBIGUOUS_MESSAGE)[0] is None
+    assert classify("hello there") == (None, 0.0)
+
+
+def test_pre_router_skips_the_supervisor_only_for_clear_intents(monkeypatch):
+    monkeypatch.setattr(settings, "FAST_ROUTER_ENABLED", True)
+    stats = RouterStats()
+    monkeypatch.setattr(router, "router_stats", stats)
+
+    def route(text: str) -> str:
+        # the latest user turn decides, not the earlier ones
+        state = {"messages": [HumanMessage(content=TODO_MESSAGE), AIMessage(content="Done."), HumanMessage(content=text)]}
+        return pre_router(state).goto
+
+    assert route(TODO_MESSAGE) == "todo_agent"
+    assert route(RESEARCH_MESSAGE) == "research_agent"
+    assert route(AMBIGUOUS_MESSAGE) == "va_agent"
+    snapshot = stats.snapshot()
+    assert (snapshot["total"], snapshot["hits"], snapshot["fallbacks"]) == (3, 2, 1)
+
+
+def test_pre_router_falls_back_to_the_supervisor_when_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "FAST_ROUTER_ENABLED", False)
+    assert pre_router({"messages": [HumanMessage(content=TODO_MESSAGE)]}).goto == "va_agent"
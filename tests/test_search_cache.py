@@ -0,0 +1,86 @@
+import asyncio
+import time
+from typing import Any, Dict
+from app.modules.agents.search import CachedSearchTool, FakeSearchTool, SearchCache
+
+
+class FailingSearchTool(FakeSearchTool):
+    """Answers every search with an error payload, as Tavily does for a rejected query."""
+
+    def _results(self, query: str) -> Dict[str, Any]:
+        self.calls += 1
+        return {"error": f"search failed for {query}"}
+
+
+def cached_tool(tool: FakeSearchTool, **cache_options) -> CachedSearchTool:
+    options = {"ttl_seconds": 60, "max_entries": 100, **cache_options}
+    return CachedSearchTool(tool=tool, cache=SearchCache(**options))
+
+
+def search(tool: CachedSearchTool, *queries: str) -> list:
+    async def main():
+        return await asyncio.gather(*(tool.ainvoke({"query": query}) for query in queries))
+
+    return asyncio.run(main())
+
+
+def test_concurrent_identical_searches_make_one_upstream_call():
+    fake = FakeSearchTool(latency=0.1)
+    tool = cached_tool(fake)
+
+    results = search(tool, *["latest ai news"] * 5)
+
+    assert fake.calls == 1
+    assert all(result == results[0] for result in results)
+    stats = tool.cache.stats()
+    assert (stats["misses"], stats["coalesced"]) == (1, 4)
+
+
+def test_case_and_whitespace_variants_share_a_key():
+    fake = FakeSearchTool()
+    tool = cached_tool(fake)
+
+    search(tool, "Latest AI news")
+    search(tool, "  latest   ai NEWS? ")
+
+    assert fake.calls == 1
+    assert tool.cache.stats()["hits"] == 1
+
+
+def test_entries_expire_after_the_ttl():
+    fake = FakeSearchTool()
+    tool = cached_tool(fake, ttl_seconds=0.05)
+
+    search(tool, "weather in paris")
+    time.sleep(0.1)
+    search(tool, "weather in paris")
+
+    assert fake.calls == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    fake = FakeSearchTool()
+    tool = cached_tool(fake, max_entries=2)
+
+    search(tool, "first")
+    search(tool, "second")
+    search(tool, "first")  # "second" is now the least recently used
+    search(tool, "third")
+    assert fake.calls == 3
+
+    search(tool, "first")
+    assert fake.calls == 3
+    search(tool, "second")
+    assert fake.calls == 4
+
+
+def test_error_results_are_not_cached():
+    failing = FailingSearchTool()
+    tool = cached_tool(failing)
+
+    first, = search(tool, "broken query")
+    search(tool, "broken query")
+
+    assert "error" in first
+    assert failing.calls == 2
+    assert tool.cache.stats()["entries"] == 0
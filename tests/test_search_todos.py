@@ -0,0 +1,94 @@
+import asyncio
+from typing import Awaitable, Callable, List
+from uuid import UUID
+import pytest
+from sqlalchemy import delete, text
+from app.api.v1.todos.models import Todo, TodoCollection
+from app.api.v1.todos.services import TodoService
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+
+GROCERY_TODOS = 7
+
+
+def with_seeded_todos(search: Callable[[TodoService, UUID], Awaitable]):
+    """Runs `search(service, collection_id)` against a collection of known todos, deleted again afterwards."""
+    async def main():
+        try:
+            async with AsyncSessionLocal() as session:
+                collection = TodoCollection(name="search")
+                session.add(collection)
+                await session.flush()
+                collection_id = collection.id
+                session.add_all(
+                    [
+                        Todo(title="Call the office", description="ask about the quarterly invoice", collection_id=collection_id),
+                        Todo(title="Schedule dentist appointment", collection_id=collection_id),
+                    ]
+                    + [Todo(title="Buy groceries", collection_id=collection_id) for _ in range(GROCERY_TODOS)]
+                )
+                await session.commit()
+                try:
+                    return await search(TodoService(session), collection_id)
+                finally:
+                    await session.rollback()
+                    await session.execute(delete(TodoCollection).where(TodoCollection.id == collection_id))
+                    await session.commit()
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def trigram(database) -> bool:
+    """Whether the pg_trgm extension behind fuzzy title matching is installed."""
+    async def installed() -> bool:
+        async with engine.connect() as conn:
+            found = await conn.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+        await engine.dispose()
+        return found is not None
+
+    return asyncio.run(installed())
+
+
+def test_search_matches_the_description(trigram, monkeypatch):
+    monkeypatch.setattr(settings, "TODO_SEARCH_FUZZY", trigram)
+    page = with_seeded_todos(lambda service, collection_id: service.search_todos("invoice", collection_id=collection_id))
+    assert [item.title for item in page.items] == ["Call the office"]
+
+
+def test_search_matches_a_misspelled_title(trigram):
+    if not trigram:
+        pytest.skip("needs the pg_trgm extension")
+    # a typo, matched on the title by trigram similarity only
+    page = with_seeded_todos(lambda service, collection_id: service.search_todos("dentsit", collection_id=collection_id))
+    assert [item.title for item in page.items] == ["Schedule dentist appointment"]
+
+
+def test_search_pages_are_stable_across_equal_scores(trigram, monkeypatch):
+    monkeypatch.setattr(settings, "TODO_SEARCH_FUZZY", trigram)
+
+    async def search(service: TodoService, collection_id: UUID):
+        async def page(cursor=None):
+            return await service.search_todos("groceries", limit=3, cursor=cursor, collection_id=collection_id)
+
+        first = await page()
+        second, second_again = await page(first.next_cursor), await page(first.next_cursor)
+        pages: List[List[UUID]] = []
+        cursor = None
+        while True:
+            current = await page(cursor)
+            pages.append([item.id for item in current.items])
+            cursor = current.next_cursor
+            if cursor is None:
+                return first, second, second_again, pages
+
+    first, second, second_again, pages = with_seeded_todos(search)
+
+    # every grocery todo scores the same, so only the id orders them
+    assert len(first.items) == 3 and first.next_cursor is not None
+    assert [item.id for item in second.items] == [item.id for item in second_again.items]
+    assert not {item.id for item in first.items} & {item.id for item in second.items}
+    found = [todo_id for page in pages for todo_id in page]
+    assert len(found) == len(set(found)) == GROCERY_TODOS
@@ -0,0 +1,29 @@
+import asyncio
+from langchain_core.messages import AIMessage, HumanMessage
+from app.modules.agents.semantic_cache import SemanticCache
+
+
+def cached(cache: SemanticCache, messages, answer: str) -> str:
+    async def call():
+        return answer
+
+    return asyncio.run(cache.acached("enhancer_agent", "prompt", messages, call))
+
+
+def test_results_are_only_reused_after_the_same_history():
+    cache = SemanticCache(max_entries=16, ttl_seconds=60, enabled_nodes={"enhancer_agent": 0.9})
+    question = HumanMessage(content="plan my week")
+    thread_a = [HumanMessage(content="I work nights"), AIMessage(content="Noted."), question]
+    thread_b = [HumanMessage(content="I have three kids"), AIMessage(content="Noted."), question]
+
+    assert cached(cache, thread_a, "night shifts plan") == "night shifts plan"
+    assert cached(cache, thread_b, "family plan") == "family plan"
+    assert cached(cache, list(thread_a), "fresh call") == "night shifts plan"
+    assert cache.hits == {"enhancer_agent": 1}
+
+
+def test_nodes_are_not_cached_unless_listed():
+    cache = SemanticCache(max_entries=16, ttl_seconds=60, enabled_nodes={})
+    messages = [HumanMessage(content="plan my week")]
+    assert cached(cache, messages, "first") == "first"
+    assert cached(cache, messages, "second") == "second"
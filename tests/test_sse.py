@@ -0,0 +1,83 @@
+import asyncio
+import json
+from typing import AsyncIterator, List
+from app.api.v1.chatbot.sse import ChatEvent, SSEEncoder, StreamStats, encode_stream
+
+
+class SlowSource:
+    """Sends one token, then stays silent for `silence` seconds before finishing; records a cancellation."""
+
+    def __init__(self, silence: float):
+        self.silence = silence
+        self.cancelled = False
+
+    async def events(self) -> AsyncIterator[ChatEvent]:
+        try:
+            yield "content", "hello"
+            await asyncio.sleep(self.silence)
+            yield "content", "world"
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+def event_type(frame: bytes) -> str:
+    if frame.startswith(b":"):
+        return "heartbeat"
+    return json.loads(frame[len(b"data: "):])["type"]
+
+
+async def collect(stream: AsyncIterator[bytes]) -> List[bytes]:
+    return [frame async for frame in stream]
+
+
+def test_disconnect_cancels_the_source_and_counts_an_abort():
+    source = SlowSource(silence=10)
+    stats = StreamStats()
+    gone = asyncio.Event()
+
+    async def main():
+        frames = []
+        async for frame in encode_stream(source.events(), SSEEncoder(), disconnected=gone.wait, stats=stats):
+            frames.append(frame)
+            gone.set()  # the client leaves after the first frame
+        await asyncio.sleep(0)  # let the cancelled source run its handler
+        return frames
+
+    frames = asyncio.run(asyncio.wait_for(main(), 5))
+
+    assert [event_type(frame) for frame in frames] == ["content"]
+    assert source.cancelled
+    snapshot = stats.snapshot()
+    assert (snapshot["aborted"], snapshot["disconnects"], snapshot["runs_cancelled"]) == (1, 1, 1)
+    assert (snapshot["completed"], snapshot["active"]) == (0, 0)
+
+
+def test_idle_timeout_ends_the_stream_with_an_error():
+    source = SlowSource(silence=10)
+    stats = StreamStats()
+
+    async def main():
+        frames = await collect(encode_stream(source.events(), SSEEncoder(), idle_timeout_seconds=0.1, stats=stats))
+        await asyncio.sleep(0)
+        return frames
+
+    frames = asyncio.run(asyncio.wait_for(main(), 5))
+
+    assert [event_type(frame) for frame in frames] == ["content", "error", "end"]
+    assert source.cancelled
+    snapshot = stats.snapshot()
+    assert (snapshot["aborted"], snapshot["idle_timeouts"], snapshot["runs_cancelled"]) == (1, 1, 1)
+
+
+def test_heartbeats_are_sent_while_the_source_is_silent():
+    source = SlowSource(silence=0.35)
+    stats = StreamStats()
+
+    frames = asyncio.run(collect(encode_stream(source.events(), SSEEncoder(), heartbeat_seconds=0.1, stats=stats)))
+
+    types = [event_type(frame) for frame in frames]
+    assert types[0] == "content" and types[-1] == "content"
+    assert 2 <= types.count("heartbeat") == stats.heartbeats
+    assert frames[1] == SSEEncoder().heartbeat_frame
+    assert not source.cancelled and stats.completed == 1
@@ -0,0 +1,48 @@
+import asyncio
+from uuid import uuid4
+import pytest
+from sqlalchemy.exc import IntegrityError
+from app.api.v1.todos.tools import TODO_TOOLS, todo_tool_session
+from app.core.database import engine
+
+TOOLS = {tool.name: tool for tool in TODO_TOOLS}
+
+
+def test_failed_tool_call_does_not_abort_the_turn_session(database):
+    async def main():
+        try:
+            async with todo_tool_session():
+                with pytest.raises(IntegrityError):
+                    await TOOLS["create_todo"].ainvoke({"title": "orphan", "collection_id": str(uuid4())})
+                # the model's retry in the same turn
+                todo = await TOOLS["create_todo"].ainvoke({"title": "retry"})
+                await TOOLS["delete_todo"].ainvoke({"todo_id": todo["id"]})
+            return todo
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(main())["title"] == "retry"
+
+
+def test_update_todo_clears_fields_passed_as_null(database):
+    async def main():
+        try:
+            async with todo_tool_session():
+                collection = await TOOLS["create_collection"].ainvoke({"name": "errands"})
+                todo = await TOOLS["create_todo"].ainvoke(
+                    {"title": "buy milk", "description": "two litres", "collection_id": collection["id"]}
+                )
+                # arguments left out keep their value
+                renamed = await TOOLS["update_todo"].ainvoke({"todo_id": todo["id"], "title": "buy oat milk"})
+                cleared = await TOOLS["update_todo"].ainvoke(
+                    {"todo_id": todo["id"], "description": None, "collection_id": None}
+                )
+                await TOOLS["delete_todo"].ainvoke({"todo_id": todo["id"]})
+                await TOOLS["delete_collection"].ainvoke({"collection_id": collection["id"]})
+            return collection, renamed, cleared
+        finally:
+            await engine.dispose()
+
+    collection, renamed, cleared = asyncio.run(main())
+    assert (renamed["title"], renamed["description"], renamed["collection_id"]) == ("buy oat milk", "two litres", collection["id"])
+    assert (cleared["title"], cleared["description"], cleared["collection_id"]) == ("buy oat milk", None, None)
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import time
+from typing import List
+from langchain_core.runnables import RunnableLambda
+from app.core.config import settings
+from app.modules.agents import limits, llms, transport
+from app.modules.agents.limits import LimitedChatGoogleGenerativeAI
+from app.modules.agents.llms import Hedger, build_chat_model
+from app.modules.agents.transport import HTTPTransport, PooledTavilySearchAPIWrapper
+
+GROQ_REPLY = {
+    "id": "stub", "object": "chat.completion", "created": 0, "model": "stub",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "hi"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}
+TAVILY_REPLY = {
+    "query": "stub", "results": [{"title": "t", "url": "https://example.com", "content": "c", "score": 1.0}],
+    "response_time": 0.0, "images": [], "answer": None, "follow_up_questions": None,
+}
+
+
+class StubServer:
+    """A keep-alive HTTP/1.1 server on localhost answering Groq and Tavily calls; counts connections and requests."""
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = 0
+        # seconds to wait before answering each request, in arrival order; 0 once used up
+        self.delays: List[float] = []
+
+    async def __aenter__(self) -> "StubServer":
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.url = "http://127.0.0.1:%d" % self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                head = (await reader.readuntil(b"\r\n\r\n")).decode().split("\r\n")
+                length = next((int(line.split(":")[1]) for line in head if line.lower().startswith("content-length:")), 0)
+                await reader.readexactly(length)
+                self.requests += 1
+                delay = self.delays.pop(0) if self.delays else 0
+                await asyncio.sleep(delay)
+                body = json.dumps(GROQ_REPLY if "chat/completions" in head[0] else TAVILY_REPLY).encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+
+def fresh_transport(monkeypatch) -> HTTPTransport:
+    # a client of its own: the process-wide one may be bound to another test's event loop
+    pooled = HTTPTransport(max_connections=10, max_keepalive_connections=10, keepalive_expiry=60, connect_timeout=5)
+    monkeypatch.setattr(transport, "http_transport", pooled)
+    monkeypatch.setattr(llms, "http_transport", pooled)
+    monkeypatch.setattr(limits, "http_transport", pooled)
+    return pooled
+
+
+def test_searches_reuse_one_pooled_connection(monkeypatch):
+    pooled = fresh_transport(monkeypatch)
+    wrapper = PooledTavilySearchAPIWrapper(tavily_api_key="test")
+
+    async def main():
+        async with StubServer() as stub:
+            monkeypatch.setattr(settings, "TAVILY_API_URL", stub.url)
+            for i in range(20):
+                results = await wrapper.raw_results_async(f"query {i}")
+                assert results["results"][0]["url"] == "https://example.com"
+            await pooled.aclose()
+            return stub.connections, stub.requests
+
+    assert asyncio.run(main()) == (1, 20)
+    assert pooled.requests == 20
+
+
+def test_groq_models_share_one_pooled_connection(monkeypatch):
+    pooled = fresh_transport(monkeypatch)
+
+    async def main():
+        async with StubServer() as stub:
+            monkeypatch.setenv("GROQ_API_BASE", stub.url)
+            # one model per node, as the model registry builds them
+            models = [build_chat_model("groq", "stub", timeout=5) for _ in range(4)]
+            for model in models:
+                for _ in range(5):
+                    assert (await model.ainvoke("hi")).content == "hi"
+            await pooled.aclose()
+            return stub.connections, stub.requests
+
+    assert asyncio.run(main()) == (1, 20)
+
+
+def test_slow_call_is_hedged_after_the_delay(monkeypatch):
+    pooled = fresh_transport(monkeypatch)
+    hedger = Hedger("va_agent", quantile=0.5, min_samples=5)
+
+    async def main():
+        async with StubServer() as stub:
+            async def call(query: str) -> dict:
+                response = await pooled.post_json(f"{stub.url}/search", {"query": query}, {})
+                return response.json()
+
+            hedged = hedger.wrap(RunnableLambda(call))
+            stub.delays = [0.02] * 5
+            for i in range(5):
+                await hedged.ainvoke(f"warm-up {i}")
+            assert hedger.hedged == 0 and hedger.delay() is not None
+
+            # the next request stalls; its backup, sent after the delay, is answered at once
+            stub.delays = [1.0]
+            start = time.perf_counter()
+            result = await hedged.ainvoke("slow")
+            elapsed = time.perf_counter() - start
+            await pooled.aclose()
+            return result, elapsed, stub.requests
+
+    result, elapsed, requests = asyncio.run(main())
+    assert result["query"] == "stub"
+    assert elapsed < 0.5
+    assert requests == 7
+    assert (hedger.hedged, hedger.hedge_wins) == (1, 1)
+
+
+def test_gemini_models_share_one_async_client(monkeypatch):
+    pooled = fresh_transport(monkeypatch)
+    models = [LimitedChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key="test") for _ in range(3)]
+
+    async def main():
+        clients = [model.async_client for model in models]
+        await pooled.aclose()
+        return clients
+
+    clients = asyncio.run(main())
+    assert all(client is clients[0] for client in clients)
+    assert all(model.async_client_running is None for model in models)
+
+
+def test_gemini_models_keep_their_own_client_without_the_private_helpers(monkeypatch):
+    pooled = fresh_transport(monkeypatch)
+    monkeypatch.setattr(transport, "genaix", None)
+    model = LimitedChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key="test")
+
+    async def main():
+        client = model.async_client
+        await client.transport.close()
+        return client, pooled.stats()["gemini_clients"]
+
+    client, shared_clients = asyncio.run(main())
+    assert client is not None and client is model.async_client_running
+    assert shared_clients == 0